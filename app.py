@@ -1,13 +1,39 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_migrate import Migrate
 from database import db
-from models.meal import Meal
+from models.meal import Meal, NUTRITION_FIELDS
 from models.user import User
-from datetime import datetime
+from models.job import Job
+from services.jobs import job_queue, utcnow
+import services.meal_jobs
+from services import search as meal_search
+from services.suggest import meal_names
+from services import idempotency
+from services.compression import compress
+from services import archive
+from services import purge
+from services.sharding import shard_router
+from services.validation import validate_body
+from services.events import meal_events
+from services import timezones
+from services import representation
+from services import analytics
+from services import reports
+from services.profiling import profiler
+from services.coalesce import meal_writes
+from services import sqlite_mode
+from services.access_log import access_log
+from services.tracing import tracer
+from services.health import health
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
 from flask_login import LoginManager, login_user, current_user, login_required, logout_user
 import bcrypt
 from dotenv import load_dotenv
 import os
+import json
+from functools import wraps
 from flasgger import Swagger
 
 load_dotenv()
@@ -16,6 +42,49 @@ app = Flask(__name__)
 
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI')
+app.config['JOBS_IN_PROCESS'] = os.getenv('JOBS_IN_PROCESS', 'false').lower() == 'true'
+app.config['JOBS_CONCURRENCY'] = int(os.getenv('JOBS_CONCURRENCY', 2))
+app.config['SUGGEST_MAX_USERS'] = int(os.getenv('SUGGEST_MAX_USERS', 1000))
+app.config['IDEMPOTENCY_TTL_SECONDS'] = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60))
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 500))
+app.config['COMPRESS_LEVEL'] = int(os.getenv('COMPRESS_LEVEL', 6))
+app.config['COMPRESS_BROTLI_QUALITY'] = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+app.config['ARCHIVE_RETENTION_DAYS'] = int(os.getenv('ARCHIVE_RETENTION_DAYS', 365))
+app.config['MEAL_PURGE_AFTER_DAYS'] = int(os.getenv('MEAL_PURGE_AFTER_DAYS', 30))
+app.config['MEAL_PURGE_BATCH_SIZE'] = int(os.getenv('MEAL_PURGE_BATCH_SIZE', 500))
+app.config['SEARCH_FULLTEXT'] = os.getenv('SEARCH_FULLTEXT', 'true').lower() == 'true'
+app.config['SHARDS'] = json.loads(os.getenv('SHARDS') or '{}')
+app.config['BCRYPT_ROUNDS'] = int(os.getenv('BCRYPT_ROUNDS', 12))
+app.config['BATCH_GET_MAX_IDS'] = int(os.getenv('BATCH_GET_MAX_IDS', 100))
+app.config['ANALYTICS_MAX_DAYS'] = int(os.getenv('ANALYTICS_MAX_DAYS', 3660))
+app.config['EVENTS_HEARTBEAT_SECONDS'] = int(os.getenv('EVENTS_HEARTBEAT_SECONDS', 15))
+app.config['EVENTS_STREAM_TIMEOUT'] = int(os.getenv('EVENTS_STREAM_TIMEOUT', 300))
+app.config['ADMIN_USERNAMES'] = {name.strip() for name in os.getenv('ADMIN_USERNAMES', '').split(',') if name.strip()}
+app.config['REPORTS_PROCESSES'] = int(os.getenv('REPORTS_PROCESSES', 2))
+app.config['REPORTS_CHUNK_USERS'] = int(os.getenv('REPORTS_CHUNK_USERS', 1000))
+app.config['PROFILE_TOKEN'] = os.getenv('PROFILE_TOKEN') or None
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'profiles')
+app.config['WRITE_COALESCE'] = os.getenv('WRITE_COALESCE', 'false').lower() == 'true'
+app.config['WRITE_COALESCE_MAX_BATCH'] = int(os.getenv('WRITE_COALESCE_MAX_BATCH', 64))
+app.config['WRITE_COALESCE_MAX_DELAY_MS'] = float(os.getenv('WRITE_COALESCE_MAX_DELAY_MS', 5))
+app.config['SQLITE_TUNING'] = os.getenv('SQLITE_TUNING', 'true').lower() == 'true'
+app.config['SQLITE_SYNCHRONOUS'] = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+app.config['ACCESS_LOG'] = os.getenv('ACCESS_LOG', 'true').lower() == 'true'
+app.config['ACCESS_LOG_FILE'] = os.getenv('ACCESS_LOG_FILE') or None
+app.config['ACCESS_LOG_QUEUE_SIZE'] = int(os.getenv('ACCESS_LOG_QUEUE_SIZE', 10000))
+app.config['TRACING'] = os.getenv('TRACING', 'false').lower() == 'true'
+app.config['TRACING_SAMPLE_RATE'] = float(os.getenv('TRACING_SAMPLE_RATE', 1.0))
+app.config['TRACING_EXPORT_FILE'] = os.getenv('TRACING_EXPORT_FILE', 'traces.jsonl')
+app.config['TRACING_EXPORT_URL'] = os.getenv('TRACING_EXPORT_URL') or None
+app.config['TRACING_QUEUE_SIZE'] = int(os.getenv('TRACING_QUEUE_SIZE', 1000))
+app.config['WARMUP'] = os.getenv('WARMUP', 'true').lower() == 'true'
+app.config['WARMUP_CONNECTIONS'] = int(os.getenv('WARMUP_CONNECTIONS')) if os.getenv('WARMUP_CONNECTIONS') else None
+app.config['HEALTH_MAX_POOL_SATURATION'] = float(os.getenv('HEALTH_MAX_POOL_SATURATION', 0.9))
+app.config['HEALTH_MAX_QUEUE_DEPTH'] = int(os.getenv('HEALTH_MAX_QUEUE_DEPTH')) if os.getenv('HEALTH_MAX_QUEUE_DEPTH') else None
 
 template = {
   "swagger": "2.0",
@@ -36,6 +105,18 @@ template = {
     {
       "name": "Refeições",
       "description": "Operações relacionadas a refeições"
+    },
+    {
+      "name": "Tarefas",
+      "description": "Acompanhamento de tarefas em segundo plano"
+    },
+    {
+      "name": "Relatórios",
+      "description": "Relatórios agregados de todos os usuários, restritos a administradores"
+    },
+    {
+      "name": "Saúde",
+      "description": "Verificações de vida e prontidão do worker"
     }
   ]
 }
@@ -44,20 +125,48 @@ swagger = Swagger(app, template=template)
 
 login_manager = LoginManager()
 db.init_app(app)
+sqlite_mode.init_app(app)
+shard_router.init_app(app)
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
 @login_manager.user_loader
 def load_user(user_id):
-  return User.query.get(user_id)
+  # a session cookie can outlive its user; without a directory entry the request is anonymous
+  if not shard_router.activate_for_user(int(user_id)):
+    return None
+  return db.session.get(User, int(user_id))
 
 @login_manager.unauthorized_handler
 def unauthorized():
   return jsonify({"error": "Unauthorized access"}), 401
 
+def admin_required(view):
+  """Restricts a view to the users listed in ADMIN_USERNAMES; use it below login_required."""
+  @wraps(view)
+  def wrapper(*args, **kwargs):
+    if current_user.username not in app.config['ADMIN_USERNAMES']:
+      return jsonify({"error": "Unauthorized"}), 403
+    return view(*args, **kwargs)
+  return wrapper
+
 migrate = Migrate(app, db)
+job_queue.init_app(app)
+meal_names.init_app(app)
+idempotency.init_app(app)
+compress.init_app(app)
+archive.init_app(app)
+purge.init_app(app)
+meal_events.init_app(app)
+reports.init_app(app)
+profiler.init_app(app)
+meal_writes.init_app(app)
+access_log.init_app(app)
+tracer.init_app(app)
+health.init_app(app)
 
 @app.route('/users', methods=["POST"])
+@validate_body
 def create_user():
   """
     Criar um novo usuário
@@ -76,10 +185,18 @@ def create_user():
           properties:
             username:
               type: string
+              minLength: 1
+              maxLength: 100
               example: joao123
             password:
               type: string
+              minLength: 1
               example: senha123
+            timezone:
+              type: string
+              format: timezone
+              description: Fuso horário IANA usado para datas sem fuso e para o dia local das refeições
+              example: America/Sao_Paulo
     responses:
       201:
         description: Usuário criado com sucesso
@@ -98,30 +215,85 @@ def create_user():
                 username:
                   type: string
                   example: joao123
+                timezone:
+                  type: string
+                  example: America/Sao_Paulo
       400:
-        description: Campos obrigatórios faltando ou usuário já existe
+        description: Corpo inválido, campos obrigatórios faltando ou usuário já existe
     """
   data = request.get_json()
-  username = data.get('username')
-  password = data.get('password')
+  username = data['username']
+  password = data['password']
 
-  if not username or not password:
-    return jsonify({"error": "Missing required fields"}), 400
-  
-  existing_user = User.query.filter_by(username=username).first()
-  if existing_user:
+  if shard_router.username_taken(username):
     return jsonify({"error": "Username already exists"}), 400
   
-  hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-  user = User(username=username, password=hashed_password)
+  with tracer.span('bcrypt.hashpw', **{"bcrypt.rounds": app.config['BCRYPT_ROUNDS']}):
+    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=app.config['BCRYPT_ROUNDS'])).decode('utf-8')
+  user_id = shard_router.register_user(username)
+  user = User(
+    id=user_id,
+    username=username,
+    password=hashed_password,
+    timezone=data.get('timezone', timezones.DEFAULT_TIMEZONE)
+  )
   db.session.add(user)
-  db.session.commit()
+  try:
+    db.session.commit()
+  except Exception:
+    db.session.rollback()
+    # the directory entry is already committed; left behind, it would keep the username taken
+    shard_router.unregister_user(user_id)
+    raise
 
   return jsonify({"message": "User created", "user": {
     "id": user.id,
-    "username": user.username
+    "username": user.username,
+    "timezone": user.timezone
   }}), 201
 
+@app.route('/users/me', methods=["PATCH"])
+@login_required
+@validate_body
+def update_current_user():
+  """
+    Atualizar preferências do usuário logado
+    ---
+    tags:
+      - Usuários
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - timezone
+          properties:
+            timezone:
+              type: string
+              format: timezone
+              description: Vale para refeições gravadas a partir de agora; o dia local das já gravadas não muda
+              example: America/Sao_Paulo
+    responses:
+      200:
+        description: Usuário atualizado
+        schema:
+          type: object
+      400:
+        description: Corpo inválido
+    """
+  current_user.timezone = request.get_json()['timezone']
+  db.session.commit()
+
+  return jsonify({"message": "User updated", "user": {
+    "id": current_user.id,
+    "username": current_user.username,
+    "timezone": current_user.timezone
+  }}), 200
+
 @app.route('/login', methods=["POST"])
 def login():
   """
@@ -165,11 +337,14 @@ def login():
     return jsonify({"error": "Missing JSON body"}), 400
 
   if username and password:
-    user = User.query.filter_by(username=username).first()
+    user = shard_router.find_user(username)
 
-    if user and bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8')):
-      login_user(user)
-      return jsonify({"message": "Login successful"})
+    if user:
+      with tracer.span('bcrypt.checkpw'):
+        valid = bcrypt.checkpw(password.encode('utf-8'), user.password.encode('utf-8'))
+      if valid:
+        login_user(user)
+        return jsonify({"message": "Login successful"})
   
   return jsonify({"error": "Invalid credentials"}), 401
 
@@ -198,6 +373,8 @@ def logout():
 
 @app.route('/meals', methods=["POST"])
 @login_required
+@validate_body
+@idempotency.idempotent
 def create_meal():
   """
     Criar uma refeição
@@ -207,6 +384,11 @@ def create_meal():
     security:
       - ApiKeyAuth: []
     parameters:
+      - name: Idempotency-Key
+        in: header
+        type: string
+        required: false
+        description: Chave única por tentativa; repetições com a mesma chave retornam a resposta original
       - in: body
         name: body
         required: true
@@ -219,17 +401,45 @@ def create_meal():
           properties:
             name:
               type: string
+              minLength: 1
+              maxLength: 100
               example: Café da manhã
             description:
               type: string
+              minLength: 1
+              maxLength: 200
               example: Pão integral e café preto
             datetime:
               type: string
               format: date-time
+              x-nullable: true
               example: 2025-10-05T08:30:00
             isInDiet:
               type: boolean
               example: true
+            calories:
+              type: integer
+              minimum: 0
+              x-nullable: true
+              example: 450
+            protein:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 30
+            carbs:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 55
+            fat:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 12
     responses:
       201:
         description: Refeição criada com sucesso
@@ -241,26 +451,29 @@ def create_meal():
               example: Meal created
             meal:
               type: object
+      400:
+        description: Corpo inválido ou campos obrigatórios faltando
+      409:
+        description: Requisição com a mesma Idempotency-Key ainda em andamento
+      422:
+        description: Idempotency-Key reutilizada com outro corpo
     """
   data = request.get_json()
-  name = data.get('name')
-  description = data.get('description')
+  name = data['name']
+  description = data['description']
   datetime_value = data.get('datetime')
-  isInDiet = data.get('isInDiet')
+  isInDiet = data['isInDiet']
   userId = current_user.id
 
-  if not name or not description or not userId or isInDiet is None:
-    return jsonify({"error": "Missing required fields"}), 400
-  
-  if datetime_value:
-    meal_datatetime = datetime.fromisoformat(datetime_value)
-    meal= Meal(name=name, description=description, datetime=meal_datatetime, isInDiet=isInDiet, user_id=userId)
-  else:
-    meal= Meal(name=name, description=description, isInDiet=isInDiet, user_id=userId)
-  
-  db.session.add(meal)
-  db.session.commit()
-  return jsonify({"message": "Meal created", "meal": meal.to_dict()}), 201
+  meal_datetime = datetime.fromisoformat(datetime_value) if datetime_value else None
+  zone = timezones.get_zone(current_user.timezone)
+  nutrition = {field: data[field] for field in NUTRITION_FIELDS if field in data}
+  meal = Meal(name=name, description=description, isInDiet=isInDiet, user_id=userId, **nutrition, **timezones.meal_times(meal_datetime, zone))
+
+  created = meal_writes.insert(meal)
+  meal_names.record(userId, added=created['name'])
+  meal_events.publish(userId, 'meal.created', created)
+  return jsonify({"message": "Meal created", "meal": created}), 201
 
 @app.route('/meal/<int:id_meal>', methods=["GET"])
 @login_required
@@ -272,29 +485,47 @@ def get_meal(id_meal):
       - Refeições
     security:
       - ApiKeyAuth: []
+    produces:
+      - application/json
+      - application/msgpack
+      - application/cbor
     parameters:
       - name: id_meal
         in: path
         type: integer
         required: true
         description: ID da refeição
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos a retornar, separados por vírgula (o id sempre vem)
+        example: name,datetime,isInDiet
     responses:
       200:
         description: Refeição encontrada
         schema:
           type: object
+      400:
+        description: Campo desconhecido em fields
       404:
         description: Refeição não encontrada
       403:
         description: Não autorizado
     """
+  try:
+    fields = representation.parse_fields(request.args.get('fields'))
+  except ValueError as error:
+    return jsonify({"error": str(error)}), 400
+
   meal =db.session.get(Meal, id_meal)
+  meal_dict = meal.to_dict() if meal else archive.get_archived_meal(id_meal)
 
-  if meal and meal.user_id != current_user.id:
+  if meal_dict and meal_dict['user_id'] != current_user.id:
     return jsonify({"error": "Unauthorized"}), 403
 
-  if meal:
-    return jsonify(meal.to_dict()), 200
+  if meal_dict:
+    return representation.respond(representation.pick(meal_dict, fields))
   
   return jsonify({"error": "Meal not found"}), 404
 
@@ -308,6 +539,44 @@ def list_meals():
       - Refeições
     security:
       - ApiKeyAuth: []
+    produces:
+      - application/json
+      - application/msgpack
+      - application/cbor
+    parameters:
+      - name: from
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Início do período (inclusivo)
+        example: 2025-10-01T00:00:00
+      - name: to
+        in: query
+        type: string
+        format: date-time
+        required: false
+        description: Fim do período (exclusivo)
+        example: 2025-11-01T00:00:00
+      - name: date
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Dia no fuso do usuário (YYYY-MM-DD ou today); ignora from e to
+        example: 2025-10-05
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: IDs separados por vírgula; retorna um objeto como o de POST /meals/batch-get e ignora os demais filtros
+        example: 3,1,2
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos a retornar, separados por vírgula (o id sempre vem)
+        example: name,datetime,isInDiet
     responses:
       200:
         description: Lista de refeições
@@ -328,7 +597,12 @@ def list_meals():
               datetime:
                 type: string
                 format: date-time
-                example: 2025-10-05T08:30:00
+                description: Em UTC
+                example: 2025-10-05T11:30:00
+              local_date:
+                type: string
+                format: date
+                example: 2025-10-05
               isInDiet:
                 type: boolean
                 example: true
@@ -336,13 +610,329 @@ def list_meals():
                 type: integer
                 example: 1
     """
-  meals = Meal.query.filter_by(user_id=current_user.id)
-  meals_list = [meal.to_dict() for meal in meals]
+  try:
+    fields = representation.parse_fields(request.args.get('fields'))
+  except ValueError as error:
+    return jsonify({"error": str(error)}), 400
+
+  if 'ids' in request.args:
+    try:
+      ids = [int(value) for value in request.args['ids'].split(',') if value.strip()]
+    except ValueError:
+      return jsonify({"error": "Invalid ids"}), 400
+    return _batch_get(ids, fields)
+
+  zone = timezones.get_zone(current_user.timezone)
+  # only the requested columns are selected, and rows are never turned into Meal objects
+  meals = Meal.query.filter_by(user_id=current_user.id).with_entities(*representation.meal_columns(fields))
+
+  if 'date' in request.args:
+    try:
+      day = timezones.today(zone) if request.args['date'] == 'today' else date.fromisoformat(request.args['date'])
+    except ValueError:
+      return jsonify({"error": "Invalid date"}), 400
+    # an indexed equality lookup; the UTC bounds are only needed for the archive
+    meals = meals.filter(Meal.local_date == day)
+    start, end = timezones.utc_bounds(day, zone)
+  else:
+    try:
+      start = timezones.to_utc(datetime.fromisoformat(request.args['from']), zone) if 'from' in request.args else None
+      end = timezones.to_utc(datetime.fromisoformat(request.args['to']), zone) if 'to' in request.args else None
+    except ValueError:
+      return jsonify({"error": "Invalid datetime"}), 400
+
+    if start is not None:
+      meals = meals.filter(Meal.datetime >= start)
+    if end is not None:
+      meals = meals.filter(Meal.datetime < end)
+
+  archived = [representation.pick(item, fields) for item in archive.archived_meals(current_user.id, start, end)]
+  meals_list = archived + [representation.serialize_row(row, fields) for row in meals]
+
+  return representation.respond(meals_list)
 
-  return jsonify(meals_list), 200
+def _batch_get(ids, fields=representation.ALL_FIELDS):
+  ids = list(dict.fromkeys(ids))
+  if not ids or len(ids) > app.config['BATCH_GET_MAX_IDS']:
+    return jsonify({"error": f"Between 1 and {app.config['BATCH_GET_MAX_IDS']} ids are required"}), 400
+
+  rows = Meal.query.filter(Meal.user_id == current_user.id, Meal.id.in_(ids)).with_entities(*representation.meal_columns(fields))
+  found = {item['id']: item for item in (representation.serialize_row(row, fields) for row in rows)}
+  forbidden = set()
+  unresolved = [meal_id for meal_id in ids if meal_id not in found]
+  if unresolved:
+    # only misses pay for telling another user's meal apart from a missing or archived one
+    forbidden = set(db.session.scalars(select(Meal.id).where(Meal.id.in_(unresolved))))
+    archived = archive.get_archived_meals(meal_id for meal_id in unresolved if meal_id not in forbidden)
+    for meal_id, item in archived.items():
+      if item['user_id'] == current_user.id:
+        found[meal_id] = representation.pick(item, fields)
+      else:
+        forbidden.add(meal_id)
+
+  return representation.respond({
+    "meals": [found[meal_id] for meal_id in ids if meal_id in found],
+    "missing": [meal_id for meal_id in ids if meal_id not in found and meal_id not in forbidden],
+    "forbidden": [meal_id for meal_id in ids if meal_id in forbidden]
+  })
+
+@app.route('/meals/batch-get', methods=["POST"])
+@login_required
+@validate_body
+def batch_get_meals():
+  """
+    Buscar várias refeições pelo ID
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    produces:
+      - application/json
+      - application/msgpack
+      - application/cbor
+    parameters:
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: Campos a retornar, separados por vírgula (o id sempre vem)
+        example: name,datetime,isInDiet
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - ids
+          properties:
+            ids:
+              type: array
+              minItems: 1
+              items:
+                type: integer
+              example: [3, 1, 2]
+    responses:
+      200:
+        description: Refeições na ordem pedida, mais os IDs inexistentes e os de outros usuários
+        schema:
+          type: object
+          properties:
+            meals:
+              type: array
+              items:
+                type: object
+            missing:
+              type: array
+              items:
+                type: integer
+            forbidden:
+              type: array
+              items:
+                type: integer
+      400:
+        description: Corpo inválido ou IDs demais
+    """
+  try:
+    fields = representation.parse_fields(request.args.get('fields'))
+  except ValueError as error:
+    return jsonify({"error": str(error)}), 400
+  return _batch_get(request.get_json()['ids'], fields)
+
+@app.route('/meals/analytics', methods=["GET"])
+@login_required
+def meal_analytics():
+  """
+    Tendências da dieta
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Primeiro dia (padrão, 90 dias antes de to)
+        example: 2025-07-01
+      - name: to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Último dia, inclusivo (padrão, hoje no fuso do usuário)
+        example: 2025-10-05
+      - name: window
+        in: query
+        type: integer
+        required: false
+        description: Dias da média móvel de calorias (1 a 90, padrão 7)
+        example: 7
+    responses:
+      200:
+        description: Resumo, totais diários com média móvel, aderência semanal e sequências dentro da dieta
+        schema:
+          type: object
+      400:
+        description: Período ou janela inválidos
+    """
+  zone = timezones.get_zone(current_user.timezone)
+  try:
+    last_day = date.fromisoformat(request.args['to']) if 'to' in request.args else timezones.today(zone)
+    first_day = date.fromisoformat(request.args['from']) if 'from' in request.args else last_day - timedelta(days=89)
+    window = int(request.args.get('window', 7))
+  except ValueError:
+    return jsonify({"error": "Invalid parameters"}), 400
+
+  if first_day > last_day or (last_day - first_day).days >= app.config['ANALYTICS_MAX_DAYS'] or not 1 <= window <= 90:
+    return jsonify({"error": "Invalid parameters"}), 400
+
+  columns = analytics.load_columns(current_user.id, first_day, last_day, zone)
+  return jsonify(analytics.analyze(columns, first_day, last_day, window)), 200
+
+@app.route('/meals/search', methods=["GET"])
+@login_required
+def search_meals():
+  """
+    Buscar refeições por nome e descrição
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Termos de busca
+        example: salada
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de resultados por página (máximo 100)
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: Cursor retornado em next_cursor pela página anterior
+    responses:
+      200:
+        description: Refeições ordenadas por relevância
+        schema:
+          type: object
+          properties:
+            meals:
+              type: array
+              items:
+                type: object
+            next_cursor:
+              type: string
+      400:
+        description: Parâmetros inválidos
+    """
+  query = request.args.get('q', '').strip()
+  if not query:
+    return jsonify({"error": "Missing required fields"}), 400
+
+  try:
+    limit = int(request.args.get('limit', 20))
+    meals, next_cursor = meal_search.search_meals(current_user.id, query, limit, request.args.get('cursor'))
+  except ValueError:
+    return jsonify({"error": "Invalid pagination parameters"}), 400
+
+  return jsonify({"meals": [meal.to_dict() for meal in meals], "next_cursor": next_cursor}), 200
+
+@app.route('/meals/suggest', methods=["GET"])
+@login_required
+def suggest_meals():
+  """
+    Sugerir nomes de refeições já registradas
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+        description: Início do nome da refeição
+        example: Caf
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Quantidade máxima de sugestões (padrão 10, máximo 50)
+    responses:
+      200:
+        description: Nomes mais usados que começam com o prefixo
+        schema:
+          type: object
+          properties:
+            suggestions:
+              type: array
+              items:
+                type: object
+                properties:
+                  name:
+                    type: string
+                    example: Café da manhã
+                  count:
+                    type: integer
+                    example: 12
+      400:
+        description: Parâmetros inválidos
+    """
+  prefix = request.args.get('prefix', '').strip()
+  if not prefix:
+    return jsonify({"error": "Missing required fields"}), 400
+
+  try:
+    limit = int(request.args.get('limit', 10))
+  except ValueError:
+    return jsonify({"error": "Invalid limit"}), 400
+
+  limit = max(1, min(limit, 50))
+  suggestions = meal_names.suggest(current_user.id, prefix, limit)
+  return jsonify({"suggestions": suggestions}), 200
+
+@app.route('/meals/stream', methods=["GET"])
+@login_required
+def stream_meals():
+  """
+    Acompanhar alterações nas refeições (Server-Sent Events)
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    produces:
+      - text/event-stream
+    parameters:
+      - name: Last-Event-ID
+        in: header
+        type: string
+        required: false
+        description: Último evento recebido; os eventos perdidos desde então são reenviados
+    responses:
+      200:
+        description: Fluxo de eventos meal.created, meal.updated e meal.deleted; reset pede que o cliente recarregue as refeições
+    """
+  last_event_id = request.headers.get('Last-Event-ID')
+  return Response(
+    meal_events.stream(current_user.id, last_event_id),
+    mimetype='text/event-stream',
+    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+  )
 
 @app.route('/meal/<int:id_meal>', methods=["PUT"])
 @login_required
+@validate_body
 def update_meal(id_meal):
   """
     Atualizar refeição
@@ -365,9 +955,13 @@ def update_meal(id_meal):
           properties:
             name:
               type: string
+              minLength: 1
+              maxLength: 100
               example: Jantar
             description:
               type: string
+              minLength: 1
+              maxLength: 200
               example: Salada e frango grelhado
             datetime:
               type: string
@@ -376,15 +970,42 @@ def update_meal(id_meal):
             isInDiet:
               type: boolean
               example: false
+            calories:
+              type: integer
+              minimum: 0
+              x-nullable: true
+              example: 450
+            protein:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 30
+            carbs:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 55
+            fat:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 12
     responses:
       200:
-        description: Refeição atualizada
+        description: Refeição atualizada; só os campos enviados são alterados
         schema:
           type: object
+      400:
+        description: Corpo inválido
       404:
         description: Refeição não encontrada
       403:
         description: Não autorizado
+      409:
+        description: A refeição foi alterada por outra requisição durante a atualização
     """
   meal = db.session.get(Meal, id_meal)
 
@@ -394,16 +1015,154 @@ def update_meal(id_meal):
   if meal.user_id != current_user.id:
     return jsonify({"error": "Unauthorized"}), 403
   
-  data = request.json
-  meal.name = data.get('name')
-  meal.description = data.get('description')
+  data = request.get_json()
+  previous_name = meal.name
+  if 'name' in data:
+    meal.name = data['name']
+  if 'description' in data:
+    meal.description = data['description']
   if 'datetime' in data:
-    meal.datetime = datetime.fromisoformat(data.get('datetime'))
-  meal.isInDiet = data.get('isInDiet')
-  db.session.commit()
+    times = timezones.meal_times(datetime.fromisoformat(data['datetime']), timezones.get_zone(current_user.timezone))
+    meal.datetime, meal.local_date = times['datetime'], times['local_date']
+  if 'isInDiet' in data:
+    meal.isInDiet = data['isInDiet']
+  for field in NUTRITION_FIELDS:
+    if field in data:
+      setattr(meal, field, data[field])
+  try:
+    db.session.commit()
+  except StaleDataError:
+    db.session.rollback()
+    current = db.session.get(Meal, id_meal)
+    if not current:
+      return jsonify({"error": "Meal not found"}), 404
+    return jsonify({"error": "Meal was modified by another request", "meal": current.to_dict()}), 409
+  meal_names.record(current_user.id, added=meal.name, removed=previous_name)
+  meal_events.publish(current_user.id, 'meal.updated', meal.to_dict())
 
   return jsonify({"message": "Meal updated", "meal": meal.to_dict()}), 200
 
+@app.route('/meal/<int:id_meal>', methods=["PATCH"])
+@login_required
+@validate_body
+def patch_meal(id_meal):
+  """
+    Atualizar parte de uma refeição
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: id_meal
+        in: path
+        type: integer
+        required: true
+        description: ID da refeição
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - version
+          properties:
+            version:
+              type: integer
+              description: Versão da refeição lida pelo cliente
+              example: 3
+            name:
+              type: string
+              minLength: 1
+              maxLength: 100
+              example: Jantar
+            description:
+              type: string
+              minLength: 1
+              maxLength: 200
+              example: Salada e frango grelhado
+            datetime:
+              type: string
+              format: date-time
+              example: 2025-10-05T20:00:00
+            isInDiet:
+              type: boolean
+              example: false
+            calories:
+              type: integer
+              minimum: 0
+              x-nullable: true
+              example: 450
+            protein:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 30
+            carbs:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 55
+            fat:
+              type: number
+              minimum: 0
+              x-nullable: true
+              description: Gramas
+              example: 12
+    responses:
+      200:
+        description: Refeição atualizada; só os campos enviados são alterados e a versão é incrementada
+        schema:
+          type: object
+      400:
+        description: Corpo inválido
+      404:
+        description: Refeição não encontrada
+      403:
+        description: Não autorizado
+      409:
+        description: A refeição foi alterada depois de lida; a resposta traz a versão atual
+    """
+  data = request.get_json()
+  changes = {field: data[field] for field in ('name', 'description', 'isInDiet', *NUTRITION_FIELDS) if field in data}
+  if 'datetime' in data:
+    changes.update(timezones.meal_times(datetime.fromisoformat(data['datetime']), timezones.get_zone(current_user.timezone)))
+
+  # a single conditional UPDATE: ownership and the version check happen in the same statement
+  statement = (
+    update(Meal)
+    .where(Meal.id == id_meal, Meal.user_id == current_user.id, Meal.version == data['version'], Meal.deleted_at.is_(None))
+    .values(**changes, version=Meal.version + 1)
+    .execution_options(synchronize_session=False)
+  )
+  if db.session.get_bind(Meal).dialect.update_returning:
+    meal = db.session.scalars(statement.returning(Meal)).one_or_none()
+  else:
+    updated = db.session.execute(statement).rowcount
+    meal = db.session.get(Meal, id_meal, populate_existing=True) if updated else None
+
+  if meal is None:
+    current = db.session.get(Meal, id_meal)
+    if not current:
+      return jsonify({"error": "Meal not found"}), 404
+    if current.user_id != current_user.id:
+      return jsonify({"error": "Unauthorized"}), 403
+    return jsonify({"error": "Meal was modified by another request", "meal": current.to_dict()}), 409
+
+  if 'name' in changes or 'description' in changes:
+    meal_search.reindex_meal(db.session.connection(), meal)
+  # serialized before the commit expires it, so the response needs no extra SELECT
+  result = meal.to_dict()
+  db.session.commit()
+  if 'name' in changes:
+    # the old name was never read, so the cached index is rebuilt instead of patched
+    meal_names.invalidate(current_user.id)
+  meal_events.publish(current_user.id, 'meal.updated', result)
+
+  return jsonify({"message": "Meal updated", "meal": result}), 200
+
 @app.route('/meal/<int:id_meal>', methods=["DELETE"])
 @login_required
 def delete_meal(id_meal):
@@ -422,7 +1181,7 @@ def delete_meal(id_meal):
         description: ID da refeição
     responses:
       200:
-        description: Refeição deletada com sucesso
+        description: Refeição deletada com sucesso; pode ser restaurada até ser expurgada
         schema:
           type: object
           properties:
@@ -434,18 +1193,356 @@ def delete_meal(id_meal):
       403:
         description: Não autorizado
     """
-  meal = db.session.get(Meal, id_meal)
+  # a single-row UPDATE; the purge job removes the row later, off the request path
+  statement = (
+    update(Meal)
+    .where(Meal.id == id_meal, Meal.user_id == current_user.id, Meal.deleted_at.is_(None))
+    .values(deleted_at=utcnow())
+    .execution_options(synchronize_session=False)
+  )
+  if db.session.get_bind(Meal).dialect.update_returning:
+    name = db.session.scalar(statement.returning(Meal.name))
+    deleted = name is not None
+  else:
+    name = None
+    deleted = db.session.execute(statement).rowcount == 1
 
-  if not meal:
-    return jsonify({"error": "Meal not found"}), 404
-  
-  if meal.user_id != current_user.id:
+  if not deleted:
+    meal = db.session.get(Meal, id_meal)
+    if not meal:
+      return jsonify({"error": "Meal not found"}), 404
     return jsonify({"error": "Unauthorized"}), 403
-  
-  db.session.delete(meal)
+
+  meal_search.unindex_meals(db.session.connection(), [id_meal])
   db.session.commit()
+  if name is not None:
+    meal_names.record(current_user.id, removed=name)
+  else:
+    meal_names.invalidate(current_user.id)
+  meal_events.publish(current_user.id, 'meal.deleted', {"id": id_meal})
 
   return jsonify({"message": "Meal deleted"}), 200
 
+@app.route('/meal/<int:id_meal>/restore', methods=["POST"])
+@login_required
+def restore_meal(id_meal):
+  """
+    Restaurar refeição deletada
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: id_meal
+        in: path
+        type: integer
+        required: true
+        description: ID da refeição
+    responses:
+      200:
+        description: Refeição restaurada (ou já ativa)
+        schema:
+          type: object
+      404:
+        description: Refeição não encontrada ou já expurgada
+      403:
+        description: Não autorizado
+    """
+  restored = db.session.execute(
+    update(Meal)
+    .where(Meal.id == id_meal, Meal.user_id == current_user.id, Meal.deleted_at.is_not(None))
+    .values(deleted_at=None)
+    .execution_options(synchronize_session=False)
+  ).rowcount == 1
+
+  meal = db.session.get(Meal, id_meal, populate_existing=True)
+  if not meal:
+    current = db.session.scalar(select(Meal).where(Meal.id == id_meal).execution_options(include_deleted=True))
+    if current is None:
+      return jsonify({"error": "Meal not found"}), 404
+    return jsonify({"error": "Unauthorized"}), 403
+
+  if meal.user_id != current_user.id:
+    return jsonify({"error": "Unauthorized"}), 403
+
+  result = meal.to_dict()
+  if restored:
+    meal_search.reindex_meal(db.session.connection(), meal)
+    db.session.commit()
+    meal_names.record(current_user.id, added=result['name'])
+    # to clients the meal simply comes back
+    meal_events.publish(current_user.id, 'meal.created', result)
+
+  return jsonify({"message": "Meal restored", "meal": result}), 200
+
+@app.route('/meals/export', methods=["POST"])
+@login_required
+def export_meals():
+  """
+    Exportar refeições em segundo plano
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    responses:
+      202:
+        description: Exportação enfileirada; acompanhe em /jobs/{id_job}
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: Export queued
+            job:
+              type: object
+    """
+  job = job_queue.enqueue('meals.export', user_id=current_user.id)
+  return jsonify({"message": "Export queued", "job": job.to_dict()}), 202
+
+@app.route('/meals/import', methods=["POST"])
+@login_required
+@validate_body
+def import_meals():
+  """
+    Importar refeições em segundo plano
+    ---
+    tags:
+      - Refeições
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - meals
+          properties:
+            meals:
+              type: array
+              minItems: 1
+              items:
+                type: object
+                required:
+                  - name
+                  - description
+                  - isInDiet
+                properties:
+                  name:
+                    type: string
+                    minLength: 1
+                    maxLength: 100
+                    example: Almoço
+                  description:
+                    type: string
+                    minLength: 1
+                    maxLength: 200
+                    example: Arroz e feijão
+                  datetime:
+                    type: string
+                    format: date-time
+                    x-nullable: true
+                    example: 2025-10-05T12:00:00
+                  isInDiet:
+                    type: boolean
+                    example: true
+                  calories:
+                    type: integer
+                    minimum: 0
+                    x-nullable: true
+                    example: 450
+                  protein:
+                    type: number
+                    minimum: 0
+                    x-nullable: true
+                    description: Gramas
+                    example: 30
+                  carbs:
+                    type: number
+                    minimum: 0
+                    x-nullable: true
+                    description: Gramas
+                    example: 55
+                  fat:
+                    type: number
+                    minimum: 0
+                    x-nullable: true
+                    description: Gramas
+                    example: 12
+    responses:
+      202:
+        description: Importação enfileirada; acompanhe em /jobs/{id_job}
+      400:
+        description: Corpo inválido ou campos obrigatórios faltando
+    """
+  meals = request.get_json()['meals']
+  job = job_queue.enqueue('meals.import', {"meals": meals}, user_id=current_user.id)
+  return jsonify({"message": "Import queued", "job": job.to_dict()}), 202
+
+@app.route('/jobs/<int:id_job>', methods=["GET"])
+@login_required
+def get_job(id_job):
+  """
+    Consultar o status de uma tarefa
+    ---
+    tags:
+      - Tarefas
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: id_job
+        in: path
+        type: integer
+        required: true
+        description: ID da tarefa
+    responses:
+      200:
+        description: Status da tarefa (queued, running, done ou failed)
+        schema:
+          type: object
+      404:
+        description: Tarefa não encontrada
+      403:
+        description: Não autorizado
+    """
+  job = db.session.get(Job, id_job)
+
+  if not job:
+    return jsonify({"error": "Job not found"}), 404
+
+  if job.user_id != current_user.id:
+    return jsonify({"error": "Unauthorized"}), 403
+
+  return jsonify(job.to_dict()), 200
+
+@app.route('/admin/reports/population', methods=["POST"])
+@login_required
+@admin_required
+def run_population_report():
+  """
+    Gerar o relatório da população em segundo plano
+    ---
+    tags:
+      - Relatórios
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: from
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Primeiro dia local (padrão, REPORTS_DEFAULT_DAYS dias antes de to)
+        example: 2025-09-06
+      - name: to
+        in: query
+        type: string
+        format: date
+        required: false
+        description: Último dia local, inclusivo (padrão, hoje em UTC)
+        example: 2025-10-05
+    responses:
+      202:
+        description: Relatório enfileirado; acompanhe em /jobs/{id_job} e leia em GET /admin/reports/population
+      400:
+        description: Período inválido
+      403:
+        description: Usuário não é administrador
+    """
+  try:
+    first_day, last_day = reports.default_period(date.fromisoformat(request.args['to']) if 'to' in request.args else None)
+    if 'from' in request.args:
+      first_day = date.fromisoformat(request.args['from'])
+  except ValueError:
+    return jsonify({"error": "Invalid parameters"}), 400
+
+  if first_day > last_day or (last_day - first_day).days >= app.config['ANALYTICS_MAX_DAYS']:
+    return jsonify({"error": "Invalid parameters"}), 400
+
+  job = job_queue.enqueue('reports.population', {"from": first_day.isoformat(), "to": last_day.isoformat()},
+                          user_id=current_user.id)
+  return jsonify({"message": "Report queued", "job": job.to_dict()}), 202
+
+@app.route('/admin/reports/population', methods=["GET"])
+@login_required
+@admin_required
+def get_population_report():
+  """
+    Último relatório da população
+    ---
+    tags:
+      - Relatórios
+    security:
+      - ApiKeyAuth: []
+    responses:
+      200:
+        description: Snapshot mais recente com usuários ativos por dia e a distribuição da aderência à dieta
+        schema:
+          type: object
+      403:
+        description: Usuário não é administrador
+      404:
+        description: Nenhum relatório gerado ainda
+    """
+  snapshot = reports.latest_snapshot(reports.POPULATION)
+
+  if snapshot is None:
+    return jsonify({"error": "Report not found"}), 404
+
+  return jsonify(snapshot.to_dict()), 200
+
+@health.warmer
+def warm_up_routes():
+  """Runs the login and meal route statements once, for a user that doesn't exist, and builds the API spec."""
+  swagger.get_apispecs()
+  shard_router.find_user('')
+  zone = timezones.get_zone(timezones.DEFAULT_TIMEZONE)
+  day = timezones.today(zone)
+  start, end = timezones.utc_bounds(day, zone)
+  columns = representation.meal_columns(representation.ALL_FIELDS)
+  for _ in shard_router.each_shard():
+    db.session.get(User, 0)
+    db.session.get(Meal, 0)
+    archive.get_archived_meal(0)
+    Meal.query.filter_by(user_id=0).with_entities(*columns).filter(Meal.local_date == day).all()
+    Meal.query.filter_by(user_id=0).with_entities(*columns).filter(Meal.datetime >= start).filter(Meal.datetime < end).all()
+    # a range older than the horizon, or the archive isn't queried at all
+    archive.archived_meals(0, archive.horizon() - timedelta(days=31), archive.horizon())
+  db.session.rollback()
+
+@app.route('/healthz', methods=["GET"])
+def healthz():
+  """
+    Verificação de vida
+    ---
+    tags:
+      - Saúde
+    responses:
+      200:
+        description: O processo está atendendo requisições (não consulta o banco)
+    """
+  return jsonify({"status": "ok"}), 200
+
+@app.route('/readyz', methods=["GET"])
+def readyz():
+  """
+    Verificação de prontidão
+    ---
+    tags:
+      - Saúde
+    responses:
+      200:
+        description: Aquecido, bancos respondendo, pools e fila de tarefas dentro dos limites
+        schema:
+          type: object
+      503:
+        description: Ainda aquecendo, banco fora do ar, pool saturado ou fila de tarefas acima do limite
+    """
+  ready, report = health.check()
+  return jsonify(report), 200 if ready else 503
+
 if __name__ == '__main__':
   app.run(debug=True)
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.analytics import MealColumns, analyze
+
+
+def history(years, meals_per_day=5):
+    """Rows shaped like the analytics query result, for ``years`` of daily logging."""
+    random.seed(years)
+    first_day = date(2020, 1, 1)
+    columns = {'local_date': [], 'datetime': [], 'isInDiet': [], 'calories': [], 'protein': [], 'carbs': [], 'fat': []}
+    for offset in range(365 * years):
+        day = first_day + timedelta(days=offset)
+        for meal in range(meals_per_day):
+            columns['local_date'].append(day)
+            columns['datetime'].append(datetime.combine(day, datetime.min.time()) + timedelta(hours=7 + 3 * meal))
+            columns['isInDiet'].append(random.random() < 0.8)
+            tracked = random.random() < 0.7
+            columns['calories'].append(random.randint(150, 900) if tracked else None)
+            columns['protein'].append(random.uniform(5, 50) if tracked else None)
+            columns['carbs'].append(random.uniform(10, 100) if tracked else None)
+            columns['fat'].append(random.uniform(2, 40) if tracked else None)
+    return first_day, first_day + timedelta(days=365 * years - 1), columns
+
+
+def main():
+    for years in [1, 3, 5, 10]:
+        first_day, last_day, rows = history(years)
+        nutrition = {field: rows[field] for field in ('calories', 'protein', 'carbs', 'fat')}
+
+        runs = 10
+        start = time.perf_counter()
+        for _ in range(runs):
+            columns = MealColumns.from_columns(rows['local_date'], rows['datetime'], rows['isInDiet'], nutrition)
+        to_arrays = (time.perf_counter() - start) / runs
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            analyze(columns, first_day, last_day, window=7)
+        compute = (time.perf_counter() - start) / runs
+
+        print(f"{years:2d} year(s), {len(rows['local_date']):6d} meals: "
+              f"to arrays {to_arrays * 1e3:7.2f} ms, analyze {compute * 1e3:7.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
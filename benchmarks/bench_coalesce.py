@@ -0,0 +1,70 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# a file database, so every commit pays for a real fsync
+_directory = tempfile.mkdtemp()
+os.environ['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(_directory, 'bench.db')}"
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('JOBS_IN_PROCESS', 'false')
+os.environ.setdefault('ACCESS_LOG', 'false')
+os.environ.setdefault('WARMUP', 'false')
+
+from app import app, db
+from models.meal import Meal
+from services.coalesce import meal_writes
+
+BODY = {'name': "Almoço", 'description': "Arroz e feijão", 'datetime': "2025-10-05T12:30:00", 'isInDiet': True}
+
+
+def login(index):
+    client = app.test_client()
+    client.post('/users', json={'username': f"bench{index}", 'password': 'bench'})
+    client.post('/login', json={'username': f"bench{index}", 'password': 'bench'})
+    return client
+
+
+def run(clients, meals_per_client):
+    barrier = threading.Barrier(len(clients))
+    failures = []
+
+    def work(client):
+        barrier.wait()
+        for _ in range(meals_per_client):
+            if client.post('/meals', json=BODY).status_code != 201:
+                failures.append(1)
+
+    threads = [threading.Thread(target=work, args=(client,)) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, len(failures)
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+    clients = [login(index) for index in range(32)]
+
+    for concurrency in [1, 8, 32]:
+        for label, enabled in [("commit per request", False), ("coalesced", True)]:
+            meal_writes.enabled = enabled
+            meals = 40
+            elapsed, failed = run(clients[:concurrency], meals)
+            total = concurrency * meals
+            print(f"{concurrency:3d} clients, {label:19} {total / elapsed:8.0f} meals/s"
+                  + (f"  ({failed} failed)" if failed else ""))
+
+    with app.app_context():
+        print(f"{db.session.query(Meal).count()} meals written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.compression import brotli
+
+NAMES = ["Café da manhã", "Almoço", "Lanche da tarde", "Jantar", "Ceia"]
+DESCRIPTIONS = [
+    "Pão integral e café preto",
+    "Arroz, feijão, peito de frango grelhado e salada",
+    "Iogurte natural com granola e frutas",
+    "Sopa de legumes com torradas",
+    "Omelete com queijo branco e tomate",
+]
+
+
+def meal_list(count):
+    random.seed(count)
+    return json.dumps([{
+        "id": index,
+        "name": random.choice(NAMES),
+        "description": random.choice(DESCRIPTIONS),
+        "datetime": f"2025-10-{index % 28 + 1:02d}T{random.randint(6, 22):02d}:00:00",
+        "isInDiet": random.random() < 0.7,
+        "user_id": 1
+    } for index in range(count)]).encode('utf-8')
+
+
+def measure(label, body, func, runs=50):
+    start = time.perf_counter()
+    for _ in range(runs):
+        compressed = func(body)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"  {label:12} {len(compressed):9d} bytes  {len(compressed) / len(body):6.1%}  {elapsed * 1e3:7.3f} ms")
+
+
+def main():
+    for count in [10, 100, 1000, 10000]:
+        body = meal_list(count)
+        print(f"{count} meals: {len(body)} bytes uncompressed")
+        for level in [1, 6, 9]:
+            measure(f"gzip-{level}", body, lambda data: gzip.compress(data, compresslevel=level, mtime=0))
+        if brotli is not None:
+            for quality in [1, 4, 11]:
+                runs = 5 if quality == 11 else 50
+                measure(f"brotli-{quality}", body, lambda data: brotli.compress(data, quality=quality), runs)
+        else:
+            print("  brotli       not installed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.representation import ALL_FIELDS, cbor2, msgpack, parse_fields
+
+from bench_compression import DESCRIPTIONS, NAMES
+
+
+def meal_list(count, fields):
+    meals = [{
+        "id": index,
+        "name": NAMES[index % len(NAMES)],
+        "description": DESCRIPTIONS[index % len(DESCRIPTIONS)],
+        "datetime": f"2025-10-{index % 28 + 1:02d}T12:00:00",
+        "local_date": f"2025-10-{index % 28 + 1:02d}",
+        "isInDiet": index % 3 != 0,
+        "user_id": 1,
+        "version": 1
+    } for index in range(count)]
+    return [{name: meal[name] for name in fields} for meal in meals]
+
+
+def measure(label, data, encode, runs=50):
+    start = time.perf_counter()
+    for _ in range(runs):
+        body = encode(data)
+    elapsed = (time.perf_counter() - start) / runs
+    print(f"  {label:32} {len(body):9d} bytes  {elapsed * 1e3:7.3f} ms")
+
+
+def main():
+    encoders = {"json": lambda data: json.dumps(data).encode('utf-8')}
+    if msgpack is not None:
+        encoders["msgpack"] = msgpack.packb
+    if cbor2 is not None:
+        encoders["cbor"] = cbor2.dumps
+
+    for count in [100, 1000, 10000]:
+        print(f"{count} meals:")
+        for label, fields in [("all fields", ALL_FIELDS), ("name,datetime,isInDiet", parse_fields("name,datetime,isInDiet"))]:
+            data = meal_list(count, fields)
+            for encoding, encode in encoders.items():
+                measure(f"{encoding} {label}", data, encode)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Meal endpoint latency on SQLite (stock pragmas vs. production mode) and, optionally, MySQL.
+
+Each target runs in its own process, since the app reads its configuration
+on import. Set ``BENCH_MYSQL_URI`` to an empty scratch database to include
+MySQL; the benchmark creates its tables there and drops them at the end.
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BODY = {'name': "Almoço", 'description': "Arroz e feijão", 'isInDiet': True, 'calories': 600}
+
+
+def timed(func, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    return (time.perf_counter() - start) / runs * 1e3
+
+
+def child(runs, threads):
+    sys.path.append(ROOT)
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+    try:
+        client = app.test_client()
+        client.post('/users', json={'username': 'bench', 'password': 'bench'})
+        client.post('/login', json={'username': 'bench', 'password': 'bench'})
+
+        def create():
+            day = random.randint(1, 28)
+            response = client.post('/meals', json={**BODY, 'datetime': f"2025-10-{day:02d}T12:30:00"})
+            ids.append(response.get_json()['meal']['id'])
+
+        ids = []
+        results = {"POST /meals": timed(create, runs)}
+        results["GET /meals?date="] = timed(lambda: client.get(f"/meals?date=2025-10-{random.randint(1, 28):02d}"), runs)
+        results["GET /meal/<id>"] = timed(lambda: client.get(f"/meal/{random.choice(ids)}"), runs)
+
+        def patch():
+            meal_id = random.choice(ids)
+            version = client.get(f"/meal/{meal_id}?fields=version").get_json()['version']
+            client.patch(f"/meal/{meal_id}", json={'version': version, 'isInDiet': random.random() < 0.5})
+        results["GET + PATCH /meal/<id>"] = timed(patch, runs)
+
+        # readers and writers together, where WAL matters most
+        clients = []
+        for index in range(threads):
+            other = app.test_client()
+            other.post('/users', json={'username': f"bench{index}", 'password': 'bench'})
+            other.post('/login', json={'username': f"bench{index}", 'password': 'bench'})
+            clients.append(other)
+        errors = []
+
+        def mixed(other):
+            for _ in range(runs // threads):
+                if random.random() < 0.2:
+                    response = other.post('/meals', json={**BODY, 'datetime': "2025-10-05T12:30:00"})
+                else:
+                    response = other.get("/meals?date=2025-10-05")
+                if response.status_code >= 500:
+                    errors.append(response.status_code)
+
+        workers = [threading.Thread(target=mixed, args=(other,)) for other in clients]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        results[f"mixed, {threads} threads (req/s)"] = (runs // threads) * threads / elapsed
+        results["mixed errors"] = len(errors)
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+    print(json.dumps(results))
+
+
+def run_target(env, runs, threads):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', str(runs), str(threads)],
+        env={**os.environ, 'SECRET_KEY': 'bench', 'BCRYPT_ROUNDS': '4', 'JOBS_IN_PROCESS': 'false', 'ACCESS_LOG': 'false', 'WARMUP': 'false', **env},
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs=500, threads=8):
+    directory = tempfile.mkdtemp()
+    targets = [
+        ("sqlite, stock pragmas", {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{directory}/stock.db", 'SQLITE_TUNING': 'false'}),
+        ("sqlite, production mode", {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{directory}/tuned.db", 'SQLITE_TUNING': 'true'}),
+    ]
+    if os.environ.get('BENCH_MYSQL_URI'):
+        targets.append(("mysql", {'SQLALCHEMY_DATABASE_URI': os.environ['BENCH_MYSQL_URI']}))
+    else:
+        print("BENCH_MYSQL_URI not set; skipping MySQL")
+
+    results = {label: run_target(env, runs, threads) for label, env in targets}
+    metrics = list(next(iter(results.values())))
+    print(f"{'':32}" + "".join(f"{label:>26}" for label in results))
+    for metric in metrics:
+        unit = "" if "req/s" in metric or "errors" in metric else " ms"
+        print(f"{metric:32}" + "".join(f"{values[metric]:>23.2f}{unit:3}" for values in results.values()))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        child(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,27 @@
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.suggest import NameIndex
+
+
+def main():
+    random.seed(42)
+    counts = {
+        "".join(random.choices(string.ascii_lowercase + " ", k=random.randint(5, 30))): random.randint(1, 50)
+        for _ in range(5000)
+    }
+    index = NameIndex(counts)
+
+    for prefix in ["a", "ab", "abc"]:
+        runs = 2000
+        seconds = timeit.timeit(lambda: index.suggest(prefix, 10), number=runs)
+        print(f"prefix={prefix!r:7} {seconds / runs * 1e6:8.1f} us/query")
+
+
+if __name__ == '__main__':
+    main()
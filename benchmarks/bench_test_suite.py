@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def run(args, runs=3):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *args],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        timings.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            raise SystemExit(f"pytest {' '.join(args)} failed with exit code {result.returncode}")
+    return min(timings), sum(timings) / len(timings)
+
+
+def main():
+    variants = [("serial", [])]
+    try:
+        import xdist  # noqa: F401
+        variants.append(("xdist -n auto", ["-n", "auto"]))
+    except ImportError:
+        print("pytest-xdist not installed; skipping the parallel run")
+
+    for label, args in variants:
+        best, mean = run(args)
+        print(f"{label:14} best {best:6.2f}s  mean {mean:6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
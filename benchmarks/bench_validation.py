@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///:memory:')
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('JOBS_IN_PROCESS', 'false')
+os.environ.setdefault('ACCESS_LOG', 'false')
+os.environ.setdefault('WARMUP', 'false')
+
+from jsonschema import Draft4Validator
+
+from app import app, db
+from services.validation import body_schema
+
+PAYLOADS = {
+    "valid": {'name': "Almoço", 'description': "Arroz e feijão", 'datetime': "2025-10-05T12:00:00", 'isInDiet': True},
+    "invalid": {'name': "x" * 101, 'isInDiet': "sim"},
+}
+
+
+def measure(label, func, runs):
+    seconds = timeit.timeit(func, number=runs)
+    print(f"  {label:22} {seconds / runs * 1e6:8.1f} us")
+
+
+def main():
+    view = app.view_functions['create_meal']
+    schema = body_schema(view.__doc__)
+    draft4 = Draft4Validator(schema)
+
+    print("validator only:")
+    for label, payload in PAYLOADS.items():
+        measure(f"compiled ({label})", lambda: view.validator(payload, '', []), 20000)
+        measure(f"jsonschema ({label})", lambda: list(draft4.iter_errors(payload)), 2000)
+
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/users', json={'username': 'bench', 'password': 'bench'})
+    client.post('/login', json={'username': 'bench', 'password': 'bench'})
+
+    print("POST /meals, full request:")
+    for label, payload in PAYLOADS.items():
+        body = json.dumps(payload)
+        measure(label, lambda: client.post('/meals', data=body, content_type='application/json'), 500)
+
+
+if __name__ == '__main__':
+    main()
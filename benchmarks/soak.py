@@ -0,0 +1,199 @@
+"""Soak test: drives the app with mixed traffic and reports memory retained per request.
+
+Run ``python benchmarks/soak.py --requests 50000`` for a long soak. The
+warm-up has to be long enough to fill the bounded caches (event history,
+name suggestions, SQLAlchemy's statement cache), which otherwise show up
+as growth. Growth is then measured from the first checkpoint to the
+last, and the script exits with status 1 when it exceeds ``--budget``
+bytes per request.
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///:memory:')
+os.environ.setdefault('SECRET_KEY', 'bench')
+os.environ.setdefault('BCRYPT_ROUNDS', '4')
+os.environ.setdefault('JOBS_IN_PROCESS', 'false')
+os.environ.setdefault('ACCESS_LOG', 'false')
+os.environ.setdefault('WARMUP', 'false')
+
+from flask import request
+
+from app import app, db
+from services.purge import purge_meals
+
+NAMES = ["Café da manhã", "Almoço", "Lanche", "Jantar", "Ceia", "Salada", "Omelete", "Sopa"]
+
+
+class IdentityMapStats:
+    """Identity-map size of the request's session, sampled just before the response goes out."""
+
+    def __init__(self):
+        # rule -> [requests, total size, max size]; fixed size, so the harness itself doesn't grow
+        self.sizes = defaultdict(lambda: [0, 0, 0])
+
+    def after_request(self, response):
+        size = len(db.session.identity_map)
+        stats = self.sizes[request.url_rule.rule if request.url_rule else request.path]
+        stats[0] += 1
+        stats[1] += size
+        stats[2] = max(stats[2], size)
+        return response
+
+    def report(self):
+        print("identity map size per request (mean / max):")
+        for rule, (count, total, largest) in sorted(self.sizes.items()):
+            print(f"  {rule:28} {total / count:7.1f} / {largest:5d}  ({count} requests)")
+
+
+class Traffic:
+    """One logged-in client issuing a weighted mix of reads and writes.
+
+    Meals are deleted and purged as fast as they are created once ``keep``
+    is reached, so the database stays the same size and growth points at
+    the process. A DELETE alone only soft-deletes the row.
+    """
+
+    def __init__(self, index, keep=200):
+        self.client = app.test_client()
+        self.username = f"soak{index}"
+        self.keep = keep
+        self.meals = []
+        self.client.post('/users', json={'username': self.username, 'password': 'soak'})
+        self.client.post('/login', json={'username': self.username, 'password': 'soak'})
+
+    def meal_body(self):
+        day = random.randint(1, 28)
+        return {
+            'name': random.choice(NAMES),
+            'description': "Prato do dia " * random.randint(1, 5),
+            'datetime': f"2025-10-{day:02d}T{random.randint(6, 22):02d}:00:00",
+            'isInDiet': random.random() < 0.7,
+            'calories': random.randint(100, 900)
+        }
+
+    def create(self):
+        response = self.client.post('/meals', json=self.meal_body())
+        self.meals.append(response.get_json()['meal']['id'])
+        if len(self.meals) > self.keep:
+            self.client.delete(f"/meal/{self.meals.pop(0)}")
+            with app.app_context():
+                purge_meals(pause_ms=0)
+
+    def list_day(self):
+        self.client.get(f"/meals?date=2025-10-{random.randint(1, 28):02d}")
+
+    def list_all(self):
+        self.client.get("/meals")
+
+    def get(self):
+        if self.meals:
+            self.client.get(f"/meal/{random.choice(self.meals)}")
+
+    def update(self):
+        if self.meals:
+            self.client.put(f"/meal/{random.choice(self.meals)}", json={'isInDiet': random.random() < 0.5})
+
+    def batch_get(self):
+        if self.meals:
+            self.client.post('/meals/batch-get', json={'ids': random.sample(self.meals, min(20, len(self.meals)))})
+
+    def suggest(self):
+        self.client.get(f"/meals/suggest?prefix={random.choice(NAMES)[:2]}")
+
+    def search(self):
+        self.client.get(f"/meals/search?q={random.choice(NAMES).split()[0]}")
+
+    def analytics(self):
+        self.client.get("/meals/analytics?from=2025-10-01&to=2025-10-28")
+
+    MIX = [
+        ('create', 20), ('list_day', 25), ('list_all', 5), ('get', 20), ('update', 10),
+        ('batch_get', 5), ('suggest', 8), ('search', 5), ('analytics', 2),
+    ]
+
+    def step(self):
+        name = random.choices([name for name, _ in self.MIX], weights=[weight for _, weight in self.MIX])[0]
+        getattr(self, name)()
+
+
+def drive(clients, requests):
+    for _ in range(requests):
+        random.choice(clients).step()
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.take_snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20000, help="Measured requests.")
+    parser.add_argument('--warmup', type=int, default=10000, help="Requests before the baseline snapshot.")
+    parser.add_argument('--users', type=int, default=20, help="Concurrent users in the mix.")
+    parser.add_argument('--checkpoints', type=int, default=5, help="Snapshots taken during the measured phase.")
+    parser.add_argument('--budget', type=float, default=64, help="Allowed retained bytes per request.")
+    parser.add_argument('--top', type=int, default=15, help="Growth sites to print.")
+    parser.add_argument('--frames', type=int, default=1, help="Stack frames kept per allocation.")
+    args = parser.parse_args()
+
+    random.seed(0)
+    # purge_meals removes deleted meals right away instead of keeping them for restoring
+    app.config['MEAL_PURGE_AFTER_DAYS'] = 0
+    stats = IdentityMapStats()
+    app.after_request(stats.after_request)
+    with app.app_context():
+        db.create_all()
+
+    # traced from the start: objects a bounded cache evicts later must have been seen being allocated,
+    # or their replacements look like growth
+    tracemalloc.start(args.frames)
+    clients = [Traffic(index) for index in range(args.users)]
+    drive(clients, args.warmup)
+    baseline = traced()
+    started = time.perf_counter()
+    step = max(args.requests // args.checkpoints, 1)
+    done, first = 0, None
+    print(f"{'requests':>9} {'traced KiB':>11} {'retained KiB':>13}")
+    while done < args.requests:
+        count = min(step, args.requests - done)
+        drive(clients, count)
+        done += count
+        snapshot = traced()
+        retained = sum(stat.size_diff for stat in snapshot.compare_to(baseline, 'filename'))
+        if first is None:
+            first = (done, retained)
+        print(f"{done:9d} {tracemalloc.get_traced_memory()[0] / 1024:11.1f} {retained / 1024:13.1f}")
+
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+
+    print(f"\n{done} requests in {elapsed:.1f}s ({done / elapsed:.0f} req/s under tracemalloc)")
+    stats.report()
+
+    print(f"\ntop {args.top} growth sites since the baseline:")
+    for stat in snapshot.compare_to(baseline, 'traceback' if args.frames > 1 else 'lineno')[:args.top]:
+        print(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d} blocks  {stat.traceback.format()[-1].strip()}")
+
+    # the first interval still absorbs one-off allocations, so the steady-state rate starts after it
+    measured = done - first[0]
+    per_request = (retained - first[1]) / measured if measured else retained / done
+    print(f"\nretained {retained / 1024:.1f} KiB overall, {per_request:.1f} B/request after the first checkpoint "
+          f"(budget {args.budget:.0f})")
+    if per_request > args.budget:
+        print("FAIL: retained memory per request is over budget")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,18 @@
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+from flask_sqlalchemy.session import Session
+
+class RoutingSession(Session):
+    # set by services.sharding when sharding is configured; picks the engine per statement
+    router = None
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.router is not None:
+            engine = self.router.engine_for(mapper, clause)
+            if engine is not None:
+                return engine
+        # a session explicitly bound to a connection (the test suite's rolled-back transaction) wins
+        if bind is None and self.bind is not None:
+            return self.bind
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
@@ -0,0 +1,28 @@
+"""Create meal_id_block table for global meal ids across shards
+
+Revision ID: 2b8f5d1e6a47
+Revises: 9e4b1f7a3c58
+Create Date: 2026-10-19 20:41:03.602115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b8f5d1e6a47'
+down_revision = '9e4b1f7a3c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('meal_id_block',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('reserved_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('meal_id_block')
@@ -0,0 +1,40 @@
+"""Add meal deleted_at for soft deletes
+
+Revision ID: 4c6d2a8f0b13
+Revises: b7e3f90d1a64
+Create Date: 2026-10-19 18:12:40.527193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c6d2a8f0b13'
+down_revision = 'b7e3f90d1a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # MySQL has no partial indexes and ignores the *_where arguments, keeping plain ones
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.drop_index('ix_meal_user_id_local_date')
+        batch_op.create_index('ix_meal_user_id_local_date', ['user_id', 'local_date'], unique=False,
+                              sqlite_where=sa.text('deleted_at IS NULL'),
+                              postgresql_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_meal_deleted_at', ['deleted_at'], unique=False,
+                              sqlite_where=sa.text('deleted_at IS NOT NULL'),
+                              postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    # soft-deleted meals would come back to life without the column
+    op.execute("DELETE FROM meal WHERE deleted_at IS NOT NULL")
+
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.drop_index('ix_meal_deleted_at')
+        batch_op.drop_index('ix_meal_user_id_local_date')
+        batch_op.create_index('ix_meal_user_id_local_date', ['user_id', 'local_date'], unique=False)
+        batch_op.drop_column('deleted_at')
@@ -0,0 +1,44 @@
+"""Create meal archive tables
+
+Revision ID: 5b93d0e4a8f1
+Revises: c41e0a9b7d26
+Create Date: 2026-10-19 12:04:51.633087
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = '5b93d0e4a8f1'
+down_revision = 'c41e0a9b7d26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('meal_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('meal_count', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'month', name='uq_meal_archive_user_month')
+    )
+    op.create_table('archived_meal',
+    sa.Column('meal_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('archive_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['archive_id'], ['meal_archive.id'], ),
+    sa.PrimaryKeyConstraint('meal_id')
+    )
+    op.create_index(op.f('ix_archived_meal_archive_id'), 'archived_meal', ['archive_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_archived_meal_archive_id'), table_name='archived_meal')
+    op.drop_table('archived_meal')
+    op.drop_table('meal_archive')
@@ -0,0 +1,42 @@
+"""Make meal ids AUTOINCREMENT on SQLite
+
+Revision ID: 6d1a9c4e7b32
+Revises: 2b8f5d1e6a47
+Create Date: 2026-10-19 21:37:48.215903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d1a9c4e7b32'
+down_revision = '2b8f5d1e6a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # MySQL and PostgreSQL never hand out an id twice; SQLite reuses the highest one unless the
+    # table is AUTOINCREMENT, which takes rebuilding it
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    with op.batch_alter_table('meal', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+
+    # ids of meals already archived or purged past the current highest one stay out of reach too
+    op.execute(
+        "UPDATE sqlite_sequence SET seq = max(seq, "
+        "(SELECT coalesce(max(meal_id), 0) FROM archived_meal)) WHERE name = 'meal'"
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    with op.batch_alter_table('meal', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
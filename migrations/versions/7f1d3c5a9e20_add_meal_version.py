@@ -0,0 +1,26 @@
+"""Add version column to meal for optimistic concurrency
+
+Revision ID: 7f1d3c5a9e20
+Revises: e6a04f7c2b19
+Create Date: 2026-10-19 14:02:18.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f1d3c5a9e20'
+down_revision = 'e6a04f7c2b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.drop_column('version')
@@ -0,0 +1,36 @@
+"""Add meal full-text index
+
+Revision ID: 8d2f6b1c5e73
+Revises: 3a7c1e9d42b0
+Create Date: 2026-10-19 11:02:37.905114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6b1c5e73'
+down_revision = '3a7c1e9d42b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.execute("CREATE FULLTEXT INDEX ix_meal_fulltext ON meal (name, description)")
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS meal_fts USING fts5(name, description, user_id UNINDEXED)")
+        op.execute(
+            "INSERT INTO meal_fts (rowid, name, description, user_id) "
+            "SELECT id, name, coalesce(description, ''), user_id FROM meal"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ix_meal_fulltext', table_name='meal')
+    elif dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS meal_fts")
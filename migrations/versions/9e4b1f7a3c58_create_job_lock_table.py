@@ -0,0 +1,28 @@
+"""Create job_lock table for per-name job concurrency limits
+
+Revision ID: 9e4b1f7a3c58
+Revises: 4c6d2a8f0b13
+Create Date: 2026-10-19 19:05:12.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b1f7a3c58'
+down_revision = '4c6d2a8f0b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_lock',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('job_lock')
@@ -0,0 +1,37 @@
+"""Add user timezone and meal local_date
+
+Revision ID: a2c8e4f61d35
+Revises: 7f1d3c5a9e20
+Create Date: 2026-10-19 14:41:05.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c8e4f61d35'
+down_revision = '7f1d3c5a9e20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timezone', sa.String(length=64), server_default='UTC', nullable=False))
+
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('local_date', sa.Date(), nullable=True))
+        batch_op.create_index('ix_meal_user_id_local_date', ['user_id', 'local_date'], unique=False)
+
+    # every existing user starts out in UTC, so their day is the date part of the stored datetime
+    op.execute("UPDATE meal SET local_date = DATE(datetime)")
+
+
+def downgrade():
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.drop_index('ix_meal_user_id_local_date')
+        batch_op.drop_column('local_date')
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('timezone')
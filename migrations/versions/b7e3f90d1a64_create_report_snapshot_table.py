@@ -0,0 +1,35 @@
+"""Create report_snapshot table
+
+Revision ID: b7e3f90d1a64
+Revises: d5e9b7a3c180
+Create Date: 2026-10-19 18:05:27.306114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f90d1a64'
+down_revision = 'd5e9b7a3c180'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('params', sa.Text(), nullable=True),
+    sa.Column('data', sa.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_report_snapshot_name_created_at', 'report_snapshot', ['name', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_report_snapshot_name_created_at', table_name='report_snapshot')
+    op.drop_table('report_snapshot')
@@ -0,0 +1,32 @@
+"""Add nutrition columns to meal
+
+Revision ID: d5e9b7a3c180
+Revises: a2c8e4f61d35
+Create Date: 2026-10-19 15:20:47.602391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e9b7a3c180'
+down_revision = 'a2c8e4f61d35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('calories', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('protein', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('carbs', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('fat', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('meal', schema=None) as batch_op:
+        batch_op.drop_column('fat')
+        batch_op.drop_column('carbs')
+        batch_op.drop_column('protein')
+        batch_op.drop_column('calories')
@@ -0,0 +1,50 @@
+"""Create user_directory table for sharding
+
+Revision ID: e6a04f7c2b19
+Revises: 5b93d0e4a8f1
+Create Date: 2026-10-19 13:12:40.771530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a04f7c2b19'
+down_revision = '5b93d0e4a8f1'
+branch_labels = None
+depends_on = None
+
+JOB_USER_FOREIGN_KEY = 'fk_job_user_id_user'
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def upgrade():
+    op.create_table('user_directory',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=100), nullable=False),
+    sa.Column('shard', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_index(op.f('ix_user_directory_shard'), 'user_directory', ['shard'], unique=False)
+
+    # jobs stay in the global database while users live on shards, so job.user_id can't reference user
+    foreign_keys = [
+        foreign_key for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys('job')
+        if foreign_key['referred_table'] == 'user'
+    ]
+    with op.batch_alter_table('job', schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+        for foreign_key in foreign_keys:
+            # SQLite reports the constraint unnamed; batch mode names it by the convention
+            batch_op.drop_constraint(foreign_key['name'] or JOB_USER_FOREIGN_KEY, type_='foreignkey')
+        batch_op.create_index(batch_op.f('ix_job_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_job_user_id'))
+        batch_op.create_foreign_key(JOB_USER_FOREIGN_KEY, 'user', ['user_id'], ['id'])
+
+    op.drop_index(op.f('ix_user_directory_shard'), table_name='user_directory')
+    op.drop_table('user_directory')
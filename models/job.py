@@ -0,0 +1,36 @@
+import json
+from database import db
+from sqlalchemy.dialects.mysql import LONGTEXT
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text().with_variant(LONGTEXT(), 'mysql'))
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    result = db.Column(db.Text().with_variant(LONGTEXT(), 'mysql'))
+    error = db.Column(db.Text)
+    run_after = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    # no foreign key: with sharding enabled, jobs stay in the global database while users move between shards
+    user_id = db.Column(db.Integer, index=True)
+
+    __table_args__ = (
+        # the worker polls for the oldest runnable job, so keep that lookup indexed
+        db.Index('ix_job_status_run_after', 'status', 'run_after'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "result": json.loads(self.result) if self.result is not None else None,
+            "error": self.error,
+            "created_at": self.created_at.isoformat() if self.created_at is not None else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at is not None else None
+        }
@@ -0,0 +1,6 @@
+from database import db
+
+class JobLock(db.Model):
+    """One row per job name with a concurrency limit; claims of that name lock it in turn."""
+    name = db.Column(db.String(100), primary_key=True)
+    locked_at = db.Column(db.DateTime, nullable=False)
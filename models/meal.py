@@ -1,12 +1,48 @@
-from database import db
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+from sqlalchemy.orm import with_loader_criteria
+
+from database import db, RoutingSession
+
+NUTRITION_FIELDS = ('calories', 'protein', 'carbs', 'fat')
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 class Meal(db.Model):
+    __table_args__ = (
+        # partial where supported: every read filters out deleted meals, so they needn't be indexed
+        db.Index('ix_meal_user_id_local_date', 'user_id', 'local_date',
+                 sqlite_where=db.text('deleted_at IS NULL'), postgresql_where=db.text('deleted_at IS NULL')),
+        # what the purge job scans; only ever holds the deleted meals
+        db.Index('ix_meal_deleted_at', 'deleted_at',
+                 sqlite_where=db.text('deleted_at IS NOT NULL'), postgresql_where=db.text('deleted_at IS NOT NULL')),
+        # without AUTOINCREMENT SQLite reuses the highest id once archiving or the purge removes it
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(200))
-    datetime = db.Column(db.DateTime, nullable=False, default=db.func.current_timestamp())
+    # stored in UTC; local_date is the owner's calendar day for it, set on write
+    datetime = db.Column(db.DateTime, nullable=False, default=_utcnow)
+    local_date = db.Column(db.Date)
     isInDiet = db.Column(db.Boolean, default=False)
+    # optional nutrition data; macros are in grams
+    calories = db.Column(db.Integer)
+    protein = db.Column(db.Float)
+    carbs = db.Column(db.Float)
+    fat = db.Column(db.Float)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # bumped on every write; PATCH only applies when the client's copy is current
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # set by DELETE /meal/<id>; the row stays until the purge job removes it
+    deleted_at = db.Column(db.DateTime)
+
+    # ORM flushes bump version in SQL and only match the version they loaded,
+    # so a PUT racing a PATCH fails with StaleDataError instead of undoing it
+    __mapper_args__ = {'version_id_col': version}
 
     def to_dict(self):
         return {
@@ -15,6 +51,26 @@ class Meal(db.Model):
             "description": self.description,
             # datetime objects are not JSON serializable by default; convert to ISO string
             "datetime": self.datetime.isoformat() if self.datetime is not None else None,
+            "local_date": self.local_date.isoformat() if self.local_date is not None else None,
             "isInDiet": self.isInDiet,
-            "user_id": self.user_id
+            "calories": self.calories,
+            "protein": self.protein,
+            "carbs": self.carbs,
+            "fat": self.fat,
+            "user_id": self.user_id,
+            "version": self.version
         }
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _exclude_deleted_meals(execute_state):
+    """Adds ``deleted_at IS NULL`` to every ORM SELECT touching meals, unless ``include_deleted`` is set."""
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get('include_deleted', False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(Meal, Meal.deleted_at.is_(None), include_aliases=True)
+        )
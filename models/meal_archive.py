@@ -0,0 +1,20 @@
+from database import db
+from sqlalchemy.dialects.mysql import LONGBLOB
+
+class MealArchive(db.Model):
+    """One user's meals for one calendar month, stored as compressed JSON."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False)
+    meal_count = db.Column(db.Integer, nullable=False, default=0)
+    data = db.Column(db.LargeBinary().with_variant(LONGBLOB(), 'mysql'), nullable=False)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'month', name='uq_meal_archive_user_month'),
+    )
+
+class ArchivedMeal(db.Model):
+    """Locates an archived meal by id without decompressing every month."""
+    meal_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    archive_id = db.Column(db.Integer, db.ForeignKey('meal_archive.id'), nullable=False, index=True)
@@ -0,0 +1,6 @@
+from database import db
+
+class MealIdBlock(db.Model):
+    """Global meal id allocation when sharded: block ``id`` reserves a fixed-size range of meal ids."""
+    id = db.Column(db.Integer, primary_key=True)
+    reserved_at = db.Column(db.DateTime, nullable=False)
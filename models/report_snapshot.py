@@ -0,0 +1,27 @@
+import json
+from database import db
+from sqlalchemy.dialects.mysql import LONGTEXT
+
+class ReportSnapshot(db.Model):
+    """A precomputed cross-user report; requests only ever read these."""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    params = db.Column(db.Text)
+    data = db.Column(db.Text().with_variant(LONGTEXT(), 'mysql'), nullable=False)
+    duration_ms = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # readers want the newest snapshot of a report
+        db.Index('ix_report_snapshot_name_created_at', 'name', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "params": json.loads(self.params) if self.params is not None else None,
+            "data": json.loads(self.data),
+            "duration_ms": self.duration_ms,
+            "created_at": self.created_at.isoformat()
+        }
@@ -5,6 +5,7 @@ class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(100), nullable=False, unique=True)
     password = db.Column(db.String(200), nullable=False)
+    timezone = db.Column(db.String(64), nullable=False, default='UTC', server_default='UTC')
 
     meals = db.relationship('Meal', backref='user', lazy=True)
 
@@ -0,0 +1,7 @@
+from database import db
+
+class UserDirectory(db.Model):
+    """Global id allocation and shard placement for every user."""
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(100), nullable=False, unique=True)
+    shard = db.Column(db.String(50), nullable=False, index=True)
@@ -0,0 +1,178 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_app_context, request, request_finished
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.tracing import tracer
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Puts records on a bounded queue and counts the ones that don't fit, instead of blocking."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record):
+        # the listener thread formats; the request thread only hands the record over
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # blocking, so stopping works even when the queue is full: the listener thread is draining it
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with the total of dropped records once there are any."""
+
+    def __init__(self, access_log):
+        super().__init__()
+        self.access_log = access_log
+
+    def format(self, record):
+        entry = {"ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds')}
+        entry.update(record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()})
+        dropped = self.access_log.dropped
+        if dropped:
+            entry["dropped"] = dropped
+        return json.dumps(entry, separators=(',', ':'))
+
+
+class AccessLog:
+    """JSON access log written off the request path.
+
+    Each request produces one record with its method, route, path, status,
+    user id, latency, time spent in the database, query count and response
+    size. The request thread only drops the record on a bounded queue
+    (``ACCESS_LOG_QUEUE_SIZE``); a ``QueueListener`` thread formats and
+    writes it to ``ACCESS_LOG_FILE`` (stderr when unset). When the queue is
+    full the record is dropped and counted rather than making the request
+    wait on I/O.
+    """
+
+    def __init__(self, app=None):
+        self.logger = logging.getLogger('daily_diet.access')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.handler = None
+        self.listener = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ACCESS_LOG', True)
+        app.config.setdefault('ACCESS_LOG_FILE', None)
+        app.config.setdefault('ACCESS_LOG_QUEUE_SIZE', 10000)
+        self.queue_size = app.config['ACCESS_LOG_QUEUE_SIZE']
+        app.extensions['access_log'] = self
+        app.before_request(self._before_request)
+        # sent after every after_request hook, so the size is the one that goes on the wire
+        request_finished.connect(self._request_finished, app)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+        if app.config['ACCESS_LOG']:
+            path = app.config['ACCESS_LOG_FILE']
+            self.start(logging.FileHandler(path) if path else logging.StreamHandler())
+            atexit.register(self.stop)
+
+    @property
+    def enabled(self):
+        return self.handler is not None
+
+    @property
+    def dropped(self):
+        return self.handler.dropped if self.handler is not None else 0
+
+    def start(self, target):
+        """Starts writing records to the ``target`` handler."""
+        self.stop()
+        target.setFormatter(JsonFormatter(self))
+        self.handler = DroppingQueueHandler(queue.Queue(self.queue_size))
+        self.logger.addHandler(self.handler)
+        self.listener = _Listener(self.handler.queue, target)
+        self.listener.start()
+
+    def stop(self):
+        """Writes out whatever is queued and stops the listener thread."""
+        if self.listener is None:
+            return
+        self.logger.removeHandler(self.handler)
+        self.listener.stop()
+        for target in self.listener.handlers:
+            target.close()
+        self.listener = None
+        self.handler = None
+
+    def _before_request(self):
+        if self.enabled:
+            g.access = {"started": time.perf_counter(), "db_ms": 0.0, "db_queries": 0}
+
+    def _request_finished(self, sender, response, **extra):
+        state = g.pop('access', None)
+        if state is None:
+            return
+        # flask-login caches the loaded user on g; reading current_user here could cost a query
+        user = g.get('_login_user')
+        self.logger.info({
+            "method": request.method,
+            "route": request.url_rule.rule if request.url_rule is not None else None,
+            "path": request.path,
+            "status": response.status_code,
+            "user_id": user.get_id() if user is not None else None,
+            "latency_ms": round((time.perf_counter() - state["started"]) * 1000, 3),
+            "db_ms": round(state["db_ms"], 3),
+            "db_queries": state["db_queries"],
+            "bytes": response.content_length,
+            "trace_id": tracer.trace_id()
+        })
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'access' in g:
+        conn.info.setdefault('access_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn)
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; it still took time and must leave the stack
+    if exception_context.connection is not None:
+        _record(exception_context.connection)
+
+
+def _record(conn):
+    started = conn.info.get('access_started')
+    if not started:
+        return
+    # popped even outside a request, so the pooled connection never keeps a stale entry
+    started = started.pop()
+    if has_app_context() and 'access' in g:
+        state = g.access
+        state["db_ms"] += (time.perf_counter() - started) * 1000
+        state["db_queries"] += 1
+
+
+access_log = AccessLog()
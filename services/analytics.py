@@ -0,0 +1,157 @@
+from datetime import date, datetime
+
+import numpy as np
+from sqlalchemy import select
+
+from database import db
+from models.meal import Meal, NUTRITION_FIELDS
+from services import archive, timezones
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class MealColumns:
+    """One user's meals as parallel NumPy arrays, one entry per meal.
+
+    ``days`` holds the local dates as proleptic ordinals (``date.toordinal()``),
+    ``times`` the UTC datetimes as seconds since the epoch (only used for
+    ordering), ``in_diet`` booleans and ``nutrition`` a float array per
+    nutrition field, NaN where not recorded.
+    """
+
+    def __init__(self, days, times, in_diet, nutrition):
+        self.days = days
+        self.times = times
+        self.in_diet = in_diet
+        self.nutrition = nutrition
+
+    @classmethod
+    def from_columns(cls, local_dates, datetimes, in_diet, nutrition):
+        count = len(local_dates)
+        return cls(
+            days=np.fromiter((day.toordinal() for day in local_dates), dtype=np.int64, count=count),
+            # far cheaper than building datetime64 values from datetime objects
+            times=np.fromiter(((value - EPOCH).total_seconds() for value in datetimes), dtype=float, count=count),
+            in_diet=np.array(in_diet, dtype=bool).reshape(count),
+            # float dtype turns the NULLs into NaN
+            nutrition={field: np.array(nutrition[field], dtype=float).reshape(count) for field in NUTRITION_FIELDS}
+        )
+
+
+def load_columns(user_id, first_day, last_day, zone):
+    """Fetches the columns analytics needs for ``first_day..last_day`` in one query, plus the archive."""
+    columns = [Meal.local_date, Meal.datetime, Meal.isInDiet] + [getattr(Meal, field) for field in NUTRITION_FIELDS]
+    rows = db.session.execute(
+        select(*columns).where(Meal.user_id == user_id, Meal.local_date >= first_day, Meal.local_date <= last_day)
+    ).all()
+
+    start, _ = timezones.utc_bounds(first_day, zone)
+    _, end = timezones.utc_bounds(last_day, zone)
+    for item in archive.archived_meals(user_id, start, end):
+        meal_datetime = datetime.fromisoformat(item['datetime'])
+        local_date = date.fromisoformat(item['local_date']) if item.get('local_date') else timezones.local_date(meal_datetime, zone)
+        if first_day <= local_date <= last_day:
+            rows.append((local_date, meal_datetime, item['isInDiet'], *(item.get(field) for field in NUTRITION_FIELDS)))
+
+    values = list(zip(*rows)) or [()] * len(columns)
+    return MealColumns.from_columns(
+        values[0], values[1], values[2],
+        {field: values[3 + index] for index, field in enumerate(NUTRITION_FIELDS)}
+    )
+
+
+def _rolling_mean(totals, tracked, window):
+    """Mean of ``totals`` over each trailing ``window`` days, counting only ``tracked`` days."""
+    sums = np.cumsum(totals)
+    counts = np.cumsum(tracked, dtype=np.int64)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts[window:] = counts[window:] - counts[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def _longest_run(mask):
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return int((edges[1::2] - edges[0::2]).max())
+
+
+def _trailing_run(mask):
+    breaks = np.flatnonzero(~mask)
+    return int(len(mask) - breaks[-1] - 1) if len(breaks) else len(mask)
+
+
+def _floats(values, digits=1):
+    return [None if value != value else value for value in np.round(values, digits).tolist()]
+
+
+def analyze(columns, first_day, last_day, window=7):
+    """Daily totals and rolling averages, weekly adherence and streaks for ``first_day..last_day``.
+
+    Everything is computed with whole-array operations: meals are bucketed
+    into days and weeks with ``np.bincount``, rolling windows are
+    differences of cumulative sums, and streaks are run lengths found with
+    ``np.diff``.
+    """
+    first, last = first_day.toordinal(), last_day.toordinal()
+    span = last - first + 1
+    index = columns.days - first
+    in_diet = columns.in_diet
+
+    meals_per_day = np.bincount(index, minlength=span)
+    in_diet_per_day = np.bincount(index, weights=in_diet, minlength=span)
+    totals, tracked = {}, {}
+    for field, values in columns.nutrition.items():
+        totals[field] = np.bincount(index, weights=np.nan_to_num(values), minlength=span)
+        tracked[field] = np.bincount(index, weights=~np.isnan(values), minlength=span) > 0
+    average_calories = _rolling_mean(totals['calories'], tracked['calories'], window)
+    # days where a field was never recorded report null rather than 0
+    daily = {field: np.where(tracked[field], totals[field], np.nan) for field in totals}
+
+    # weeks start on Monday; ordinal 1 (0001-01-01) was a Monday
+    first_monday = first - (first - 1) % 7
+    week_index = (columns.days - first_monday) // 7
+    weeks = (last - first_monday) // 7 + 1
+    meals_per_week = np.bincount(week_index, minlength=weeks)
+    in_diet_per_week = np.bincount(week_index, weights=in_diet, minlength=weeks)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        adherence = np.where(meals_per_week > 0, in_diet_per_week / meals_per_week, np.nan)
+
+    in_order = in_diet[np.argsort(columns.times, kind='stable')]
+    perfect_days = (meals_per_day > 0) & (in_diet_per_day == meals_per_day)
+    # a day with nothing logged yet doesn't break the current streak
+    open_days = perfect_days[:-1] if span and meals_per_day[-1] == 0 else perfect_days
+
+    day_dates = [date.fromordinal(first + offset).isoformat() for offset in range(span)]
+    total_in_diet = int(in_diet.sum())
+    return {
+        "from": first_day.isoformat(),
+        "to": last_day.isoformat(),
+        "window": window,
+        "summary": {
+            "meals": int(len(in_diet)),
+            "inDiet": total_in_diet,
+            "offDiet": int(len(in_diet)) - total_in_diet,
+            "adherence": round(total_in_diet / len(in_diet), 3) if len(in_diet) else None
+        },
+        "daily": [
+            {"date": day, "meals": meals, "calories": calories, "protein": protein, "carbs": carbs, "fat": fat,
+             "averageCalories": average}
+            for day, meals, calories, protein, carbs, fat, average in zip(
+                day_dates, meals_per_day.tolist(), _floats(daily['calories'], 0), _floats(daily['protein']),
+                _floats(daily['carbs']), _floats(daily['fat']), _floats(average_calories)
+            )
+        ],
+        "weekly": [
+            {"week": date.fromordinal(first_monday + 7 * week).isoformat(), "meals": meals, "inDiet": int(kept),
+             "adherence": rate}
+            for week, (meals, kept, rate) in enumerate(zip(
+                meals_per_week.tolist(), in_diet_per_week.tolist(), _floats(adherence, 3)
+            ))
+        ],
+        "streaks": {
+            "meals": {"current": _trailing_run(in_order), "best": _longest_run(in_order)},
+            "days": {"current": _trailing_run(open_days), "best": _longest_run(perfect_days)}
+        }
+    }
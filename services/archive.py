@@ -0,0 +1,213 @@
+import json
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, select, text
+
+from database import db
+from models.meal import Meal
+from models.meal_archive import ArchivedMeal, MealArchive
+from services.jobs import job_queue, utcnow
+from services.search import unindex_meals
+from services.suggest import meal_names
+from services.sharding import shard_router
+
+
+def init_app(app):
+    app.config.setdefault('ARCHIVE_RETENTION_DAYS', 365)
+    app.config.setdefault('ARCHIVE_BATCH_SIZE', 500)
+    app.cli.add_command(archive_cli)
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def next_month(value):
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def _pack(meals):
+    return zlib.compress(json.dumps(meals, separators=(',', ':')).encode('utf-8'), 9)
+
+
+def _unpack(data):
+    return json.loads(zlib.decompress(data))
+
+
+def horizon():
+    """Meals at or after this instant are never archived, so reads past it skip the archive."""
+    return utcnow() - timedelta(days=current_app.config['ARCHIVE_RETENTION_DAYS'])
+
+
+def archive_meals(batch_size=None):
+    """Moves meals older than the retention horizon into the compressed archive.
+
+    Meals are grouped per user and month and merged into that month's
+    archive row. Each batch is its own transaction, so the command can be
+    interrupted and resumed without losing or duplicating meals.
+    """
+    before = horizon()
+    batch_size = batch_size or current_app.config['ARCHIVE_BATCH_SIZE']
+    moved = 0
+
+    while True:
+        meals = Meal.query.filter(Meal.datetime < before).order_by(Meal.id).limit(batch_size).all()
+        if not meals:
+            return moved
+
+        groups = defaultdict(list)
+        for meal in meals:
+            groups[(meal.user_id, month_start(meal.datetime))].append(meal.to_dict())
+
+        now = utcnow()
+        for (user_id, month), items in groups.items():
+            archive = MealArchive.query.filter_by(user_id=user_id, month=month).first()
+            if archive is None:
+                archive = MealArchive(user_id=user_id, month=month, meal_count=0, data=_pack([]), archived_at=now)
+                db.session.add(archive)
+                db.session.flush()
+
+            stored = _unpack(archive.data) + items
+            archive.data = _pack(stored)
+            archive.meal_count = len(stored)
+            archive.archived_at = now
+            db.session.add_all(ArchivedMeal(meal_id=item['id'], archive_id=archive.id) for item in items)
+
+        ids = [meal.id for meal in meals]
+        db.session.execute(delete(Meal).where(Meal.id.in_(ids)))
+        unindex_meals(db.session.connection(), ids)
+        db.session.commit()
+
+        for user_id in {meal.user_id for meal in meals}:
+            meal_names.invalidate(user_id)
+        moved += len(ids)
+
+
+def archived_meals(user_id, start=None, end=None):
+    """Returns the user's archived meals with ``start <= datetime < end``."""
+    if start is not None and start >= horizon():
+        return []
+
+    query = MealArchive.query.filter_by(user_id=user_id)
+    if start is not None:
+        query = query.filter(MealArchive.month >= month_start(start))
+    if end is not None:
+        query = query.filter(MealArchive.month < next_month(end))
+
+    meals = []
+    for archive in query.order_by(MealArchive.month):
+        for item in _unpack(archive.data):
+            meal_datetime = datetime.fromisoformat(item['datetime'])
+            if (start is None or meal_datetime >= start) and (end is None or meal_datetime < end):
+                meals.append(item)
+    return meals
+
+
+def get_archived_meal(meal_id):
+    archive = db.session.scalar(
+        select(MealArchive).join(ArchivedMeal, ArchivedMeal.archive_id == MealArchive.id)
+        .where(ArchivedMeal.meal_id == meal_id)
+    )
+    if archive is None:
+        return None
+    return next((item for item in _unpack(archive.data) if item['id'] == meal_id), None)
+
+
+def get_archived_meals(meal_ids):
+    """Returns ``{meal_id: meal}`` for the archived ones among ``meal_ids``, reading each archive once."""
+    wanted = set(meal_ids)
+    if not wanted:
+        return {}
+    archives = db.session.scalars(
+        select(MealArchive).where(MealArchive.id.in_(
+            select(ArchivedMeal.archive_id).where(ArchivedMeal.meal_id.in_(wanted))
+        ))
+    )
+    return {item['id']: item for archive in archives for item in _unpack(archive.data) if item['id'] in wanted}
+
+
+def partition_statements(first_month, months):
+    """DDL that converts ``meal`` to monthly RANGE partitions on MySQL.
+
+    MySQL requires the partitioning column in every unique key and does not
+    support foreign keys or FULLTEXT indexes on partitioned InnoDB tables,
+    so the primary key becomes ``(id, datetime)`` and both of those go.
+    """
+    partitions = []
+    month = first_month
+    for _ in range(months):
+        upper = next_month(month)
+        partitions.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper.isoformat()}'))")
+        month = upper
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    return [
+        "ALTER TABLE meal DROP PRIMARY KEY, ADD PRIMARY KEY (id, datetime)",
+        "ALTER TABLE meal PARTITION BY RANGE (TO_DAYS(datetime)) (\n  " + ",\n  ".join(partitions) + "\n)",
+    ]
+
+
+@job_queue.task('meals.archive', max_concurrency=1)
+def archive_job(job, payload):
+    return {"archived": sum(archive_meals() for _ in shard_router.each_shard())}
+
+
+archive_cli = AppGroup('archive', help="Cold storage for old meals.")
+
+
+@archive_cli.command('run')
+@click.option('--days', type=int, default=None, help="Retention horizon in days.")
+@click.option('--batch-size', type=int, default=None, help="Meals moved per transaction.")
+def run_command(days, batch_size):
+    """Moves meals older than the retention horizon to the archive."""
+    if days is not None:
+        current_app.config['ARCHIVE_RETENTION_DAYS'] = days
+    archived = sum(archive_meals(batch_size=batch_size) for _ in shard_router.each_shard())
+    click.echo(f"Archived {archived} meal(s)")
+
+
+@archive_cli.command('partition')
+@click.option('--months', type=int, default=24, help="Monthly partitions to create before pmax.")
+@click.option('--apply', 'apply_', is_flag=True, help="Execute the DDL instead of printing it.")
+@click.option('--drop-fulltext', is_flag=True, help="Allow dropping the FULLTEXT index used by /meals/search.")
+def partition_command(months, apply_, drop_fulltext):
+    """Prints (or applies) the MySQL monthly partitioning DDL for meal."""
+    first_month = month_start(horizon())
+    statements = partition_statements(first_month, months)
+
+    if not apply_:
+        for statement in statements:
+            click.echo(statement + ";")
+        return
+
+    connection = db.session.connection()
+    if connection.dialect.name != 'mysql':
+        raise click.ClickException("Partitioning is only available on MySQL; SQLite relies on the archive tables")
+
+    fulltext = connection.execute(text(
+        "SELECT DISTINCT index_name FROM information_schema.statistics "
+        "WHERE table_schema = DATABASE() AND table_name = 'meal' AND index_type = 'FULLTEXT'"
+    )).scalars().all()
+    if fulltext and not drop_fulltext:
+        raise click.ClickException(
+            "meal has a FULLTEXT index, which partitioned tables cannot keep; "
+            "rerun with --drop-fulltext and set SEARCH_FULLTEXT=false"
+        )
+
+    foreign_keys = connection.execute(text(
+        "SELECT constraint_name FROM information_schema.referential_constraints "
+        "WHERE constraint_schema = DATABASE() AND table_name = 'meal'"
+    )).scalars().all()
+    for constraint in foreign_keys:
+        connection.execute(text(f"ALTER TABLE meal DROP FOREIGN KEY `{constraint}`"))
+    for index in fulltext:
+        connection.execute(text(f"ALTER TABLE meal DROP INDEX `{index}`"))
+    for statement in statements:
+        connection.execute(text(statement))
+    db.session.commit()
+    click.echo(f"Partitioned meal into {months} monthly partitions from {first_month:%Y-%m}")
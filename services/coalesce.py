@@ -0,0 +1,98 @@
+import threading
+
+from database import db
+from services.sharding import shard_router
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class WriteCoalescer:
+    """Group commit for new rows: concurrent inserts share one transaction.
+
+    With ``WRITE_COALESCE`` enabled, the first request to arrive opens a
+    batch and becomes its leader. It waits up to
+    ``WRITE_COALESCE_MAX_DELAY_MS`` for other requests to join, or until
+    ``WRITE_COALESCE_MAX_BATCH`` rows are queued. It then flushes every row
+    and commits once on its own session. The requests that joined block
+    until that commit finishes, so nobody is acknowledged before their row
+    is durable. A failed commit fails the whole batch. Batches never mix
+    shards. When disabled, each insert commits on its own, as before.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_batch = 64
+        self.max_delay = 0.005
+        self._lock = threading.Lock()
+        self._open = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('WRITE_COALESCE', False)
+        app.config.setdefault('WRITE_COALESCE_MAX_BATCH', 64)
+        app.config.setdefault('WRITE_COALESCE_MAX_DELAY_MS', 5)
+        self.enabled = app.config['WRITE_COALESCE']
+        self.max_batch = app.config['WRITE_COALESCE_MAX_BATCH']
+        self.max_delay = app.config['WRITE_COALESCE_MAX_DELAY_MS'] / 1000
+        app.extensions['write_coalescer'] = self
+
+    def insert(self, obj):
+        """Persists ``obj`` and returns its ``to_dict()``, taken after the flush that assigned its id.
+
+        The caller must not touch ``obj`` afterwards: with coalescing on it
+        may belong to another request's session.
+        """
+        if not self.enabled:
+            db.session.add(obj)
+            db.session.commit()
+            return obj.to_dict()
+
+        key = shard_router.current
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            position = len(batch.items)
+            batch.items.append(obj)
+            if len(batch.items) >= self.max_batch:
+                # full: later arrivals start the next batch
+                del self._open[key]
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_delay)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._commit(batch)
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.results[position]
+
+    def _commit(self, batch):
+        try:
+            db.session.add_all(batch.items)
+            db.session.flush()
+            # serialized before the commit expires them, which also spares a SELECT per row
+            batch.results = [obj.to_dict() for obj in batch.items]
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            batch.error = error
+        finally:
+            batch.done.set()
+
+
+meal_writes = WriteCoalescer()
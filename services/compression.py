@@ -0,0 +1,96 @@
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def parse_accept_encoding(header):
+    """Returns ``{coding: q}`` for an ``Accept-Encoding`` header value."""
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding] = q
+    return codings
+
+
+class Compress:
+    """Compresses responses for clients that advertise support for it.
+
+    Brotli is used when the ``brotli`` package is installed and the client
+    accepts ``br``; otherwise gzip. Bodies smaller than ``COMPRESS_MIN_SIZE``
+    are sent as-is, since the headers and CPU cost more than they save.
+    Streamed responses are never buffered.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+        app.config.setdefault('COMPRESS_MIMETYPES', [
+            'application/json', 'application/msgpack', 'application/x-msgpack', 'application/cbor', 'text/html', 'text/plain'
+        ])
+        app.extensions['compress'] = self
+        app.after_request(self.after_request)
+
+    def choose_encoding(self, header):
+        codings = parse_accept_encoding(header)
+        wildcard = codings.get('*', 0.0)
+        candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+        best, best_q = None, 0.0
+        for coding in candidates:
+            q = codings.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def compress(self, data, encoding, config):
+        if encoding == 'br':
+            return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+    def after_request(self, response):
+        config = current_app.config
+        if not config['COMPRESS_ENABLED'] or response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        encoding = self.choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+
+        response.set_data(self.compress(data, encoding, config))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+compress = Compress()
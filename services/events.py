@@ -0,0 +1,175 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+RETRY_MILLISECONDS = 3000
+
+
+class InProcessBroker:
+    """Fans published events out to the handlers registered in this process.
+
+    Any object with the same ``subscribe(handler)``/``publish(user_id, event)``
+    pair can replace it; a shared broker (Redis pub/sub, for example) makes
+    events written through one worker reach streams held by the others.
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler):
+        with self._lock:
+            self._handlers.append(handler)
+
+    def publish(self, user_id, event):
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            handler(user_id, event)
+
+
+class Subscription:
+    """One open stream: a bounded queue of events waiting to be written."""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # a client this far behind resumes from the history once it reconnects
+            self.overflowed = True
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+class MealEvents:
+    """Pushes meal changes to the owner's open ``/meals/stream`` connections.
+
+    The last ``EVENTS_HISTORY_SIZE`` events of up to ``EVENTS_MAX_USERS``
+    users are kept so a reconnecting client can resume from
+    ``Last-Event-ID``. When the id is no longer known, the client gets a
+    ``reset`` event and should reload its meals. Each connection buffers at
+    most ``EVENTS_QUEUE_SIZE`` events. A connection that falls further
+    behind is closed and resumes from the history when it reconnects.
+    """
+
+    def __init__(self, app=None, broker=None):
+        self.history_size = 100
+        self.queue_size = 100
+        self.max_users = 1000
+        self.heartbeat = 15
+        self.stream_timeout = 300
+        self._history = OrderedDict()
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self.set_broker(broker or InProcessBroker())
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EVENTS_HISTORY_SIZE', 100)
+        app.config.setdefault('EVENTS_QUEUE_SIZE', 100)
+        app.config.setdefault('EVENTS_MAX_USERS', 1000)
+        app.config.setdefault('EVENTS_HEARTBEAT_SECONDS', 15)
+        app.config.setdefault('EVENTS_STREAM_TIMEOUT', 300)
+        self.history_size = app.config['EVENTS_HISTORY_SIZE']
+        self.queue_size = app.config['EVENTS_QUEUE_SIZE']
+        self.max_users = app.config['EVENTS_MAX_USERS']
+        self.heartbeat = app.config['EVENTS_HEARTBEAT_SECONDS']
+        self.stream_timeout = app.config['EVENTS_STREAM_TIMEOUT']
+        app.extensions['meal_events'] = self
+
+    def set_broker(self, broker):
+        self.broker = broker
+        broker.subscribe(self._deliver)
+
+    def publish(self, user_id, type, data):
+        """Announces a committed change; call it after ``db.session.commit()``."""
+        self.broker.publish(user_id, {"id": uuid.uuid4().hex, "type": type, "data": data})
+
+    def _deliver(self, user_id, event):
+        with self._lock:
+            history = self._history.get(user_id)
+            if history is None:
+                history = self._history[user_id] = deque(maxlen=self.history_size)
+                while len(self._history) > self.max_users:
+                    self._history.popitem(last=False)
+            self._history.move_to_end(user_id)
+            history.append(event)
+            for subscription in self._subscribers.get(user_id, ()):
+                subscription.put(event)
+
+    def subscribe(self, user_id, last_event_id=None):
+        """Registers a stream and queues whatever it missed after ``last_event_id``.
+
+        Returns ``(subscription, reset_id)``. ``reset_id`` is None when the
+        resume succeeded. Otherwise it is the id the client should continue
+        from after reloading.
+        """
+        subscription = Subscription(self.queue_size)
+        reset_id = None
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            if last_event_id:
+                history = list(self._history.get(user_id, ()))
+                ids = [event['id'] for event in history]
+                if last_event_id in ids:
+                    for event in history[ids.index(last_event_id) + 1:]:
+                        subscription.put(event)
+                else:
+                    reset_id = ids[-1] if ids else ''
+        return subscription, reset_id
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def stream(self, user_id, last_event_id=None):
+        """Subscribes right away and returns the generator that writes the stream.
+
+        Subscribing before the response starts means no event committed in
+        between is lost.
+        """
+        subscription, reset_id = self.subscribe(user_id, last_event_id)
+        return self._write(user_id, subscription, reset_id)
+
+    def _write(self, user_id, subscription, reset_id):
+        deadline = time.monotonic() + self.stream_timeout
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            if reset_id is not None:
+                yield format_event({"id": reset_id, "type": "reset", "data": {}})
+
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # bounded lifetime frees the worker thread; the client reconnects and resumes
+                    return
+                try:
+                    event = subscription.queue.get(timeout=min(self.heartbeat, remaining))
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            self.unsubscribe(user_id, subscription)
+
+    def clear(self):
+        with self._lock:
+            self._history.clear()
+            self._subscribers.clear()
+
+
+meal_events = MealEvents()
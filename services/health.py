@@ -0,0 +1,169 @@
+import os
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func, select, text
+from sqlalchemy.pool import QueuePool
+
+from database import db
+from models.job import Job
+from models.meal import Meal
+from services.jobs import utcnow
+from services.sharding import shard_router
+
+
+class Health:
+    """Liveness, readiness and warm-up for a worker process.
+
+    ``/healthz`` only says the process is serving requests. ``/readyz``
+    pings every database, reports how many pooled connections are checked
+    out and how many jobs are waiting, and fails while the worker is still
+    warming up, when a database doesn't answer, when a pool is over
+    ``HEALTH_MAX_POOL_SATURATION`` or, if set, when more than
+    ``HEALTH_MAX_QUEUE_DEPTH`` jobs are waiting.
+
+    The warm-up runs once per process (``WARMUP``), in a background thread
+    started by the first ``/readyz``, or earlier by a server hook calling
+    ``start_warm_up``. Never at import: ``flask`` CLI commands such as
+    ``flask db upgrade`` import the app too, against a schema that may not
+    be there yet. It opens
+    ``WARMUP_CONNECTIONS`` connections per pool (the pool size when unset)
+    and then calls every function registered with ``warmer``, so statements
+    reach SQLAlchemy's compiled cache and lazy caches are built
+    before real traffic pays for them. A failing warmer is logged and
+    doesn't keep the worker out of rotation: the warm-up only saves time.
+    """
+
+    def __init__(self, app=None):
+        self.warmers = []
+        self.warmed_up = False
+        self.warmup_ms = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('WARMUP', True)
+        app.config.setdefault('WARMUP_CONNECTIONS', None)
+        app.config.setdefault('HEALTH_MAX_POOL_SATURATION', 0.9)
+        app.config.setdefault('HEALTH_MAX_QUEUE_DEPTH', None)
+        app.extensions['health'] = self
+        self.warmed_up = not app.config['WARMUP']
+
+    def warmer(self, func):
+        """Registers ``func()`` to run, inside a request context, during the warm-up."""
+        self.warmers.append(func)
+        return func
+
+    def start_warm_up(self, app):
+        """Starts the warm-up thread unless this process already has one."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # a worker forked from a warmed-up process inherits the flag and its pooled connections, but not the thread
+            forked = self._pid is not None
+            self._pid = os.getpid()
+            self.warmed_up = False
+        threading.Thread(target=self.warm_up, args=(app, forked), name='warm-up', daemon=True).start()
+
+    def warm_up(self, app, forked=False):
+        started = time.perf_counter()
+        try:
+            with app.app_context():
+                for engine in self.engines():
+                    if forked:
+                        # leaves the parent's sockets alone and starts an empty pool
+                        engine.dispose(close=False)
+                    self._open_connections(engine, app.config['WARMUP_CONNECTIONS'])
+                with app.test_request_context():
+                    for func in self.warmers:
+                        try:
+                            func()
+                        except Exception:
+                            app.logger.exception("Warmer %s failed", func.__name__)
+                            db.session.rollback()
+                db.session.remove()
+        except Exception:
+            app.logger.exception("Warm-up failed")
+        finally:
+            self.warmup_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.warmed_up = True
+
+    @staticmethod
+    def engines():
+        """The default engine first, then every shard."""
+        return [db.engine] + [shard_router.engines[name] for name in sorted(shard_router.engines)]
+
+    @staticmethod
+    def _open_connections(engine, count):
+        # only a QueuePool keeps connections around; other pools share one or open on demand
+        if not isinstance(engine.pool, QueuePool):
+            return
+        connections = []
+        try:
+            for _ in range(count if count is not None else engine.pool.size()):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.execute(text("SELECT 1"))
+        finally:
+            for connection in connections:
+                connection.close()
+
+    @staticmethod
+    def pool_status(engine):
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            return {"class": type(pool).__name__}
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        return {
+            "class": type(pool).__name__,
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "saturation": round(pool.checkedout() / capacity, 3) if capacity else None
+        }
+
+    def check(self):
+        """Returns ``(ready, report)`` for ``/readyz``."""
+        config = current_app.config
+        if config['WARMUP']:
+            self.start_warm_up(current_app._get_current_object())
+        ready = self.warmed_up
+        databases = {}
+        for name, engine in zip(['default'] + sorted(shard_router.engines), self.engines()):
+            status = self.pool_status(engine)
+            started = time.perf_counter()
+            try:
+                with shard_router.using(None if name == 'default' else name):
+                    # Job only lives in the default database, Meal in every shard
+                    mapper = Job if name == 'default' else Meal
+                    db.session.connection(bind_arguments={'mapper': mapper}).execute(text("SELECT 1"))
+                status["ping_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            except Exception as error:
+                db.session.rollback()
+                status["error"] = type(error).__name__
+                ready = False
+            saturation = status.get("saturation")
+            if saturation is not None and saturation >= config['HEALTH_MAX_POOL_SATURATION']:
+                ready = False
+            databases[name] = status
+
+        queue_depth = db.session.scalar(
+            select(func.count()).select_from(Job).where(Job.status == 'queued', Job.run_after <= utcnow())
+        ) if "error" not in databases['default'] else None
+        max_depth = config['HEALTH_MAX_QUEUE_DEPTH']
+        if max_depth is not None and queue_depth is not None and queue_depth > max_depth:
+            ready = False
+
+        return ready, {
+            "status": "ready" if ready else "unavailable",
+            "warmed_up": self.warmed_up,
+            "warmup_ms": self.warmup_ms,
+            "databases": databases,
+            "queue_depth": queue_depth
+        }
+
+
+health = Health()
@@ -0,0 +1,166 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+import click
+from flask import current_app, jsonify, make_response, request
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.idempotency_key import IdempotencyKey
+from services.jobs import job_queue, utcnow
+from services.sharding import shard_router
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def init_app(app):
+    app.config.setdefault('IDEMPOTENCY_TTL_SECONDS', 24 * 60 * 60)
+    app.config.setdefault('IDEMPOTENCY_SWEEP_BATCH_SIZE', 500)
+    app.cli.add_command(idempotency_cli)
+
+
+def _request_hash():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('utf-8'))
+    digest.update(request.path.encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(record):
+    response = make_response(record.response_body, record.status_code)
+    response.mimetype = record.mimetype
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _reserve(key, request_hash):
+    """Inserts a pending record for ``key``; returns the existing record on conflict."""
+    now = utcnow()
+    ttl = timedelta(seconds=current_app.config['IDEMPOTENCY_TTL_SECONDS'])
+
+    record = IdempotencyKey(
+        key=key,
+        user_id=current_user.id,
+        request_hash=request_hash,
+        created_at=now,
+        expires_at=now + ttl
+    )
+    db.session.add(record)
+    try:
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    existing = db.session.scalar(
+        select(IdempotencyKey).where(IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == key)
+    )
+    if existing is not None and existing.expires_at <= now:
+        # past its retention the key is free again, even if the sweeper hasn't reached it yet
+        db.session.delete(existing)
+        db.session.commit()
+        return _reserve(key, request_hash)
+    return existing
+
+
+def idempotent(view):
+    """Makes a write endpoint safe to retry with an ``Idempotency-Key`` header.
+
+    The first request with a key reserves it and stores the view's response.
+    Later requests with the same key get that stored response back without
+    calling the view again. Reusing a key for a different body returns 422,
+    and a retry that arrives while the first request is still running
+    returns 409. Responses with a 5xx status are not stored, so the client
+    can try again.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": "Invalid Idempotency-Key"}), 400
+
+        request_hash = _request_hash()
+        existing = _reserve(key, request_hash)
+        if existing is not None:
+            if existing.request_hash != request_hash:
+                return jsonify({"error": "Idempotency-Key reused with a different request"}), 422
+            if existing.status_code is None:
+                return jsonify({"error": "A request with this Idempotency-Key is in progress"}), 409
+            return _replay(existing)
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            _release(key)
+            raise
+
+        if response.status_code >= 500:
+            _release(key)
+            return response
+
+        record = db.session.scalar(
+            select(IdempotencyKey).where(IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == key)
+        )
+        record.status_code = response.status_code
+        record.response_body = response.get_data(as_text=True)
+        record.mimetype = response.mimetype
+        db.session.commit()
+        return response
+    return wrapper
+
+
+def _release(key):
+    db.session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.user_id == current_user.id, IdempotencyKey.key == key)
+    )
+    db.session.commit()
+
+
+def sweep_expired(batch_size=None):
+    """Deletes expired keys in bounded batches and returns how many were removed.
+
+    Each batch is its own short transaction, so the sweep never holds locks
+    on a large range of the table at once.
+    """
+    batch_size = batch_size or current_app.config['IDEMPOTENCY_SWEEP_BATCH_SIZE']
+    removed = 0
+    while True:
+        ids = db.session.scalars(
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= utcnow())
+            .order_by(IdempotencyKey.expires_at)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return removed
+
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(ids)))
+        db.session.commit()
+        removed += len(ids)
+
+
+@job_queue.task('idempotency.sweep', max_concurrency=1)
+def sweep_job(job, payload):
+    batch_size = (payload or {}).get('batch_size')
+    return {"removed": sum(sweep_expired(batch_size) for _ in shard_router.each_shard())}
+
+
+idempotency_cli = AppGroup('idempotency', help="Idempotency key store commands.")
+
+
+@idempotency_cli.command('sweep')
+@click.option('--batch-size', type=int, default=None, help="Keys deleted per transaction.")
+def sweep_command(batch_size):
+    """Deletes expired idempotency keys."""
+    removed = sum(sweep_expired(batch_size) for _ in shard_router.each_shard())
+    click.echo(f"Removed {removed} expired key(s)")
@@ -0,0 +1,270 @@
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.job import Job
+from models.job_lock import JobLock
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying the job can never succeed."""
+
+
+class JobQueue:
+    """DB-backed job queue.
+
+    Jobs live in the ``job`` table, so any process sharing the database can
+    enqueue or run them without an external broker. Workers run either as
+    threads inside the web process (``JOBS_IN_PROCESS``) or as a separate
+    process via ``flask jobs work``.
+    """
+
+    def __init__(self, app=None):
+        self.handlers = {}
+        self.limits = {}
+        self._stop = threading.Event()
+        self._threads = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOBS_IN_PROCESS', False)
+        app.config.setdefault('JOBS_CONCURRENCY', 2)
+        app.config.setdefault('JOBS_POLL_INTERVAL', 1.0)
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', 3)
+        app.config.setdefault('JOBS_RETRY_BACKOFF', 2)
+        app.config.setdefault('JOBS_LEASE_SECONDS', 300)
+        app.extensions['job_queue'] = self
+        app.cli.add_command(jobs_cli)
+
+        if app.config['JOBS_IN_PROCESS']:
+            self.start_workers(app)
+
+    def task(self, name, max_concurrency=None):
+        """Registers ``func(job, payload)`` as the handler for ``name``.
+
+        ``max_concurrency`` caps how many jobs with this name may be running
+        at once across every worker sharing the database.
+        """
+        def decorator(func):
+            self.handlers[name] = func
+            if max_concurrency is not None:
+                self.limits[name] = max_concurrency
+            return func
+        return decorator
+
+    def enqueue(self, name, payload=None, user_id=None, max_attempts=None):
+        if name not in self.handlers:
+            raise KeyError(f"Unknown job: {name}")
+
+        now = utcnow()
+        job = Job(
+            name=name,
+            payload=json.dumps(payload),
+            status='queued',
+            attempts=0,
+            max_attempts=max_attempts or current_app.config['JOBS_MAX_ATTEMPTS'],
+            run_after=now,
+            created_at=now,
+            updated_at=now,
+            user_id=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+        return job
+
+    def claim(self):
+        """Marks the oldest runnable job as running and returns it, or None."""
+        now = utcnow()
+        self._expire_leases(now)
+
+        candidates = db.session.execute(
+            select(Job.id, Job.name)
+            .where(Job.status == 'queued', Job.run_after <= now)
+            .order_by(Job.run_after, Job.id)
+            .limit(20)
+        ).all()
+        # every attempt below is its own transaction, so its reads come after its lock
+        db.session.commit()
+
+        for job_id, name in candidates:
+            limit = self.limits.get(name)
+            if limit is not None:
+                # held until the commit: workers claiming the same name count one after another
+                self._lock(name)
+                running = db.session.scalar(
+                    select(func.count()).select_from(Job).where(Job.name == name, Job.status == 'running')
+                )
+                if running >= limit:
+                    db.session.commit()
+                    continue
+
+            # the status guard makes the claim atomic when several workers race for the same row
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', attempts=Job.attempts + 1, updated_at=now)
+            )
+            db.session.commit()
+            if claimed.rowcount == 1:
+                return db.session.get(Job, job_id, populate_existing=True)
+
+        return None
+
+    def _lock(self, name):
+        """Locks the ``job_lock`` row of ``name`` for the rest of the transaction, creating it if needed."""
+        if db.session.execute(update(JobLock).where(JobLock.name == name).values(locked_at=utcnow())).rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(JobLock(name=name, locked_at=utcnow()))
+        except IntegrityError:
+            # another worker created it first; wait for its lock like any other claim
+            db.session.execute(update(JobLock).where(JobLock.name == name).values(locked_at=utcnow()))
+
+    def run(self, job):
+        handler = self.handlers.get(job.name)
+        try:
+            if handler is None:
+                raise PermanentJobError(f"Unknown job: {job.name}")
+            payload = json.loads(job.payload) if job.payload else None
+            with self._heartbeat(job.id):
+                result = handler(job, payload)
+        except Exception as error:
+            db.session.rollback()
+            job.error = f"{type(error).__name__}: {error}"
+            if isinstance(error, PermanentJobError) or job.attempts >= job.max_attempts:
+                job.status = 'failed'
+            else:
+                backoff = current_app.config['JOBS_RETRY_BACKOFF'] ** job.attempts
+                job.status = 'queued'
+                job.run_after = utcnow() + timedelta(seconds=backoff)
+        else:
+            job.status = 'done'
+            job.result = json.dumps(result)
+            job.error = None
+
+        job.updated_at = utcnow()
+        db.session.commit()
+        return job
+
+    @contextmanager
+    def _heartbeat(self, job_id):
+        """Renews the job's lease every third of ``JOBS_LEASE_SECONDS`` while its handler runs.
+
+        Without it a job running longer than the lease would be handed to
+        another worker and run twice at the same time.
+        """
+        app = current_app._get_current_object()
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(app.config['JOBS_LEASE_SECONDS'] / 3):
+                # an app context of its own, so the handler's session is never touched from here
+                with app.app_context():
+                    try:
+                        db.session.execute(
+                            update(Job).where(Job.id == job_id, Job.status == 'running').values(updated_at=utcnow())
+                        )
+                        db.session.commit()
+                    except Exception:
+                        app.logger.exception("Heartbeat of job %s failed", job_id)
+                    finally:
+                        db.session.remove()
+
+        thread = threading.Thread(target=beat, name=f"job-heartbeat-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def run_pending(self, limit=None):
+        """Runs runnable jobs until the queue is drained or ``limit`` is hit."""
+        ran = 0
+        while limit is None or ran < limit:
+            job = self.claim()
+            if job is None:
+                break
+            self.run(job)
+            ran += 1
+        return ran
+
+    def start_workers(self, app, concurrency=None):
+        self._stop.clear()
+        for index in range(concurrency or app.config['JOBS_CONCURRENCY']):
+            thread = threading.Thread(
+                target=self._work, args=(app,), name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop_workers(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _work(self, app):
+        while not self._stop.is_set():
+            with app.app_context():
+                try:
+                    ran = self.run_pending(limit=1)
+                except Exception:
+                    app.logger.exception("Job worker iteration failed")
+                    ran = 0
+                finally:
+                    db.session.remove()
+            if not ran:
+                self._stop.wait(app.config['JOBS_POLL_INTERVAL'])
+
+    def _expire_leases(self, now):
+        # a running job whose worker died never reports back; hand it to another worker
+        expired = now - timedelta(seconds=current_app.config['JOBS_LEASE_SECONDS'])
+        db.session.execute(
+            update(Job)
+            .where(Job.status == 'running', Job.updated_at < expired, Job.attempts >= Job.max_attempts)
+            .values(status='failed', error='Lease expired', updated_at=now)
+        )
+        db.session.execute(
+            update(Job)
+            .where(Job.status == 'running', Job.updated_at < expired)
+            .values(status='queued', updated_at=now)
+        )
+
+
+job_queue = JobQueue()
+
+jobs_cli = AppGroup('jobs', help="Background job queue commands.")
+
+
+@jobs_cli.command('work')
+@click.option('--concurrency', type=int, default=None, help="Number of worker threads.")
+@click.option('--burst', is_flag=True, help="Run every queued job and exit.")
+def work_command(concurrency, burst):
+    """Runs queued jobs in this process."""
+    queue = current_app.extensions['job_queue']
+
+    if burst:
+        click.echo(f"Ran {queue.run_pending()} job(s)")
+        return
+
+    queue.start_workers(current_app._get_current_object(), concurrency)
+    try:
+        while True:
+            queue._stop.wait(1)
+    except KeyboardInterrupt:
+        queue.stop_workers()
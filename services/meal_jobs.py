@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from database import db
+from models.meal import Meal, NUTRITION_FIELDS
+from models.user import User
+from services import archive
+from services.jobs import job_queue, PermanentJobError
+from services.events import meal_events
+from services.suggest import meal_names
+from services.sharding import shard_router
+from services.timezones import DEFAULT_TIMEZONE, get_zone, meal_times
+
+
+@job_queue.task('meals.export', max_concurrency=2)
+def export_meals(job, payload):
+    if not shard_router.activate_for_user(job.user_id):
+        raise PermanentJobError(f"User {job.user_id} not found")
+    meals = Meal.query.filter_by(user_id=job.user_id).order_by(Meal.datetime, Meal.id)
+    # archived meals are all older than the hot ones, so they go first
+    return archive.archived_meals(job.user_id) + [meal.to_dict() for meal in meals.yield_per(500)]
+
+
+@job_queue.task('meals.import', max_concurrency=1)
+def import_meals(job, payload):
+    if not shard_router.activate_for_user(job.user_id):
+        raise PermanentJobError(f"User {job.user_id} not found")
+    user = db.session.get(User, job.user_id) if job.user_id is not None else None
+    zone = get_zone(user.timezone if user is not None else DEFAULT_TIMEZONE)
+    meals = []
+    for index, item in enumerate(payload['meals']):
+        try:
+            meal_datetime = datetime.fromisoformat(item['datetime']) if item.get('datetime') else None
+        except (TypeError, ValueError):
+            raise PermanentJobError(f"Invalid datetime at index {index}")
+
+        meals.append(Meal(
+            name=item['name'],
+            description=item['description'],
+            isInDiet=item['isInDiet'],
+            user_id=job.user_id,
+            **{field: item[field] for field in NUTRITION_FIELDS if field in item},
+            **meal_times(meal_datetime, zone)
+        ))
+
+    db.session.add_all(meals)
+    db.session.flush()
+    # serialized before the commit expires them, so publishing needs no SELECT per meal
+    created = [meal.to_dict() for meal in meals]
+    db.session.commit()
+    meal_names.invalidate(job.user_id)
+    for data in created:
+        meal_events.publish(job.user_id, 'meal.created', data)
+    return {"imported": len(meals)}
@@ -0,0 +1,189 @@
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import current_app, g, has_app_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def _slug(path):
+    return re.sub(r'[^A-Za-z0-9]+', '-', path).strip('-')[:60] or 'root'
+
+
+class RequestProfiler:
+    """Profiles individual requests with cProfile and records their SQL.
+
+    A request is profiled when it carries ``X-Debug-Profile`` with the value
+    of ``PROFILE_TOKEN``, or when it is picked by ``PROFILE_SAMPLE_RATE``
+    (0 to 1). Each profile is written to ``PROFILE_DIR`` as a ``.prof``
+    file, loadable with ``pstats`` or snakeviz, plus a ``.json`` summary
+    with the request, its SQL statements (without parameters) in order with
+    their timings and the most expensive functions. The response carries
+    ``X-Profile-Id``.
+    """
+
+    HEADER = 'X-Debug-Profile'
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILE_TOKEN', None)
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_DIR', 'profiles')
+        app.config.setdefault('PROFILE_TOP_FUNCTIONS', 30)
+        app.extensions['profiler'] = self
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+        # every engine, so shard engines are covered too; the listeners return at once outside profiled requests
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+    def wanted(self):
+        config = current_app.config
+        token = config['PROFILE_TOKEN']
+        header = request.headers.get(self.HEADER)
+        if token and header is not None and self._matches(header, token):
+            return True
+        rate = config['PROFILE_SAMPLE_RATE']
+        return rate > 0 and random.random() < rate
+
+    @staticmethod
+    def _matches(header, token):
+        # compare_digest only takes ASCII strings; header values arrive decoded as latin-1
+        try:
+            return hmac.compare_digest(header.encode('latin-1'), token.encode('utf-8'))
+        except UnicodeEncodeError:
+            return False
+
+    def before_request(self):
+        if not self.wanted():
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # another profiler owns the interpreter (sys.monitoring allows one); skip this request
+            return
+        g.profile = {
+            "id": uuid.uuid4().hex,
+            "profiler": profile,
+            "started": time.perf_counter(),
+            "sql": []
+        }
+
+    def after_request(self, response):
+        state = g.pop('profile', None)
+        if state is None:
+            return response
+
+        state["profiler"].disable()
+        elapsed = time.perf_counter() - state["started"]
+        self.write(state, elapsed, response.status_code)
+        response.headers['X-Profile-Id'] = state["id"]
+        return response
+
+    def teardown_request(self, error=None):
+        # after_request is skipped when the request fails before a response exists
+        state = g.pop('profile', None)
+        if state is not None:
+            state["profiler"].disable()
+
+    def write(self, state, elapsed, status):
+        directory = current_app.config['PROFILE_DIR']
+        os.makedirs(directory, exist_ok=True)
+        started_at = datetime.now(timezone.utc)
+        base = os.path.join(
+            directory, f"{started_at:%Y%m%dT%H%M%S}-{request.method}-{_slug(request.path)}-{state['id'][:8]}"
+        )
+
+        profiler = state["profiler"]
+        profiler.dump_stats(base + '.prof')
+
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        top = []
+        for (filename, line, function) in stats.fcn_list[:current_app.config['PROFILE_TOP_FUNCTIONS']]:
+            calls, _, total, cumulative, _ = stats.stats[(filename, line, function)]
+            top.append({
+                "function": f"{filename}:{line}({function})",
+                "calls": calls,
+                "total_ms": round(total * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3)
+            })
+
+        sql = state["sql"]
+        summary = {
+            "id": state["id"],
+            "method": request.method,
+            "path": request.full_path.rstrip('?'),
+            "status": status,
+            "user_id": current_user.get_id(),
+            "started_at": started_at.isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql_count": len(sql),
+            "sql_ms": round(sum(item["duration_ms"] for item in sql), 3),
+            "sql": sql,
+            "top": top
+        }
+        with open(base + '.json', 'w') as file:
+            json.dump(summary, file, indent=2)
+        return base
+
+
+def _current_profile():
+    return g.get('profile') if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = _current_profile()
+    if state is not None:
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn, statement)
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; it belongs in the breakdown all the same
+    if exception_context.connection is not None:
+        _record(exception_context.connection, exception_context.statement, exception_context.original_exception)
+
+
+def _record(conn, statement, error=None):
+    started = conn.info.get('profile_started')
+    if not started:
+        return
+    # popped even when the profile is gone, so the pooled connection never keeps a stale entry
+    started = started.pop()
+    state = _current_profile()
+    if state is None:
+        return
+    item = {
+        # parameters are left out: they carry usernames and password hashes
+        "statement": statement,
+        "offset_ms": round((started - state["started"]) * 1000, 3),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3)
+    }
+    if error is not None:
+        item["error"] = type(error).__name__
+    state["sql"].append(item)
+
+
+profiler = RequestProfiler()
@@ -0,0 +1,72 @@
+import time
+from datetime import timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, select
+
+from database import db
+from models.meal import Meal
+from services.jobs import job_queue, utcnow
+from services.sharding import shard_router
+
+
+def init_app(app):
+    app.config.setdefault('MEAL_PURGE_AFTER_DAYS', 30)
+    app.config.setdefault('MEAL_PURGE_BATCH_SIZE', 500)
+    app.config.setdefault('MEAL_PURGE_PAUSE_MS', 50)
+    app.cli.add_command(purge_cli)
+
+
+def purge_meals(batch_size=None, pause_ms=None):
+    """Hard-deletes meals soft-deleted more than ``MEAL_PURGE_AFTER_DAYS`` ago.
+
+    Rows go in chunks of ``batch_size``, each in its own short transaction,
+    with a ``pause_ms`` sleep in between so request traffic gets the write
+    lock and the index maintenance is spread out. Until then a meal can be
+    restored. Interrupting the purge loses nothing: the next run picks up
+    where it stopped.
+    """
+    before = utcnow() - timedelta(days=current_app.config['MEAL_PURGE_AFTER_DAYS'])
+    batch_size = batch_size or current_app.config['MEAL_PURGE_BATCH_SIZE']
+    pause_ms = current_app.config['MEAL_PURGE_PAUSE_MS'] if pause_ms is None else pause_ms
+    purged = 0
+
+    while True:
+        ids = db.session.scalars(
+            # oldest first, straight off ix_meal_deleted_at; ordering by id would scan the whole table
+            select(Meal.id).where(Meal.deleted_at < before).order_by(Meal.deleted_at).limit(batch_size)
+            .execution_options(include_deleted=True)
+        ).all()
+        if not ids:
+            return purged
+
+        # already out of the search index and the name cache since the soft delete
+        db.session.execute(delete(Meal).where(Meal.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+        purged += len(ids)
+
+        if len(ids) < batch_size:
+            return purged
+        time.sleep(pause_ms / 1000)
+
+
+@job_queue.task('meals.purge', max_concurrency=1)
+def purge_job(job, payload):
+    return {"purged": sum(purge_meals() for _ in shard_router.each_shard())}
+
+
+purge_cli = AppGroup('purge', help="Removal of soft-deleted meals.")
+
+
+@purge_cli.command('run')
+@click.option('--days', type=int, default=None, help="Days a deleted meal is kept for restoring.")
+@click.option('--batch-size', type=int, default=None, help="Meals removed per transaction.")
+@click.option('--pause-ms', type=int, default=None, help="Sleep between transactions.")
+def run_command(days, batch_size, pause_ms):
+    """Hard-deletes meals soft-deleted before the restore window."""
+    if days is not None:
+        current_app.config['MEAL_PURGE_AFTER_DAYS'] = days
+    purged = sum(purge_meals(batch_size=batch_size, pause_ms=pause_ms) for _ in shard_router.each_shard())
+    click.echo(f"Purged {purged} meal(s)")
@@ -0,0 +1,223 @@
+import json
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, func, select
+
+from database import db
+from models.meal import Meal
+from models.meal_archive import MealArchive
+from models.report_snapshot import ReportSnapshot
+from models.user import User
+from services.archive import _unpack, month_start, next_month
+from services.jobs import job_queue, utcnow
+from services.sharding import shard_router
+
+POPULATION = 'population'
+ADHERENCE_BUCKETS = 10
+
+# one engine per database URI in each pool worker, reused across the chunks it is handed
+_engines = {}
+
+
+def init_app(app):
+    app.config.setdefault('REPORTS_PROCESSES', 2)
+    app.config.setdefault('REPORTS_CHUNK_USERS', 1000)
+    app.config.setdefault('REPORTS_YIELD_PER', 5000)
+    app.config.setdefault('REPORTS_DEFAULT_DAYS', 30)
+    app.cli.add_command(reports_cli)
+
+
+def _empty_partial():
+    return {"users": 0, "meals": 0, "inDiet": 0, "buckets": [0] * ADHERENCE_BUCKETS, "active": Counter()}
+
+
+def aggregate_users(connection, low, high, first_day, last_day, yield_per=5000):
+    """Aggregates the meals of users with ``low <= user_id < high`` logged on ``first_day..last_day``.
+
+    Meals are read through a server-side cursor, ``yield_per`` rows at a
+    time, so memory depends on the number of users in the range rather than
+    on their meals. Archived months that overlap the period are included.
+    A user only ever falls in one range, so partials can simply be added.
+    """
+    per_user = {}
+
+    def record(user_id, local_date, in_diet):
+        stats = per_user.get(user_id)
+        if stats is None:
+            stats = per_user[user_id] = [0, 0, set()]
+        stats[0] += 1
+        stats[1] += bool(in_diet)
+        stats[2].add(local_date)
+
+    rows = connection.execution_options(stream_results=True, yield_per=yield_per).execute(
+        select(Meal.user_id, Meal.local_date, Meal.isInDiet)
+        .where(Meal.user_id >= low, Meal.user_id < high, Meal.local_date >= first_day, Meal.local_date <= last_day,
+               Meal.deleted_at.is_(None))
+    )
+    for user_id, local_date, in_diet in rows:
+        record(user_id, local_date, in_diet)
+
+    # archived months start a day early to catch meals whose local date runs behind their UTC date
+    archives = connection.execution_options(stream_results=True, yield_per=50).execute(
+        select(MealArchive.user_id, MealArchive.data).where(
+            MealArchive.user_id >= low, MealArchive.user_id < high,
+            MealArchive.month >= month_start(first_day - timedelta(days=1)), MealArchive.month < next_month(last_day)
+        )
+    )
+    for user_id, data in archives:
+        for item in _unpack(data):
+            meal_datetime = datetime.fromisoformat(item['datetime'])
+            local_date = date.fromisoformat(item['local_date']) if item.get('local_date') else meal_datetime.date()
+            if first_day <= local_date <= last_day:
+                record(user_id, local_date, item['isInDiet'])
+
+    partial = _empty_partial()
+    for meals, in_diet, days in per_user.values():
+        partial["users"] += 1
+        partial["meals"] += meals
+        partial["inDiet"] += in_diet
+        partial["buckets"][min(int(in_diet / meals * ADHERENCE_BUCKETS), ADHERENCE_BUCKETS - 1)] += 1
+        partial["active"].update(day.isoformat() for day in days)
+    return partial
+
+
+def aggregate_chunk(url, low, high, first_day, last_day, yield_per):
+    """Pool entry point: aggregates one user id range on its own connection."""
+    engine = _engines.get(url)
+    if engine is None:
+        engine = _engines[url] = create_engine(url)
+    with engine.connect() as connection:
+        return aggregate_users(connection, low, high, first_day, last_day, yield_per)
+
+
+def merge(partials):
+    total = _empty_partial()
+    for partial in partials:
+        total["users"] += partial["users"]
+        total["meals"] += partial["meals"]
+        total["inDiet"] += partial["inDiet"]
+        total["buckets"] = [a + b for a, b in zip(total["buckets"], partial["buckets"])]
+        total["active"].update(partial["active"])
+    return total
+
+
+def population_report(total, first_day, last_day):
+    """Turns the merged partials into the report stored in the snapshot."""
+    days = (last_day - first_day).days + 1
+    width = 1 / ADHERENCE_BUCKETS
+    return {
+        "from": first_day.isoformat(),
+        "to": last_day.isoformat(),
+        "users": total["users"],
+        "meals": total["meals"],
+        "inDiet": total["inDiet"],
+        "adherence": round(total["inDiet"] / total["meals"], 3) if total["meals"] else None,
+        "adherenceDistribution": [
+            {"from": round(index * width, 2), "to": round((index + 1) * width, 2), "users": users}
+            for index, users in enumerate(total["buckets"])
+        ],
+        "activeUsers": [
+            {"date": day, "users": total["active"].get(day, 0)}
+            for day in ((first_day + timedelta(days=offset)).isoformat() for offset in range(days))
+        ]
+    }
+
+
+def _user_ranges(connection, chunk_users):
+    low, high = connection.execute(select(func.min(User.id), func.max(User.id))).one()
+    if low is None:
+        return []
+    return [(start, min(start + chunk_users, high + 1)) for start in range(low, high + 1, chunk_users)]
+
+
+def _shareable_url(engine):
+    """The URI a pool worker can reconnect with, or None for in-memory SQLite."""
+    if engine.url.get_backend_name() == 'sqlite' and engine.url.database in (None, '', ':memory:'):
+        return None
+    return engine.url.render_as_string(hide_password=False)
+
+
+def run_population_report(first_day, last_day, processes=None):
+    """Computes the population report over every shard and stores it as a snapshot.
+
+    The users of each shard are split into id ranges of
+    ``REPORTS_CHUNK_USERS`` and the ranges are aggregated in a pool of
+    ``REPORTS_PROCESSES`` processes, each on its own connection. With one
+    process, or an in-memory database the pool couldn't reach, chunks run
+    inline on the session's connection instead.
+    """
+    config = current_app.config
+    processes = config['REPORTS_PROCESSES'] if processes is None else processes
+    chunk_users, yield_per = config['REPORTS_CHUNK_USERS'], config['REPORTS_YIELD_PER']
+    started = time.perf_counter()
+
+    partials, tasks = [], []
+    for shard in shard_router.each_shard():
+        connection = db.session.connection(bind_arguments={'mapper': Meal})
+        url = _shareable_url(connection.engine)
+        for low, high in _user_ranges(connection, chunk_users):
+            if processes > 1 and url is not None:
+                tasks.append((url, low, high, first_day, last_day, yield_per))
+            else:
+                partials.append(aggregate_users(connection, low, high, first_day, last_day, yield_per))
+
+    if tasks:
+        # spawn, so workers don't inherit the app's open connections and worker threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(processes, len(tasks)), mp_context=context) as pool:
+            partials.extend(pool.map(aggregate_chunk, *zip(*tasks)))
+
+    report = population_report(merge(partials), first_day, last_day)
+    snapshot = ReportSnapshot(
+        name=POPULATION,
+        params=json.dumps({"from": first_day.isoformat(), "to": last_day.isoformat()}),
+        data=json.dumps(report),
+        duration_ms=round((time.perf_counter() - started) * 1000),
+        created_at=utcnow()
+    )
+    db.session.add(snapshot)
+    db.session.commit()
+    return snapshot
+
+
+def latest_snapshot(name):
+    return db.session.scalar(
+        select(ReportSnapshot).where(ReportSnapshot.name == name)
+        .order_by(ReportSnapshot.created_at.desc(), ReportSnapshot.id.desc()).limit(1)
+    )
+
+
+def default_period(last_day=None):
+    """``REPORTS_DEFAULT_DAYS`` days ending on ``last_day`` (today, UTC, by default)."""
+    last_day = last_day or utcnow().date()
+    return last_day - timedelta(days=current_app.config['REPORTS_DEFAULT_DAYS'] - 1), last_day
+
+
+@job_queue.task('reports.population', max_concurrency=1)
+def population_job(job, payload):
+    first_day, last_day = date.fromisoformat(payload['from']), date.fromisoformat(payload['to'])
+    return {"snapshot": run_population_report(first_day, last_day).id}
+
+
+reports_cli = AppGroup('reports', help="Cross-user reports.")
+
+
+@reports_cli.command('population')
+@click.option('--from', 'first_day', type=click.DateTime(['%Y-%m-%d']), default=None, help="First local date.")
+@click.option('--to', 'last_day', type=click.DateTime(['%Y-%m-%d']), default=None, help="Last local date, inclusive.")
+@click.option('--processes', type=int, default=None, help="Pool size; 1 runs every chunk in this process.")
+def population_command(first_day, last_day, processes):
+    """Computes the adherence distribution and daily active users and stores a snapshot."""
+    default_first, last_day = default_period(last_day.date() if last_day else None)
+    first_day = first_day.date() if first_day else default_first
+    if first_day > last_day:
+        raise click.BadParameter("--from must not be after --to")
+    snapshot = run_population_report(first_day, last_day, processes)
+    click.echo(f"Snapshot {snapshot.id}: {json.loads(snapshot.data)['users']} user(s) in {snapshot.duration_ms} ms")
@@ -0,0 +1,104 @@
+from flask import jsonify, make_response, request
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+from models.meal import Meal
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+# response field -> (column, converter); the order is the order fields appear in responses
+MEAL_FIELDS = {
+    'id': (Meal.id, None),
+    'name': (Meal.name, None),
+    'description': (Meal.description, None),
+    'datetime': (Meal.datetime, _isoformat),
+    'local_date': (Meal.local_date, _isoformat),
+    'isInDiet': (Meal.isInDiet, None),
+    'calories': (Meal.calories, None),
+    'protein': (Meal.protein, None),
+    'carbs': (Meal.carbs, None),
+    'fat': (Meal.fat, None),
+    'user_id': (Meal.user_id, None),
+    'version': (Meal.version, None),
+}
+
+ALL_FIELDS = tuple(MEAL_FIELDS)
+
+
+def parse_fields(value):
+    """Parses a ``fields=`` query value into a tuple of field names.
+
+    ``id`` is always included so every item stays addressable. ``None``
+    (no parameter) selects every field. Raises ValueError on unknown names.
+    """
+    if value is None:
+        return ALL_FIELDS
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - MEAL_FIELDS.keys()
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    names.add('id')
+    return tuple(name for name in ALL_FIELDS if name in names)
+
+
+def meal_columns(fields):
+    """The columns to SELECT for ``fields``; pass them to ``with_entities``."""
+    return [MEAL_FIELDS[name][0] for name in fields]
+
+
+def serialize_row(row, fields):
+    """Builds the response dict from a row selected with ``meal_columns(fields)``."""
+    item = {}
+    for name, value in zip(fields, row):
+        convert = MEAL_FIELDS[name][1]
+        item[name] = convert(value) if convert is not None else value
+    return item
+
+
+def pick(item, fields):
+    """Trims an already serialized meal (from ``to_dict`` or the archive) to ``fields``."""
+    if fields == ALL_FIELDS:
+        return item
+    return {name: item.get(name) for name in fields}
+
+
+def _encoders():
+    encoders = {'application/json': None}
+    if msgpack is not None:
+        encoders['application/msgpack'] = msgpack.packb
+        encoders['application/x-msgpack'] = msgpack.packb
+    if cbor2 is not None:
+        encoders['application/cbor'] = cbor2.dumps
+    return encoders
+
+
+ENCODERS = _encoders()
+
+
+def respond(data, status=200):
+    """Encodes ``data`` as JSON, MessagePack or CBOR, whichever the ``Accept`` header prefers.
+
+    The binary formats are offered only when their packages are installed.
+    Any other ``Accept`` value gets JSON, as before.
+    """
+    mimetype = request.accept_mimetypes.best_match(list(ENCODERS), default='application/json')
+    encode = ENCODERS[mimetype]
+    if encode is None:
+        response = jsonify(data)
+    else:
+        response = make_response(encode(data))
+        response.mimetype = mimetype
+    response.status_code = status
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,157 @@
+import base64
+import json
+import re
+
+from flask import current_app
+from sqlalchemy import DDL, bindparam, event, text
+
+from database import db
+from models.meal import Meal
+
+# MySQL keeps the FULLTEXT index up to date on its own; SQLite gets a standalone FTS5
+# table whose rowid mirrors meal.id and which the mapper events below keep in sync.
+event.listen(Meal.__table__, 'after_create', DDL(
+    "CREATE FULLTEXT INDEX ix_meal_fulltext ON meal (name, description)"
+).execute_if(dialect='mysql'))
+event.listen(Meal.__table__, 'after_create', DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS meal_fts USING fts5(name, description, user_id UNINDEXED)"
+).execute_if(dialect='sqlite'))
+event.listen(Meal.__table__, 'before_drop', DDL(
+    "DROP TABLE IF EXISTS meal_fts"
+).execute_if(dialect='sqlite'))
+
+MAX_PAGE_SIZE = 100
+
+
+def index_meal(connection, meal):
+    connection.execute(
+        text("INSERT INTO meal_fts (rowid, name, description, user_id) VALUES (:id, :name, :description, :user_id)"),
+        {"id": meal.id, "name": meal.name, "description": meal.description or '', "user_id": meal.user_id}
+    )
+
+
+def unindex_meal(connection, meal_id):
+    connection.execute(text("DELETE FROM meal_fts WHERE rowid = :id"), {"id": meal_id})
+
+
+def unindex_meals(connection, meal_ids):
+    """Drops meals removed by bulk statements, which bypass the mapper events."""
+    if connection.dialect.name == 'sqlite' and meal_ids:
+        connection.execute(
+            text("DELETE FROM meal_fts WHERE rowid IN :ids").bindparams(bindparam('ids', expanding=True)),
+            {"ids": list(meal_ids)}
+        )
+
+
+@event.listens_for(Meal, 'after_insert')
+def _after_meal_insert(mapper, connection, meal):
+    if connection.dialect.name == 'sqlite':
+        index_meal(connection, meal)
+
+
+def reindex_meal(connection, meal):
+    """Refreshes one meal's entry; also called after bulk UPDATEs, which bypass the mapper events."""
+    if connection.dialect.name == 'sqlite':
+        unindex_meal(connection, meal.id)
+        index_meal(connection, meal)
+
+
+@event.listens_for(Meal, 'after_update')
+def _after_meal_update(mapper, connection, meal):
+    reindex_meal(connection, meal)
+
+
+@event.listens_for(Meal, 'after_delete')
+def _after_meal_delete(mapper, connection, meal):
+    if connection.dialect.name == 'sqlite':
+        unindex_meal(connection, meal.id)
+
+
+def encode_cursor(score, meal_id):
+    raw = json.dumps([score, meal_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Returns ``(score, meal_id)`` or raises ValueError on a malformed cursor."""
+    try:
+        score, meal_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return float(score), int(meal_id)
+    except (TypeError, ValueError, UnicodeError) as error:
+        raise ValueError("Invalid cursor") from error
+
+
+def _terms(query):
+    return re.findall(r"\w+", query.lower())
+
+
+def _ranked_sqlite(terms, user_id):
+    # quoting every term keeps user input out of the FTS5 query syntax; OR mirrors
+    # MySQL's natural language mode, where bm25 then favours meals matching more terms
+    match = " OR ".join(f'"{term}"' for term in terms)
+    statement = """
+        SELECT rowid AS id, -bm25(meal_fts) AS score
+        FROM meal_fts
+        WHERE meal_fts MATCH :match AND user_id = :user_id
+    """
+    return statement, {"match": match, "user_id": user_id}
+
+
+def _ranked_mysql(terms, user_id):
+    statement = """
+        SELECT id, MATCH (name, description) AGAINST (:match IN NATURAL LANGUAGE MODE) AS score
+        FROM meal
+        WHERE user_id = :user_id AND deleted_at IS NULL
+          AND MATCH (name, description) AGAINST (:match IN NATURAL LANGUAGE MODE)
+    """
+    return statement, {"match": " ".join(terms), "user_id": user_id}
+
+
+def _ranked_fallback(terms, user_id):
+    conditions = " OR ".join(
+        f"lower(name) LIKE :term{index} OR lower(description) LIKE :term{index}" for index in range(len(terms))
+    )
+    params = {f"term{index}": f"%{term}%" for index, term in enumerate(terms)}
+    params["user_id"] = user_id
+    statement = f"SELECT id, 0.0 AS score FROM meal WHERE user_id = :user_id AND deleted_at IS NULL AND ({conditions})"
+    return statement, params
+
+
+RANKERS = {
+    'sqlite': _ranked_sqlite,
+    'mysql': _ranked_mysql,
+}
+
+
+def search_meals(user_id, query, limit=20, cursor=None):
+    """Returns ``(meals, next_cursor)`` ordered by relevance, best match first.
+
+    Pagination is keyset based on ``(score, id)``, so deep pages cost the same
+    as the first one.
+    """
+    terms = _terms(query)
+    if not terms:
+        return [], None
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    ranker = _ranked_fallback
+    if current_app.config.get('SEARCH_FULLTEXT', True):
+        ranker = RANKERS.get(db.session.get_bind(Meal).dialect.name, _ranked_fallback)
+    ranked, params = ranker(terms, user_id)
+
+    statement = f"SELECT id, score FROM ({ranked}) AS ranked"
+    if cursor is not None:
+        last_score, last_id = decode_cursor(cursor)
+        statement += " WHERE score < :last_score OR (score = :last_score AND id < :last_id)"
+        params.update(last_score=last_score, last_id=last_id)
+    statement += " ORDER BY score DESC, id DESC LIMIT :limit"
+    params["limit"] = limit + 1
+
+    rows = db.session.execute(text(statement), params).all()
+    page, has_more = rows[:limit], len(rows) > limit
+
+    meals = {meal.id: meal for meal in Meal.query.filter(Meal.id.in_([row.id for row in page]))}
+    results = [meals[row.id] for row in page if row.id in meals]
+
+    next_cursor = encode_cursor(page[-1].score, page[-1].id) if has_more else None
+    return results, next_cursor
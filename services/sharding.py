@@ -0,0 +1,333 @@
+import bisect
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import click
+from flask import g, has_app_context
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from database import db, RoutingSession
+from models.idempotency_key import IdempotencyKey
+from models.meal import Meal
+from models.meal_archive import ArchivedMeal, MealArchive
+from models.meal_id_block import MealIdBlock
+from models.user import User
+from models.user_directory import UserDirectory
+from services.jobs import utcnow
+from services.search import index_meal, unindex_meals
+from services.suggest import meal_names
+
+# tables that always live in the default database; everything else belongs to a user's shard
+GLOBAL_TABLES = {'user_directory', 'job', 'job_lock', 'meal_id_block', 'report_snapshot'}
+
+# meal ids a process takes from the global database at a time; changing it would overlap old blocks
+MEAL_ID_BLOCK_SIZE = 100
+
+
+class ShardMoveError(Exception):
+    pass
+
+
+class HashRing:
+    """Consistent hash ring, so adding a shard only moves ~1/N of the users."""
+
+    def __init__(self, shards, replicas=64):
+        points = sorted(
+            (self._hash(f"{shard}#{replica}"), shard) for shard in shards for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(str(value).encode('utf-8')).digest()[:8], 'big')
+
+    def shard_for(self, key):
+        if not self._hashes:
+            return None
+        position = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._shards[position]
+
+
+class ShardRouter:
+    """Routes user-owned tables to the shard holding the current user.
+
+    ``SHARDS`` maps shard names to database URIs. When it is empty every
+    statement goes to ``SQLALCHEMY_DATABASE_URI`` as before. When it is set,
+    that database keeps only the global tables: ``user_directory``, which
+    allocates user ids and records each user's shard, ``meal_id_block``,
+    which hands out meal ids, and ``job``. New users are placed by
+    consistent hashing of their id. The directory is what reads consult, so
+    ``flask shards rebalance`` can move users when shards are added.
+    """
+
+    def __init__(self, app=None):
+        self.engines = {}
+        self.ring = HashRing([])
+        self._meal_ids = iter(())
+        self._meal_ids_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SHARDS', {})
+        app.config.setdefault('SHARD_REPLICAS', 64)
+        self.replicas = app.config['SHARD_REPLICAS']
+        self.configure(app.config['SHARDS'])
+        RoutingSession.router = self
+        app.before_request(self._reset)
+        app.cli.add_command(shards_cli)
+        app.extensions['shard_router'] = self
+
+    def configure(self, shards):
+        self.dispose()
+        self.engines = {name: create_engine(uri) for name, uri in shards.items()}
+        self.ring = HashRing(self.engines, self.replicas)
+        self._meal_ids = iter(())
+
+    def dispose(self):
+        for engine in self.engines.values():
+            engine.dispose()
+
+    @property
+    def enabled(self):
+        return bool(self.engines)
+
+    @property
+    def current(self):
+        return g.get('shard') if has_app_context() else None
+
+    def _reset(self):
+        g.pop('shard', None)
+
+    def engine_for(self, mapper, clause):
+        if not self.enabled:
+            return None
+
+        if mapper is not None:
+            tables = {inspect(mapper).local_table.name}
+        elif clause is not None:
+            tables = {table.name for table in find_tables(clause, include_crud=True)}
+        else:
+            tables = set()
+        if tables and tables <= GLOBAL_TABLES:
+            return None
+
+        if self.current is None:
+            raise RuntimeError(f"No shard selected for a statement on {sorted(tables) or 'raw SQL'}")
+        return self.engines[self.current]
+
+    def activate(self, shard):
+        g.shard = shard
+
+    @contextmanager
+    def using(self, shard):
+        previous = g.get('shard')
+        g.shard = shard
+        try:
+            yield shard
+        finally:
+            g.shard = previous
+
+    def each_shard(self):
+        """Yields every shard name with that shard active (once with None when unsharded)."""
+        for shard in sorted(self.engines) or [None]:
+            with self.using(shard):
+                yield shard
+
+    def activate_for_user(self, user_id):
+        """Activates the shard of ``user_id``; returns False when the directory has no entry for it."""
+        if not self.enabled or user_id is None:
+            return True
+        shard = db.session.scalar(select(UserDirectory.shard).where(UserDirectory.id == user_id))
+        if shard is None:
+            return False
+        self.activate(shard)
+        return True
+
+    def username_taken(self, username):
+        if not self.enabled:
+            return User.query.filter_by(username=username).first() is not None
+        return db.session.scalar(select(UserDirectory.id).where(UserDirectory.username == username)) is not None
+
+    def register_user(self, username):
+        """Allocates a global id for ``username``, activates its shard and returns the id."""
+        if not self.enabled:
+            return None
+
+        entry = UserDirectory(username=username, shard='')
+        db.session.add(entry)
+        db.session.flush()
+        entry.shard = self.ring.shard_for(entry.id)
+        db.session.commit()
+        self.activate(entry.shard)
+        return entry.id
+
+    def unregister_user(self, user_id):
+        """Frees the username of a user whose row never made it to its shard."""
+        if not self.enabled:
+            return
+        db.session.execute(delete(UserDirectory).where(UserDirectory.id == user_id))
+        db.session.commit()
+
+    def find_user(self, username):
+        if not self.enabled:
+            return User.query.filter_by(username=username).first()
+
+        entry = UserDirectory.query.filter_by(username=username).first()
+        if entry is None:
+            return None
+        self.activate(entry.shard)
+        return db.session.get(User, entry.id)
+
+    def next_meal_id(self):
+        """Returns a meal id unique across shards, reserving a new block when this process runs out."""
+        with self._meal_ids_lock:
+            meal_id = next(self._meal_ids, None)
+            if meal_id is None:
+                block = self._reserve_meal_id_block()
+                self._meal_ids = iter(range((block - 1) * MEAL_ID_BLOCK_SIZE + 1, block * MEAL_ID_BLOCK_SIZE + 1))
+                meal_id = next(self._meal_ids)
+            return meal_id
+
+    @staticmethod
+    def _reserve_meal_id_block():
+        # a session of its own: the block stays reserved even if the meal's transaction rolls back
+        bind = db.session.get_bind(mapper=inspect(MealIdBlock))
+        with Session(bind=bind, join_transaction_mode='create_savepoint') as session:
+            block = session.execute(insert(MealIdBlock).values(reserved_at=utcnow())).inserted_primary_key[0]
+            session.commit()
+        return block
+
+    def plan(self):
+        """Returns ``(user_id, source, target)`` for users the ring places elsewhere."""
+        moves = []
+        for user_id, shard in db.session.execute(select(UserDirectory.id, UserDirectory.shard)):
+            target = self.ring.shard_for(user_id)
+            if target != shard:
+                moves.append((user_id, shard, target))
+        return moves
+
+    def move_user(self, user_id, source, target):
+        """Copies a user's rows to ``target``, repoints the directory, then cleans ``source``.
+
+        Meal ids are kept, since clients hold them; they come from
+        ``next_meal_id``, so they don't collide on the target. A move that
+        would collide anyway is refused.
+        Writes made by the user while the move runs are not carried over, so
+        run it when the user is idle or during a maintenance window.
+        """
+        with self.engines[source].connect() as src, self.engines[target].begin() as dst:
+            user = src.execute(select(User.__table__).where(User.id == user_id)).first()
+            if user is None:
+                raise ShardMoveError(f"User {user_id} not found on {source}")
+            meals = src.execute(select(Meal.__table__).where(Meal.user_id == user_id)).all()
+            meal_ids = [meal.id for meal in meals]
+
+            if meal_ids and dst.execute(select(Meal.id).where(Meal.id.in_(meal_ids)).limit(1)).first():
+                raise ShardMoveError(f"Meal ids of user {user_id} collide on {target}")
+
+            dst.execute(insert(User.__table__), [user._asdict()])
+            if meals:
+                dst.execute(insert(Meal.__table__), [meal._asdict() for meal in meals])
+                if dst.dialect.name == 'sqlite':
+                    # soft-deleted meals move too, for the purge, but stay out of the search index
+                    for meal in meals:
+                        if meal.deleted_at is None:
+                            index_meal(dst, meal)
+
+            keys = src.execute(select(IdempotencyKey.__table__).where(IdempotencyKey.user_id == user_id)).all()
+            if keys:
+                dst.execute(insert(IdempotencyKey.__table__), [self._without_id(key) for key in keys])
+
+            archive_ids = []
+            for archive in src.execute(select(MealArchive.__table__).where(MealArchive.user_id == user_id)).all():
+                archive_ids.append(archive.id)
+                new_id = dst.execute(insert(MealArchive.__table__), self._without_id(archive)).inserted_primary_key[0]
+                located = src.execute(select(ArchivedMeal.meal_id).where(ArchivedMeal.archive_id == archive.id)).scalars().all()
+                if located:
+                    dst.execute(insert(ArchivedMeal.__table__), [{"meal_id": meal_id, "archive_id": new_id} for meal_id in located])
+
+        entry = db.session.get(UserDirectory, user_id)
+        entry.shard = target
+        db.session.commit()
+
+        with self.engines[source].begin() as src:
+            if archive_ids:
+                src.execute(delete(ArchivedMeal.__table__).where(ArchivedMeal.archive_id.in_(archive_ids)))
+                src.execute(delete(MealArchive.__table__).where(MealArchive.id.in_(archive_ids)))
+            src.execute(delete(IdempotencyKey.__table__).where(IdempotencyKey.user_id == user_id))
+            src.execute(delete(Meal.__table__).where(Meal.user_id == user_id))
+            unindex_meals(src, meal_ids)
+            src.execute(delete(User.__table__).where(User.id == user_id))
+
+        meal_names.invalidate(user_id)
+
+    @staticmethod
+    def _without_id(row):
+        values = row._asdict()
+        values.pop('id')
+        return values
+
+    def create_all(self):
+        """Creates the user-owned tables on every shard and reserves the meal ids already in use."""
+        tables = [table for name, table in db.metadata.tables.items() if name not in GLOBAL_TABLES]
+        highest = 0
+        for engine in self.engines.values():
+            db.metadata.create_all(engine, tables=tables)
+            with engine.connect() as connection:
+                # archived meals keep their ids too
+                for column in (Meal.id, ArchivedMeal.meal_id):
+                    highest = max(highest, connection.execute(select(func.max(column))).scalar() or 0)
+
+        # shards that numbered meals on their own before the global allocation start past every id they used
+        needed = -(-highest // MEAL_ID_BLOCK_SIZE)
+        if needed > (db.session.scalar(select(func.max(MealIdBlock.id))) or 0):
+            db.session.add(MealIdBlock(id=needed, reserved_at=utcnow()))
+            db.session.commit()
+
+    def drop_all(self):
+        tables = [table for name, table in db.metadata.tables.items() if name not in GLOBAL_TABLES]
+        for engine in self.engines.values():
+            db.metadata.drop_all(engine, tables=tables)
+
+
+shard_router = ShardRouter()
+
+
+@event.listens_for(Meal, 'before_insert')
+def _assign_global_meal_id(mapper, connection, meal):
+    # each shard would number meals from 1; global ids let rebalancing keep them
+    if shard_router.enabled and meal.id is None:
+        meal.id = shard_router.next_meal_id()
+
+shards_cli = AppGroup('shards', help="Horizontal sharding commands.")
+
+
+@shards_cli.command('create-all')
+def create_all_command():
+    """Creates the user-owned tables on every configured shard."""
+    shard_router.create_all()
+    click.echo(f"Created tables on {len(shard_router.engines)} shard(s)")
+
+
+@shards_cli.command('rebalance')
+@click.option('--dry-run', is_flag=True, help="Only list the moves.")
+def rebalance_command(dry_run):
+    """Moves users whose shard no longer matches the hash ring."""
+    moves = shard_router.plan()
+    failed = 0
+    for user_id, source, target in moves:
+        click.echo(f"user {user_id}: {source} -> {target}")
+        if dry_run:
+            continue
+        try:
+            shard_router.move_user(user_id, source, target)
+        except ShardMoveError as error:
+            failed += 1
+            click.echo(f"  skipped: {error}", err=True)
+    click.echo(f"{len(moves) - failed} of {len(moves)} move(s) {'planned' if dry_run else 'done'}")
@@ -0,0 +1,83 @@
+import sqlite3
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from database import db
+
+# applied in this order on every new connection to a file-backed SQLite database
+_pragmas = []
+
+
+def init_app(app):
+    """Tunes every file-backed SQLite connection for production use.
+
+    ``journal_mode=WAL`` lets readers run while a write commits, and with
+    WAL ``synchronous=NORMAL`` only syncs at checkpoints: a power loss can
+    drop the last transactions but never corrupts the database.
+    ``busy_timeout`` makes concurrent writers wait for the lock instead of
+    failing at once. ``mmap_size`` and ``cache_size`` keep hot pages in
+    memory. In-memory databases (the test suite) are left alone. Shard
+    engines are covered too, since the listener is on ``Engine``.
+    """
+    app.config.setdefault('SQLITE_TUNING', True)
+    app.config.setdefault('SQLITE_JOURNAL_MODE', 'WAL')
+    app.config.setdefault('SQLITE_SYNCHRONOUS', 'NORMAL')
+    app.config.setdefault('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    app.config.setdefault('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    app.config.setdefault('SQLITE_CACHE_SIZE_KB', 64 * 1024)
+    app.cli.add_command(sqlite_cli)
+
+    _pragmas[:] = []
+    if not app.config['SQLITE_TUNING']:
+        return
+    _pragmas.extend([
+        f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA busy_timeout={int(app.config['SQLITE_BUSY_TIMEOUT_MS'])}",
+        f"PRAGMA mmap_size={int(app.config['SQLITE_MMAP_SIZE'])}",
+        # negative values are KiB rather than pages
+        f"PRAGMA cache_size={-int(app.config['SQLITE_CACHE_SIZE_KB'])}",
+        "PRAGMA temp_store=MEMORY",
+    ])
+    if not event.contains(Engine, 'connect', _set_pragmas):
+        event.listen(Engine, 'connect', _set_pragmas)
+
+
+def _is_file_database(dbapi_connection):
+    # database_list reports an empty file name for :memory: and temporary databases
+    return any(row[1] == 'main' and row[2] for row in dbapi_connection.execute("PRAGMA database_list"))
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    if not _pragmas or not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    if not _is_file_database(dbapi_connection):
+        return
+    for pragma in _pragmas:
+        dbapi_connection.execute(pragma)
+
+
+sqlite_cli = AppGroup('sqlite', help="File-backed SQLite maintenance.")
+
+
+@sqlite_cli.command('status')
+def status_command():
+    """Shows the pragmas in effect on a fresh connection."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        raise click.ClickException("SQLALCHEMY_DATABASE_URI is not a SQLite database")
+    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store'):
+        click.echo(f"{name} = {connection.execute(text(f'PRAGMA {name}')).scalar()}")
+
+
+@sqlite_cli.command('checkpoint')
+def checkpoint_command():
+    """Copies the WAL back into the database file and truncates it."""
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        raise click.ClickException("SQLALCHEMY_DATABASE_URI is not a SQLite database")
+    busy, log, checkpointed = connection.execute(text("PRAGMA wal_checkpoint(TRUNCATE)")).one()
+    click.echo(f"{checkpointed} of {log} WAL page(s) checkpointed" + (" (busy, retry later)" if busy else ""))
@@ -0,0 +1,116 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+from sqlalchemy import func, select
+
+from database import db
+from models.meal import Meal
+
+
+class NameIndex:
+    """Sorted array of one user's distinct meal names with usage counts."""
+
+    def __init__(self, counts=None):
+        self.counts = dict(counts or {})
+        self.keys = sorted((name.casefold(), name) for name in self.counts)
+
+    def add(self, name):
+        if name in self.counts:
+            self.counts[name] += 1
+        else:
+            self.counts[name] = 1
+            insort(self.keys, (name.casefold(), name))
+
+    def remove(self, name):
+        count = self.counts.get(name)
+        if count is None:
+            return
+        if count > 1:
+            self.counts[name] = count - 1
+            return
+        del self.counts[name]
+        key = (name.casefold(), name)
+        position = bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+
+    def suggest(self, prefix, limit=10):
+        prefix = prefix.casefold()
+        position = bisect_left(self.keys, (prefix,))
+        matches = []
+        while position < len(self.keys) and self.keys[position][0].startswith(prefix):
+            matches.append(self.keys[position][1])
+            position += 1
+        best = heapq.nsmallest(limit, matches, key=lambda name: (-self.counts[name], name.casefold()))
+        return [{"name": name, "count": self.counts[name]} for name in best]
+
+
+class MealNameIndex:
+    """Per-user ``NameIndex`` cache, built lazily from the DB on first use.
+
+    Indexes are kept in an LRU bounded by ``SUGGEST_MAX_USERS`` and updated in
+    place by the meal routes after each commit. Every worker process holds its
+    own copy, so a name written through another worker shows up once this
+    worker's entry is evicted or invalidated.
+    """
+
+    def __init__(self, app=None):
+        self.max_users = 1000
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('SUGGEST_MAX_USERS', 1000)
+        self.max_users = app.config['SUGGEST_MAX_USERS']
+        app.extensions['meal_names'] = self
+
+    def get(self, user_id):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                self._indexes.move_to_end(user_id)
+                return index
+
+        rows = db.session.execute(
+            select(Meal.name, func.count()).where(Meal.user_id == user_id).group_by(Meal.name)
+        ).all()
+        index = NameIndex({name: count for name, count in rows})
+
+        with self._lock:
+            # another request may have built it meanwhile; keep whichever landed first
+            index = self._indexes.setdefault(user_id, index)
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def suggest(self, user_id, prefix, limit=10):
+        index = self.get(user_id)
+        with self._lock:
+            return index.suggest(prefix, limit)
+
+    def record(self, user_id, added=None, removed=None):
+        """Applies a committed name change; unbuilt indexes are left for the lazy build."""
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                return
+            if removed is not None:
+                index.remove(removed)
+            if added is not None:
+                index.add(added)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._indexes.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+meal_names = MealNameIndex()
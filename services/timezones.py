@@ -0,0 +1,46 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from services.jobs import utcnow
+
+DEFAULT_TIMEZONE = 'UTC'
+
+
+def get_zone(name):
+    """Returns the ``ZoneInfo`` for an IANA name; raises ValueError if it is unknown."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as error:
+        raise ValueError(f"Unknown timezone: {name}") from error
+
+
+def to_utc(value, zone):
+    """Converts to a naive UTC datetime; naive input is read as wall-clock time in ``zone``."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=zone)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_date(utc_value, zone):
+    return utc_value.replace(tzinfo=timezone.utc).astimezone(zone).date()
+
+
+def today(zone):
+    return datetime.now(zone).date()
+
+
+def utc_bounds(day, zone):
+    """Returns the naive UTC ``[start, end)`` range covering ``day`` in ``zone``."""
+    start = datetime.combine(day, time(), zone)
+    end = datetime.combine(day + timedelta(days=1), time(), zone)
+    return to_utc(start, zone), to_utc(end, zone)
+
+
+def meal_times(value, zone):
+    """Column values for a meal eaten at ``value`` (now when None) by a user in ``zone``.
+
+    ``local_date`` is fixed when the meal is written, so a later timezone
+    change does not move meals that are already recorded to another day.
+    """
+    utc_value = to_utc(value, zone) if value is not None else utcnow()
+    return {"datetime": utc_value, "local_date": local_date(utc_value, zone)}
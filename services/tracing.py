@@ -0,0 +1,318 @@
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+
+from flask import g, has_app_context, request, request_finished
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# W3C trace context: version-traceid-parentid-flags
+TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        # OTLP JSON encodes 64-bit integers as strings
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Span:
+    def __init__(self, trace_id, parent_id, name, kind, attributes, start=None):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.start = start if start is not None else time.time_ns()
+        self.end = None
+        self.error = None
+
+    def to_otlp(self):
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items() if value is not None]
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class Tracer:
+    """Request tracing with spans exported as OTLP JSON.
+
+    Every sampled request gets a server span for its route, with a child
+    span per SQL statement and per span opened with ``tracer.span(...)``
+    (bcrypt, for instance). When a proxy sends ``X-Request-Start``
+    (``t=<microseconds>``), a ``queue`` span covers the time the request
+    waited before reaching a worker. An incoming ``traceparent`` header
+    continues the caller's trace and its sampled flag is honoured;
+    otherwise ``TRACING_SAMPLE_RATE`` decides. Finished traces are put on a
+    bounded queue and written by a background thread, one OTLP
+    ``ExportTraceServiceRequest`` per line, to ``TRACING_EXPORT_FILE``, or
+    POSTed to ``TRACING_EXPORT_URL`` (an OTLP/HTTP collector's
+    ``/v1/traces``). Traces that don't fit in the queue are dropped.
+    """
+
+    def __init__(self, app=None):
+        self.sample_rate = 1.0
+        self.service_name = 'daily-diet-api'
+        self.max_statement_length = 1000
+        self.dropped = 0
+        self._queue = None
+        self._thread = None
+        self._export = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TRACING', False)
+        app.config.setdefault('TRACING_SAMPLE_RATE', 1.0)
+        app.config.setdefault('TRACING_SERVICE_NAME', 'daily-diet-api')
+        app.config.setdefault('TRACING_EXPORT_FILE', 'traces.jsonl')
+        app.config.setdefault('TRACING_EXPORT_URL', None)
+        app.config.setdefault('TRACING_QUEUE_SIZE', 1000)
+        app.config.setdefault('TRACING_MAX_STATEMENT_LENGTH', 1000)
+        self.sample_rate = app.config['TRACING_SAMPLE_RATE']
+        self.service_name = app.config['TRACING_SERVICE_NAME']
+        self.max_statement_length = app.config['TRACING_MAX_STATEMENT_LENGTH']
+        app.extensions['tracer'] = self
+        app.before_request(self._before_request)
+        request_finished.connect(self._request_finished, app)
+        app.teardown_request(self._teardown_request)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+            event.listen(Engine, 'handle_error', _handle_error)
+
+        if app.config['TRACING']:
+            url = app.config['TRACING_EXPORT_URL']
+            self.start(_post_to(url) if url else _append_to(app.config['TRACING_EXPORT_FILE']),
+                       app.config['TRACING_QUEUE_SIZE'])
+            atexit.register(self.stop)
+
+    @property
+    def enabled(self):
+        return self._export is not None
+
+    def start(self, export, queue_size=1000):
+        """Starts exporting with ``export(payload)``, called from a background thread."""
+        self.stop()
+        self.dropped = 0
+        self._export = export
+        self._queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Exports whatever is queued, then stops the background thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._export = None
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            # batch whatever else is already waiting into the same export
+            batch = list(spans)
+            try:
+                while len(batch) < 512:
+                    more = self._queue.get_nowait()
+                    if more is None:
+                        self._queue.put(None)
+                        break
+                    batch.extend(more)
+            except queue.Empty:
+                pass
+            try:
+                self._export(self.payload(batch))
+            except Exception:
+                self.dropped += len(batch)
+
+    def payload(self, spans):
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "daily_diet.tracing"},
+                "spans": [span.to_otlp() for span in spans]
+            }]
+        }]}
+
+    def _sampled(self, flags):
+        if flags is not None:
+            return bool(int(flags, 16) & 1)
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def _before_request(self):
+        if not self.enabled:
+            return
+
+        match = TRACEPARENT.match(request.headers.get('traceparent', ''))
+        trace_id, parent_id, flags = match.groups() if match else (os.urandom(16).hex(), None, None)
+        if not self._sampled(flags):
+            return
+
+        now = time.time_ns()
+        root = Span(trace_id, parent_id, f"{request.method} {request.url_rule.rule if request.url_rule else request.path}",
+                    SPAN_KIND_SERVER, {
+                        "http.request.method": request.method,
+                        "http.route": request.url_rule.rule if request.url_rule else None,
+                        "url.path": request.path
+                    }, start=now)
+        g.trace = {"spans": [root], "stack": [root]}
+
+        queued_since = _request_start(request.headers.get('X-Request-Start'))
+        if queued_since is not None and queued_since < now:
+            queued = Span(trace_id, root.span_id, "queue", SPAN_KIND_INTERNAL, {}, start=queued_since)
+            queued.end = now
+            g.trace["spans"].append(queued)
+
+    def _request_finished(self, sender, response, **extra):
+        state = g.get('trace')
+        if state is not None:
+            state["spans"][0].attributes["http.response.status_code"] = response.status_code
+            if response.status_code >= 500:
+                state["spans"][0].error = str(response.status_code)
+
+    def _teardown_request(self, error=None):
+        state = g.pop('trace', None)
+        if state is None:
+            return
+        root = state["spans"][0]
+        user = g.get('_login_user')
+        root.attributes["enduser.id"] = user.get_id() if user is not None else None
+        if error is not None:
+            root.error = f"{type(error).__name__}: {error}"
+        root.end = time.time_ns()
+        for span in state["spans"]:
+            if span.end is None:
+                span.end = root.end
+        try:
+            self._queue.put_nowait(state["spans"])
+        except queue.Full:
+            self.dropped += len(state["spans"])
+
+    def current(self):
+        """The sampled trace of the request being handled, or None."""
+        return g.get('trace') if has_app_context() else None
+
+    def trace_id(self):
+        state = self.current()
+        return state["spans"][0].trace_id if state is not None else None
+
+    def open_span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        state = self.current()
+        if state is None:
+            return None
+        parent = state["stack"][-1]
+        span = Span(parent.trace_id, parent.span_id, name, kind, attributes)
+        state["spans"].append(span)
+        state["stack"].append(span)
+        return span
+
+    def close_span(self, span, error=None):
+        span.end = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        state = self.current()
+        if state is not None and state["stack"] and state["stack"][-1] is span:
+            state["stack"].pop()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Times the block as a child of the current span; a no-op outside sampled requests."""
+        span = self.open_span(name, **attributes)
+        if span is None:
+            yield None
+            return
+        try:
+            yield span
+        except Exception as error:
+            self.close_span(span, error)
+            raise
+        self.close_span(span)
+
+
+def _request_start(header):
+    """Parses ``X-Request-Start: t=<microseconds since the epoch>`` into nanoseconds."""
+    if not header:
+        return None
+    value = header[2:] if header.startswith('t=') else header
+    try:
+        return int(float(value) * 1000)
+    except ValueError:
+        return None
+
+
+def _append_to(path):
+    lock = threading.Lock()
+
+    def export(payload):
+        line = json.dumps(payload, separators=(',', ':'))
+        with lock, open(path, 'a') as file:
+            file.write(line + '\n')
+    return export
+
+
+def _post_to(url):
+    def export(payload):
+        body = json.dumps(payload).encode('utf-8')
+        post = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(post, timeout=5):
+            pass
+    return export
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if tracer.current() is None:
+        return
+    # named after the operation, e.g. SELECT; the full text goes in db.statement
+    span = tracer.open_span(statement.split(None, 1)[0].upper() if statement else 'SQL', SPAN_KIND_CLIENT, **{
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:tracer.max_statement_length]
+    })
+    conn.info.setdefault('trace_spans', []).append(span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    spans = conn.info.get('trace_spans')
+    if spans:
+        tracer.close_span(spans.pop())
+
+
+def _handle_error(exception_context):
+    spans = exception_context.connection.info.get('trace_spans') if exception_context.connection is not None else None
+    if spans:
+        tracer.close_span(spans.pop(), exception_context.original_exception)
+
+
+tracer = Tracer()
@@ -0,0 +1,95 @@
+import pytest
+import os
+import sys
+import time
+
+from sqlalchemy import event
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Modo de teste: precisa ser configurado antes de importar o app, que lê o ambiente na importação.
+# Cada worker do pytest-xdist é um processo com seu próprio banco; bancos em arquivo ou MySQL
+# recebem o sufixo do worker para não serem compartilhados.
+_worker = os.environ.get('PYTEST_XDIST_WORKER', 'master')
+_database_uri = os.environ.get('TEST_DATABASE_URI', 'sqlite:///:memory:')
+if not _database_uri.endswith(':memory:'):
+    _database_uri = f"{_database_uri}_{_worker}"
+os.environ['SQLALCHEMY_DATABASE_URI'] = _database_uri
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ['BCRYPT_ROUNDS'] = '4'
+os.environ['JOBS_IN_PROCESS'] = 'false'
+os.environ['ACCESS_LOG'] = 'false'
+os.environ['WARMUP'] = 'false'
+
+from app import app, db
+from database import RoutingSession
+from services.suggest import meal_names
+from services.events import meal_events
+
+_suite_started = time.perf_counter()
+
+def _enable_sqlite_savepoints(engine):
+    """O pysqlite controla transações por conta própria e quebra SAVEPOINTs; deixa o SQLAlchemy no controle."""
+    @event.listens_for(engine, 'connect')
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def _begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
+@pytest.fixture(scope='session')
+def database():
+    """Cria o schema uma única vez por sessão de testes"""
+    app.config['TESTING'] = True
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            _enable_sqlite_savepoints(db.engine)
+        db.create_all()
+
+    yield db
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def db_session(database):
+    """Executa o teste dentro de uma transação desfeita ao final.
+
+    Os commits da aplicação viram SAVEPOINTs, então nada chega a ser gravado.
+    """
+    with app.app_context():
+        connection = db.engine.connect()
+    transaction = connection.begin()
+
+    original_session = db.session
+    db.session = db._make_scoped_session({
+        'class_': RoutingSession,
+        'bind': connection,
+        'join_transaction_mode': 'create_savepoint'
+    })
+    meal_names.clear()
+    meal_events.clear()
+
+    yield db.session
+
+    db.session = original_session
+    transaction.rollback()
+    connection.close()
+    meal_names.clear()
+    meal_events.clear()
+
+@pytest.fixture
+def client(db_session):
+    ctx = app.app_context()
+    ctx.push()
+
+    yield app.test_client()
+
+    ctx.pop()
+
+def pytest_terminal_summary(terminalreporter):
+    elapsed = time.perf_counter() - _suite_started
+    terminalreporter.write_line(f"suite wall time: {elapsed:.2f}s (worker {_worker})")
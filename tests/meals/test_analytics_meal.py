@@ -0,0 +1,128 @@
+import pytest
+import json
+import sys
+import os
+from datetime import date, datetime
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from services.analytics import MealColumns, analyze
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, when, isInDiet=True, **nutrition):
+    """Cria uma refeição via API"""
+    return client.post("/meals", data=json.dumps({
+        'name': "Refeição",
+        'description': "Prato do dia",
+        'datetime': when,
+        'isInDiet': isInDiet,
+        **nutrition
+    }), content_type='application/json')
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_create_meal_with_nutrition(client, default_user):
+    """Testa a criação de refeição com calorias e macros"""
+    with client:
+        response = create_meal(client, "2025-10-05T12:00:00", calories=650, protein=40, carbs=70.5, fat=18)
+        assert response.status_code == 201
+        meal = response.json['meal']
+        assert (meal['calories'], meal['protein'], meal['carbs'], meal['fat']) == (650, 40, 70.5, 18)
+
+        response = client.patch(f"/meal/{meal['id']}", data=json.dumps({'version': 1, 'calories': None}),
+                                content_type='application/json')
+        assert response.json['meal']['calories'] is None
+
+def test_create_meal_with_negative_calories(client, default_user):
+    """Testa a criação de refeição com calorias negativas"""
+    with client:
+        response = create_meal(client, "2025-10-05T12:00:00", calories=-10)
+        assert response.status_code == 400
+        assert response.json['details'] == [{'field': 'calories', 'message': "must be at least 0"}]
+
+def test_meal_analytics(client, default_user):
+    """Testa o resumo, os totais diários, a aderência semanal e as sequências"""
+    with client:
+        create_meal(client, "2025-10-06T08:00:00", calories=400)
+        create_meal(client, "2025-10-06T20:00:00", calories=600)
+        create_meal(client, "2025-10-07T12:00:00", isInDiet=False, calories=900)
+        create_meal(client, "2025-10-08T12:00:00")
+        create_meal(client, "2025-10-13T12:00:00", calories=500)
+
+        response = client.get("/meals/analytics?from=2025-10-06&to=2025-10-13&window=2")
+        assert response.status_code == 200
+        result = response.json
+
+        assert result['summary'] == {'meals': 5, 'inDiet': 4, 'offDiet': 1, 'adherence': 0.8}
+
+        daily = {day['date']: day for day in result['daily']}
+        assert len(daily) == 8
+        assert daily['2025-10-06']['calories'] == 1000
+        assert daily['2025-10-07']['averageCalories'] == 950
+        # sem calorias registradas no dia 8, a média usa só o dia 7
+        assert daily['2025-10-08']['calories'] is None
+        assert daily['2025-10-08']['averageCalories'] == 900
+        assert daily['2025-10-10']['averageCalories'] is None
+
+        assert [(week['week'], week['meals'], week['adherence']) for week in result['weekly']] == [
+            ('2025-10-06', 4, 0.75),
+            ('2025-10-13', 1, 1.0)
+        ]
+        assert result['streaks'] == {
+            'meals': {'current': 2, 'best': 2},
+            'days': {'current': 1, 'best': 1}
+        }
+
+def test_meal_analytics_empty(client, default_user):
+    """Testa as tendências sem refeições"""
+    with client:
+        response = client.get("/meals/analytics")
+        assert response.status_code == 200
+        assert response.json['summary']['meals'] == 0
+        assert len(response.json['daily']) == 90
+
+def test_meal_analytics_invalid_range(client, default_user):
+    """Testa as tendências com período ou janela inválidos"""
+    with client:
+        assert client.get("/meals/analytics?from=2025-10-10&to=2025-10-01").status_code == 400
+        assert client.get("/meals/analytics?from=2000-01-01&to=2025-10-01").status_code == 400
+        assert client.get("/meals/analytics?window=0").status_code == 400
+
+def test_day_streak_ignores_today_without_meals():
+    """Testa que o dia atual sem refeições não zera a sequência de dias"""
+    days = [date(2025, 10, 1), date(2025, 10, 2), date(2025, 10, 2)]
+    columns = MealColumns.from_columns(
+        days,
+        [datetime(day.year, day.month, day.day, 12) for day in days],
+        [True, True, True],
+        {'calories': [None] * 3, 'protein': [None] * 3, 'carbs': [None] * 3, 'fat': [None] * 3}
+    )
+
+    result = analyze(columns, date(2025, 10, 1), date(2025, 10, 3))
+    assert result['streaks']['days'] == {'current': 2, 'best': 2}
+    assert result['streaks']['meals'] == {'current': 3, 'best': 3}
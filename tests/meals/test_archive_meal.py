@@ -0,0 +1,141 @@
+import pytest
+import json
+import sys
+import os
+from datetime import date, timedelta
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from models.meal import Meal
+from models.meal_archive import MealArchive
+from services.archive import archive_meals, partition_statements
+from services.jobs import job_queue, utcnow
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def logout_user(client):
+    """Faz logout de um usuário via API"""
+    client.get('/logout')
+
+def create_meal(client, name, when):
+    """Cria uma refeição via API e retorna seu ID"""
+    response = client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Descrição",
+        'datetime': when,
+        'isInDiet': True
+    }), content_type='application/json')
+    return response.json['meal']['id']
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_archive_moves_only_old_meals(client, default_user):
+    """Testa que apenas refeições além do horizonte de retenção são arquivadas"""
+    with client:
+        create_meal(client, "Antiga 1", "2020-01-10T12:00:00")
+        create_meal(client, "Antiga 2", "2020-01-20T12:00:00")
+        create_meal(client, "Antiga 3", "2020-02-05T12:00:00")
+        create_meal(client, "Recente", (utcnow() - timedelta(days=1)).isoformat())
+
+        assert archive_meals(batch_size=2) == 3
+        assert [meal.name for meal in Meal.query] == ["Recente"]
+        assert MealArchive.query.count() == 2
+        assert MealArchive.query.filter_by(month=date(2020, 1, 1)).one().meal_count == 2
+
+def test_list_meals_reads_archive_transparently(client, default_user):
+    """Testa que a listagem inclui refeições arquivadas quando o período exige"""
+    with client:
+        create_meal(client, "Antiga", "2020-01-10T12:00:00")
+        recent = (utcnow() - timedelta(days=1)).replace(microsecond=0)
+        create_meal(client, "Recente", recent.isoformat())
+        archive_meals()
+
+        names = [meal['name'] for meal in client.get("/meals").json]
+        assert names == ["Antiga", "Recente"]
+
+        names = [meal['name'] for meal in client.get("/meals?from=2020-01-01T00:00:00&to=2020-02-01T00:00:00").json]
+        assert names == ["Antiga"]
+
+        since = (recent - timedelta(hours=1)).isoformat()
+        names = [meal['name'] for meal in client.get(f"/meals?from={since}").json]
+        assert names == ["Recente"]
+
+        assert client.get("/meals?from=ontem").status_code == 400
+
+def test_export_includes_archived_meals(client, default_user):
+    """Testa que a exportação inclui as refeições arquivadas, antes das recentes"""
+    with client:
+        create_meal(client, "Antiga", "2020-01-10T12:00:00")
+        create_meal(client, "Recente", (utcnow() - timedelta(days=1)).isoformat())
+        archive_meals()
+
+        job_id = client.post("/meals/export").json['job']['id']
+        assert job_queue.run_pending() == 1
+
+        assert [meal['name'] for meal in client.get(f"/jobs/{job_id}").json['result']] == ["Antiga", "Recente"]
+
+def test_archived_meal_id_is_never_reused(client, default_user):
+    """Testa que o ID da última refeição arquivada não é reaproveitado por uma refeição nova"""
+    with client:
+        create_meal(client, "Recente", (utcnow() - timedelta(days=1)).isoformat())
+        archived_id = create_meal(client, "Antiga", "2020-01-10T12:00:00")
+        assert archive_meals() == 1
+
+        new_id = create_meal(client, "Também antiga", "2020-01-20T12:00:00")
+        assert new_id > archived_id
+        assert client.get(f"/meal/{archived_id}").json['name'] == "Antiga"
+
+        assert archive_meals() == 1
+        assert client.get(f"/meal/{new_id}").json['name'] == "Também antiga"
+
+def test_get_archived_meal(client):
+    """Testa a obtenção de uma refeição arquivada e a verificação de dono"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+
+        login_user(client, 'user1', 'pass1')
+        meal_id = create_meal(client, "Antiga", "2020-01-10T12:00:00")
+        archive_meals()
+
+        response = client.get(f"/meal/{meal_id}")
+        assert response.status_code == 200
+        assert response.json['name'] == "Antiga"
+        assert client.get("/meals/search?q=antiga").json['meals'] == []
+
+        logout_user(client)
+        login_user(client, 'user2', 'pass2')
+        assert client.get(f"/meal/{meal_id}").status_code == 403
+
+def test_partition_statements():
+    """Testa a geração do DDL de particionamento mensal"""
+    statements = partition_statements(date(2025, 11, 1), 3)
+
+    assert statements[0] == "ALTER TABLE meal DROP PRIMARY KEY, ADD PRIMARY KEY (id, datetime)"
+    assert "PARTITION p202511 VALUES LESS THAN (TO_DAYS('2025-12-01'))" in statements[1]
+    assert "PARTITION p202601 VALUES LESS THAN (TO_DAYS('2026-02-01'))" in statements[1]
+    assert "PARTITION pmax VALUES LESS THAN MAXVALUE" in statements[1]
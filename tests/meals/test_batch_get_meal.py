@@ -0,0 +1,127 @@
+import pytest
+import json
+import sys
+import os
+from datetime import timedelta
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from services import archive
+from services.jobs import utcnow
+from sqlalchemy import event
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, name, when="2025-10-05T12:00:00"):
+    """Cria uma refeição via API e retorna seu ID"""
+    return client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Arroz e feijão",
+        'datetime': when,
+        'isInDiet': True
+    }), content_type='application/json').json['meal']['id']
+
+def batch_get(client, ids):
+    """Busca várias refeições via POST /meals/batch-get"""
+    return client.post("/meals/batch-get", data=json.dumps({'ids': ids}), content_type='application/json')
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_batch_get_preserves_order(client, default_user):
+    """Testa que as refeições voltam na ordem pedida"""
+    with client:
+        ids = [create_meal(client, name) for name in ["Café", "Almoço", "Jantar"]]
+
+        response = batch_get(client, [ids[2], ids[0], ids[1], ids[2]])
+        assert response.status_code == 200
+        assert [meal['name'] for meal in response.json['meals']] == ["Jantar", "Café", "Almoço"]
+        assert response.json['missing'] == []
+        assert response.json['forbidden'] == []
+
+def test_batch_get_with_query_string(client, default_user):
+    """Testa a mesma busca via GET /meals?ids="""
+    with client:
+        ids = [create_meal(client, name) for name in ["Café", "Almoço"]]
+
+        response = client.get(f"/meals?ids={ids[1]},{ids[0]},9999")
+        assert response.status_code == 200
+        assert [meal['id'] for meal in response.json['meals']] == [ids[1], ids[0]]
+        assert response.json['missing'] == [9999]
+
+def test_batch_get_reports_forbidden_and_missing(client):
+    """Testa que IDs de outro usuário e inexistentes são informados separadamente"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+
+        login_user(client, 'user1', 'pass1')
+        other = create_meal(client, "Almoço do user1")
+        client.get('/logout')
+
+        login_user(client, 'user2', 'pass2')
+        mine = create_meal(client, "Almoço do user2")
+
+        response = batch_get(client, [9999, other, mine])
+        assert [meal['id'] for meal in response.json['meals']] == [mine]
+        assert response.json['missing'] == [9999]
+        assert response.json['forbidden'] == [other]
+
+def test_batch_get_includes_archived_meals(client, default_user):
+    """Testa que refeições arquivadas também são retornadas"""
+    with client:
+        old = create_meal(client, "Antiga", (utcnow() - timedelta(days=800)).isoformat())
+        recent = create_meal(client, "Recente")
+        archive.archive_meals()
+
+        response = batch_get(client, [old, recent])
+        assert [meal['name'] for meal in response.json['meals']] == ["Antiga", "Recente"]
+
+def test_batch_get_is_a_single_query(client, default_user):
+    """Testa que refeições do próprio usuário são buscadas com um único SELECT"""
+    with client:
+        ids = [create_meal(client, name) for name in ["Café", "Almoço", "Jantar"]]
+        client.get('/meals/suggest?prefix=a')
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db.session.connection()
+        event.listen(connection, 'before_cursor_execute', record)
+        try:
+            batch_get(client, ids)
+        finally:
+            event.remove(connection, 'before_cursor_execute', record)
+
+        assert len([statement for statement in statements if 'FROM meal' in statement]) == 1
+
+def test_batch_get_limits(client, default_user):
+    """Testa os limites de quantidade de IDs"""
+    with client:
+        assert batch_get(client, []).status_code == 400
+        assert batch_get(client, list(range(1, app.config['BATCH_GET_MAX_IDS'] + 2))).status_code == 400
+        assert client.get("/meals?ids=1,abc").status_code == 400
@@ -0,0 +1,114 @@
+import pytest
+import json
+import sys
+import os
+import threading
+import time
+from datetime import date, datetime
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app import app, db
+from models.meal import Meal
+from models.user import User
+from sqlalchemy.exc import IntegrityError
+from services.coalesce import meal_writes
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def new_meal(user_id, name):
+    """Monta uma refeição ainda não gravada"""
+    return Meal(name=name, description="Prato do dia", isInDiet=True, user_id=user_id,
+                datetime=datetime(2025, 10, 5, 12), local_date=date(2025, 10, 5))
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+@pytest.fixture
+def coalescing():
+    """Liga o agrupamento de commits"""
+    meal_writes.enabled = True
+    yield meal_writes
+    meal_writes.enabled = False
+    meal_writes.max_batch = app.config['WRITE_COALESCE_MAX_BATCH']
+    meal_writes.max_delay = app.config['WRITE_COALESCE_MAX_DELAY_MS'] / 1000
+
+# Tests
+def test_create_meal_with_coalescing(client, default_user, coalescing):
+    """Testa a criação de refeição pela API com o agrupamento ligado"""
+    with client:
+        response = client.post("/meals", data=json.dumps({
+            'name': "Almoço",
+            'description': "Arroz e feijão",
+            'datetime': "2025-10-05T12:00:00",
+            'isInDiet': True
+        }), content_type='application/json')
+        assert response.status_code == 201
+        meal = response.json['meal']
+        assert meal['id'] is not None
+        assert meal['version'] == 1
+        assert client.get(f"/meal/{meal['id']}").json['name'] == "Almoço"
+
+def test_concurrent_inserts_share_one_commit(client, default_user, coalescing, monkeypatch):
+    """Testa que inserções simultâneas são gravadas em um único commit"""
+    with client:
+        user_id = User.query.filter_by(username='testuser').first().id
+        workers = 5
+        coalescing.max_batch = workers
+        # o lote fecha ao ficar cheio, bem antes do limite de espera
+        coalescing.max_delay = 5
+
+        commits = []
+        original = coalescing._commit
+        monkeypatch.setattr(coalescing, '_commit', lambda batch: commits.append(len(batch.items)) or original(batch))
+
+        results = [None] * workers
+        barrier = threading.Barrier(workers)
+
+        def worker(index):
+            with app.app_context():
+                barrier.wait()
+                results[index] = coalescing.insert(new_meal(user_id, f"Refeição {index}"))
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert time.perf_counter() - started < 5
+        assert commits == [workers]
+        assert sorted(item['name'] for item in results) == [f"Refeição {index}" for index in range(workers)]
+        assert len({item['id'] for item in results}) == workers
+        assert Meal.query.count() == workers
+
+def test_failed_batch_commit_raises(client, default_user, coalescing):
+    """Testa que a falha no commit do lote chega a quem pediu a gravação"""
+    with client:
+        coalescing.max_delay = 0
+        user_id = User.query.filter_by(username='testuser').first().id
+        with pytest.raises(IntegrityError):
+            coalescing.insert(Meal(name=None, description="Sem nome", isInDiet=True, user_id=user_id))
+        assert Meal.query.count() == 0
@@ -9,21 +9,6 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 from app import app, db
 from models.meal import Meal
 
-@pytest.fixture
-def client():
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-
-    ctx = app.app_context()
-    ctx.push()
-    db.create_all()
-
-    yield app.test_client()
-
-    db.session.remove()
-    db.drop_all()
-    ctx.pop()
-
 def test_create_meal(client):
     """
     Testa a criação de uma refeição.
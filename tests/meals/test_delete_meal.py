@@ -30,21 +30,6 @@ def logout_user(client):
     client.get('/logout')
 
 # Fixtures
-@pytest.fixture
-def client():
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-
-    ctx = app.app_context()
-    ctx.push()
-    db.create_all()
-
-    yield app.test_client()
-
-    db.session.remove()
-    db.drop_all()
-    ctx.pop()
-
 @pytest.fixture
 def default_user(client):
     """Cria e loga um usuário padrão"""
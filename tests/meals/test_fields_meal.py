@@ -0,0 +1,132 @@
+import pytest
+import json
+import sys
+import os
+import re
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from sqlalchemy import event
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, name="Almoço"):
+    """Cria uma refeição via API e retorna seu ID"""
+    return client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Arroz e feijão",
+        'datetime': "2025-10-05T12:00:00",
+        'isInDiet': True
+    }), content_type='application/json').json['meal']['id']
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_list_meals_with_fields(client, default_user):
+    """Testa a listagem só com os campos pedidos"""
+    with client:
+        meal_id = create_meal(client)
+
+        response = client.get("/meals?fields=name,isInDiet")
+        assert response.status_code == 200
+        assert response.json == [{'id': meal_id, 'name': "Almoço", 'isInDiet': True}]
+
+def test_list_meals_fields_are_selected_in_sql(client, default_user):
+    """Testa que só as colunas pedidas são lidas do banco"""
+    with client:
+        create_meal(client)
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db.session.connection()
+        event.listen(connection, 'before_cursor_execute', record)
+        try:
+            client.get("/meals?fields=name")
+        finally:
+            event.remove(connection, 'before_cursor_execute', record)
+
+        [select] = [statement for statement in statements if re.search(r"FROM meal\b(?!_)", statement)]
+        columns = select.split('FROM')[0]
+        assert 'meal.name' in columns
+        assert 'meal.description' not in columns
+
+def test_list_meals_without_fields_is_unchanged(client, default_user):
+    """Testa que sem fields a resposta continua completa"""
+    with client:
+        create_meal(client)
+
+        [meal] = client.get("/meals").json
+        assert set(meal) == {'id', 'name', 'description', 'datetime', 'local_date', 'isInDiet',
+                             'calories', 'protein', 'carbs', 'fat', 'user_id', 'version'}
+
+def test_get_meal_and_batch_get_with_fields(client, default_user):
+    """Testa fields na busca por ID e na busca em lote"""
+    with client:
+        meal_id = create_meal(client)
+
+        assert client.get(f"/meal/{meal_id}?fields=datetime").json == {'id': meal_id, 'datetime': "2025-10-05T12:00:00"}
+
+        response = client.post("/meals/batch-get?fields=name", data=json.dumps({'ids': [meal_id]}),
+                               content_type='application/json')
+        assert response.json['meals'] == [{'id': meal_id, 'name': "Almoço"}]
+
+def test_unknown_field(client, default_user):
+    """Testa fields com um campo inexistente"""
+    with client:
+        response = client.get("/meals?fields=name,password")
+        assert response.status_code == 400
+        assert response.json['error'] == "Unknown field(s): password"
+
+def test_list_meals_as_msgpack(client, default_user):
+    """Testa a resposta em MessagePack"""
+    msgpack = pytest.importorskip('msgpack')
+    with client:
+        meal_id = create_meal(client)
+
+        response = client.get("/meals?fields=name", headers={'Accept': 'application/msgpack'})
+        assert response.mimetype == 'application/msgpack'
+        assert 'Accept' in response.vary
+        assert msgpack.unpackb(response.data) == [{'id': meal_id, 'name': "Almoço"}]
+
+def test_get_meal_as_cbor(client, default_user):
+    """Testa a resposta em CBOR"""
+    cbor2 = pytest.importorskip('cbor2')
+    with client:
+        meal_id = create_meal(client)
+
+        response = client.get(f"/meal/{meal_id}", headers={'Accept': 'application/cbor'})
+        assert response.mimetype == 'application/cbor'
+        assert cbor2.loads(response.data)['name'] == "Almoço"
+
+def test_unsupported_accept_falls_back_to_json(client, default_user):
+    """Testa que um Accept desconhecido recebe JSON"""
+    with client:
+        create_meal(client)
+
+        response = client.get("/meals", headers={'Accept': 'application/xml'})
+        assert response.mimetype == 'application/json'
@@ -0,0 +1,98 @@
+import pytest
+import json
+import sys
+import os
+from datetime import timedelta
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from models.meal import Meal
+from models.idempotency_key import IdempotencyKey
+from services.idempotency import sweep_expired
+from services.jobs import utcnow
+
+MEAL = {
+    'name': "Almoço",
+    'description': "Arroz e feijão",
+    'datetime': "2025-10-05T12:00:00",
+    'isInDiet': True
+}
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def post_meal(client, meal, key):
+    """Cria uma refeição enviando a Idempotency-Key"""
+    return client.post("/meals", data=json.dumps(meal), content_type='application/json',
+                       headers={'Idempotency-Key': key})
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_retry_with_same_key_replays_response(client, default_user):
+    """Testa que a repetição com a mesma chave não cria outra refeição"""
+    with client:
+        first = post_meal(client, MEAL, 'retry-1')
+        second = post_meal(client, MEAL, 'retry-1')
+
+        assert first.status_code == 201
+        assert second.status_code == 201
+        assert second.headers['Idempotent-Replayed'] == 'true'
+        assert second.json == first.json
+        assert Meal.query.count() == 1
+
+def test_different_keys_create_different_meals(client, default_user):
+    """Testa que chaves diferentes criam refeições diferentes"""
+    with client:
+        post_meal(client, MEAL, 'key-1')
+        post_meal(client, MEAL, 'key-2')
+        assert Meal.query.count() == 2
+
+def test_key_reused_with_different_body(client, default_user):
+    """Testa o reuso da chave com outro corpo"""
+    with client:
+        post_meal(client, MEAL, 'key-1')
+        response = post_meal(client, dict(MEAL, name="Jantar"), 'key-1')
+        assert response.status_code == 422
+        assert Meal.query.count() == 1
+
+def test_expired_keys_are_swept_in_batches(client, default_user):
+    """Testa a remoção em lotes das chaves expiradas"""
+    with client:
+        for index in range(5):
+            post_meal(client, MEAL, f'key-{index}')
+        post_meal(client, MEAL, 'fresh')
+
+        IdempotencyKey.query.filter(IdempotencyKey.key != 'fresh').update(
+            {'expires_at': utcnow() - timedelta(seconds=1)}
+        )
+        db.session.commit()
+
+        assert sweep_expired(batch_size=2) == 5
+        assert [record.key for record in IdempotencyKey.query] == ['fresh']
+
+        # a chave expirada volta a ficar livre
+        post_meal(client, MEAL, 'key-0')
+        assert Meal.query.count() == 7
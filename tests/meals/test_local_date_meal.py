@@ -0,0 +1,125 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from services.jobs import job_queue
+
+# Helpers
+def create_user(client, username, password, timezone=None):
+    """Cria um usuário via API"""
+    body = {'username': username, 'password': password}
+    if timezone is not None:
+        body['timezone'] = timezone
+    return client.post('/users', data=json.dumps(body), content_type='application/json')
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, when, name="Jantar"):
+    """Cria uma refeição via API"""
+    return client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Sopa",
+        'datetime': when,
+        'isInDiet': True
+    }), content_type='application/json').json['meal']
+
+# Fixtures
+@pytest.fixture
+def sao_paulo_user(client):
+    """Cria e loga um usuário no fuso de São Paulo (UTC-3)"""
+    create_user(client, 'testuser', 'testpassword', 'America/Sao_Paulo')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_create_user_with_timezone(client):
+    """Testa a criação de usuário com fuso horário"""
+    response = create_user(client, 'user1', 'pass1', 'America/Sao_Paulo')
+    assert response.status_code == 201
+    assert response.json['user']['timezone'] == 'America/Sao_Paulo'
+
+    assert create_user(client, 'user2', 'pass2').json['user']['timezone'] == 'UTC'
+
+def test_create_user_with_unknown_timezone(client):
+    """Testa a criação de usuário com fuso horário inexistente"""
+    response = create_user(client, 'user1', 'pass1', 'Marte/Olympus')
+    assert response.status_code == 400
+    assert response.json['details'] == [{'field': 'timezone', 'message': "must be a valid timezone"}]
+
+def test_naive_datetime_is_local_time(client, sao_paulo_user):
+    """Testa que a data sem fuso é lida no fuso do usuário e gravada em UTC"""
+    with client:
+        meal = create_meal(client, "2025-10-05T22:30:00")
+        assert meal['datetime'] == "2025-10-06T01:30:00"
+        assert meal['local_date'] == "2025-10-05"
+
+def test_aware_datetime_is_converted(client, sao_paulo_user):
+    """Testa que a data com fuso é convertida para UTC"""
+    with client:
+        meal = create_meal(client, "2025-10-06T01:30:00+00:00")
+        assert meal['datetime'] == "2025-10-06T01:30:00"
+        assert meal['local_date'] == "2025-10-05"
+
+def test_list_meals_by_local_date(client, sao_paulo_user):
+    """Testa a listagem pelo dia local do usuário"""
+    with client:
+        create_meal(client, "2025-10-05T08:00:00", "Café")
+        create_meal(client, "2025-10-05T22:30:00", "Jantar")
+        create_meal(client, "2025-10-06T08:00:00", "Café de segunda")
+
+        response = client.get("/meals?date=2025-10-05")
+        assert response.status_code == 200
+        assert sorted(meal['name'] for meal in response.json) == ["Café", "Jantar"]
+
+def test_list_meals_today(client, sao_paulo_user):
+    """Testa a listagem das refeições de hoje"""
+    with client:
+        client.post("/meals", data=json.dumps({'name': "Agora", 'description': "Fruta", 'isInDiet': True}),
+                    content_type='application/json')
+
+        response = client.get("/meals?date=today")
+        assert [meal['name'] for meal in response.json] == ["Agora"]
+
+def test_list_meals_invalid_date(client, sao_paulo_user):
+    """Testa a listagem com dia inválido"""
+    with client:
+        response = client.get("/meals?date=ontem")
+        assert response.status_code == 400
+
+def test_timezone_change_keeps_recorded_days(client, sao_paulo_user):
+    """Testa que mudar o fuso não muda o dia das refeições já gravadas"""
+    with client:
+        create_meal(client, "2025-10-05T22:30:00")
+
+        response = client.patch("/users/me", data=json.dumps({'timezone': 'Asia/Tokyo'}),
+                                content_type='application/json')
+        assert response.status_code == 200
+        assert response.json['user']['timezone'] == 'Asia/Tokyo'
+
+        meal = create_meal(client, "2025-10-05T22:30:00", "Jantar em Tóquio")
+        assert meal['datetime'] == "2025-10-05T13:30:00"
+
+        names = sorted(meal['name'] for meal in client.get("/meals?date=2025-10-05").json)
+        assert names == ["Jantar", "Jantar em Tóquio"]
+
+def test_import_uses_user_timezone(client, sao_paulo_user):
+    """Testa que a importação usa o fuso do usuário"""
+    with client:
+        client.post("/meals/import", data=json.dumps({'meals': [
+            {'name': "Jantar", 'description': "Sopa", 'datetime': "2025-10-05T22:30:00", 'isInDiet': True}
+        ]}), content_type='application/json')
+        job_queue.run_pending()
+
+        [meal] = client.get("/meals?date=2025-10-05").json
+        assert meal['datetime'] == "2025-10-06T01:30:00"
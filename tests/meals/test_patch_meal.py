@@ -0,0 +1,147 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from models.meal import Meal
+from sqlalchemy import event
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client):
+    """Cria uma refeição via API"""
+    return client.post("/meals", data=json.dumps({
+        'name': "Almoço",
+        'description': "Arroz e feijão",
+        'datetime': "2025-10-05T12:00:00",
+        'isInDiet': True
+    }), content_type='application/json').json['meal']
+
+def patch_meal(client, meal_id, **fields):
+    """Atualiza parte de uma refeição via API"""
+    return client.patch(f"/meal/{meal_id}", data=json.dumps(fields), content_type='application/json')
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_patch_meal_success(client, default_user):
+    """Testa a atualização parcial com a versão atual"""
+    with client:
+        meal = create_meal(client)
+        assert meal['version'] == 1
+
+        response = patch_meal(client, meal['id'], version=1, isInDiet=False)
+        assert response.status_code == 200
+        assert response.json['meal']['isInDiet'] is False
+        assert response.json['meal']['name'] == "Almoço"
+        assert response.json['meal']['version'] == 2
+
+        assert client.get(f"/meal/{meal['id']}").json['version'] == 2
+
+def test_patch_meal_is_a_single_statement(client, default_user):
+    """Testa que a atualização parcial não faz SELECT da refeição"""
+    with client:
+        meal = create_meal(client)
+        client.get(f"/meal/{meal['id']}")
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        connection = db.session.connection()
+        event.listen(connection, 'before_cursor_execute', record)
+        try:
+            response = patch_meal(client, meal['id'], version=1, isInDiet=False)
+        finally:
+            event.remove(connection, 'before_cursor_execute', record)
+
+        assert response.status_code == 200
+        statements = [" ".join(statement.split()).upper() for statement in statements]
+        assert not [statement for statement in statements if statement.startswith('SELECT') and 'FROM MEAL ' in statement]
+        assert len([statement for statement in statements if statement.startswith('UPDATE MEAL ')]) == 1
+
+def test_patch_meal_stale_version(client, default_user):
+    """Testa que uma versão desatualizada retorna conflito sem alterar a refeição"""
+    with client:
+        meal = create_meal(client)
+        patch_meal(client, meal['id'], version=1, name="Almoço de domingo")
+
+        response = patch_meal(client, meal['id'], version=1, name="Almoço leve")
+        assert response.status_code == 409
+        assert response.json['meal']['name'] == "Almoço de domingo"
+        assert response.json['meal']['version'] == 2
+
+def test_put_meal_bumps_version(client, default_user):
+    """Testa que a atualização completa também invalida versões antigas"""
+    with client:
+        meal = create_meal(client)
+        client.put(f"/meal/{meal['id']}", data=json.dumps({'isInDiet': False}), content_type='application/json')
+
+        response = patch_meal(client, meal['id'], version=1, isInDiet=True)
+        assert response.status_code == 409
+
+def test_patch_meal_updates_search_and_suggestions(client, default_user):
+    """Testa que a busca e as sugestões refletem o novo nome"""
+    with client:
+        meal = create_meal(client)
+        client.get("/meals/suggest?prefix=al")
+
+        patch_meal(client, meal['id'], version=1, name="Feijoada")
+
+        assert client.get("/meals/suggest?prefix=al").json['suggestions'] == []
+        assert client.get("/meals/suggest?prefix=fe").json['suggestions'] == [{'name': "Feijoada", 'count': 1}]
+        assert [item['id'] for item in client.get("/meals/search?q=feijoada").json['meals']] == [meal['id']]
+
+def test_patch_meal_not_found(client, default_user):
+    """Testa a atualização parcial de uma refeição inexistente"""
+    with client:
+        response = patch_meal(client, 9999, version=1, name="Jantar")
+        assert response.status_code == 404
+
+def test_patch_meal_of_another_user(client):
+    """Testa a atualização parcial da refeição de outro usuário"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+
+        login_user(client, 'user1', 'pass1')
+        meal = create_meal(client)
+        client.get('/logout')
+
+        login_user(client, 'user2', 'pass2')
+        response = patch_meal(client, meal['id'], version=1, name="Jantar")
+        assert response.status_code == 403
+        assert db.session.get(Meal, meal['id']).name == "Almoço"
+
+def test_patch_meal_without_version(client, default_user):
+    """Testa a atualização parcial sem informar a versão"""
+    with client:
+        meal = create_meal(client)
+        response = patch_meal(client, meal['id'], name="Jantar")
+        assert response.status_code == 400
+        assert response.json['error'] == "Missing required fields"
@@ -0,0 +1,116 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def logout_user(client):
+    """Faz logout de um usuário via API"""
+    client.get('/logout')
+
+def create_meal(client, name, description):
+    """Cria uma refeição via API e retorna seu ID"""
+    response = client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': description,
+        'datetime': "2025-10-05T12:00:00",
+        'isInDiet': True
+    }), content_type='application/json')
+    return response.json['meal']['id']
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_search_meals_ranks_best_match_first(client, default_user):
+    """Testa que a busca ordena as refeições por relevância"""
+    with client:
+        create_meal(client, "Almoço", "Arroz e feijão")
+        salad = create_meal(client, "Salada", "Salada de alface com frango")
+        create_meal(client, "Jantar", "Frango grelhado")
+
+        response = client.get("/meals/search?q=salada frango")
+        assert response.status_code == 200
+        ids = [meal['id'] for meal in response.json['meals']]
+        assert ids[0] == salad
+        assert len(ids) == 2
+
+def test_search_meals_reflects_updates_and_deletes(client, default_user):
+    """Testa que o índice acompanha atualizações e exclusões"""
+    with client:
+        meal_id = create_meal(client, "Salada", "Alface")
+
+        client.put(f"/meal/{meal_id}", data=json.dumps({
+            'name': "Sopa",
+            'description': "Legumes",
+            'isInDiet': True
+        }), content_type='application/json')
+        assert client.get("/meals/search?q=salada").json['meals'] == []
+        assert client.get("/meals/search?q=sopa").json['meals'][0]['id'] == meal_id
+
+        client.delete(f"/meal/{meal_id}")
+        assert client.get("/meals/search?q=sopa").json['meals'] == []
+
+def test_search_meals_keyset_pagination(client, default_user):
+    """Testa a paginação por cursor da busca"""
+    with client:
+        created = {create_meal(client, f"Salada {index}", "Salada verde") for index in range(5)}
+
+        seen = []
+        cursor = None
+        while True:
+            url = "/meals/search?q=salada&limit=2" + (f"&cursor={cursor}" if cursor else "")
+            response = client.get(url)
+            seen.extend(meal['id'] for meal in response.json['meals'])
+            cursor = response.json['next_cursor']
+            if cursor is None:
+                break
+
+        assert len(seen) == 5
+        assert set(seen) == created
+
+def test_search_meals_only_returns_own_meals(client):
+    """Testa que a busca não retorna refeições de outros usuários"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+
+        login_user(client, 'user1', 'pass1')
+        create_meal(client, "Salada", "Alface")
+        logout_user(client)
+
+        login_user(client, 'user2', 'pass2')
+        response = client.get("/meals/search?q=salada")
+        assert response.json['meals'] == []
+
+def test_search_meals_invalid_parameters(client, default_user):
+    """Testa a busca sem termos ou com cursor inválido"""
+    with client:
+        assert client.get("/meals/search").status_code == 400
+        assert client.get("/meals/search?q=salada&cursor=invalido").status_code == 400
@@ -0,0 +1,127 @@
+import pytest
+import json
+import sys
+import os
+from datetime import timedelta
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from sqlalchemy import select, update
+
+from app import app, db
+from models.meal import Meal
+from services.jobs import utcnow
+from services.purge import purge_meals
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def logout_user(client):
+    """Faz logout de um usuário via API"""
+    client.get('/logout')
+
+def create_meal(client, name="Almoço"):
+    """Cria uma refeição e retorna o id"""
+    response = client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Arroz e feijão",
+        'datetime': "2025-10-05T12:00:00",
+        'isInDiet': True
+    }), content_type='application/json')
+    return response.json['meal']['id']
+
+def stored_deleted_at(meal_id):
+    """Lê deleted_at direto da tabela, inclusive de refeições deletadas"""
+    return db.session.execute(
+        select(Meal.id, Meal.deleted_at).where(Meal.id == meal_id).execution_options(include_deleted=True)
+    ).first()
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_deleted_meal_is_hidden_from_reads(client, default_user):
+    """Testa que a refeição deletada continua na tabela, mas some de todas as leituras"""
+    with client:
+        kept = create_meal(client, "Almoço")
+        deleted = create_meal(client, "Jantar")
+        assert client.delete(f"/meal/{deleted}").status_code == 200
+
+        row = stored_deleted_at(deleted)
+        assert row is not None and row.deleted_at is not None
+
+        assert [meal['id'] for meal in client.get("/meals?date=2025-10-05").json] == [kept]
+        assert client.get(f"/meals?ids={kept},{deleted}").json['missing'] == [deleted]
+        assert client.get("/meals/search?q=jantar").json['meals'] == []
+        assert client.get("/meals/suggest?prefix=jan").json['suggestions'] == []
+        assert client.put(f"/meal/{deleted}", data=json.dumps({'name': "Ceia"}), content_type='application/json').status_code == 404
+        assert client.patch(f"/meal/{deleted}", data=json.dumps({'name': "Ceia", 'version': 1}), content_type='application/json').status_code == 404
+        assert client.delete(f"/meal/{deleted}").status_code == 404
+
+def test_restore_meal(client, default_user):
+    """Testa que a refeição deletada pode ser restaurada antes do expurgo"""
+    with client:
+        meal_id = create_meal(client, "Jantar")
+        client.delete(f"/meal/{meal_id}")
+
+        response = client.post(f"/meal/{meal_id}/restore")
+        assert response.status_code == 200
+        assert response.json['meal']['name'] == "Jantar"
+        assert client.get(f"/meal/{meal_id}").status_code == 200
+        assert [meal['id'] for meal in client.get("/meals/search?q=jantar").json['meals']] == [meal_id]
+
+def test_restore_meal_of_another_user(client):
+    """Testa que um usuário não restaura a refeição de outro"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+        login_user(client, 'user1', 'pass1')
+        meal_id = create_meal(client)
+        client.delete(f"/meal/{meal_id}")
+        logout_user(client)
+
+        login_user(client, 'user2', 'pass2')
+        response = client.post(f"/meal/{meal_id}/restore")
+        assert response.status_code == 403
+        assert client.post("/meal/999/restore").status_code == 404
+
+def test_purge_removes_old_deleted_meals_in_batches(client, default_user):
+    """Testa que o expurgo apaga, em lotes, só as refeições deletadas há mais tempo que a janela"""
+    with client:
+        old = [create_meal(client) for _ in range(3)]
+        recent = create_meal(client)
+        live = create_meal(client)
+        for meal_id in old + [recent]:
+            client.delete(f"/meal/{meal_id}")
+        db.session.execute(
+            update(Meal).where(Meal.id.in_(old))
+            .values(deleted_at=utcnow() - timedelta(days=app.config['MEAL_PURGE_AFTER_DAYS'] + 1))
+        )
+        db.session.commit()
+
+        assert purge_meals(batch_size=2, pause_ms=0) == 3
+
+        assert all(stored_deleted_at(meal_id) is None for meal_id in old)
+        assert stored_deleted_at(recent) is not None
+        assert client.post(f"/meal/{recent}/restore").status_code == 200
+        assert client.get(f"/meal/{live}").status_code == 200
@@ -0,0 +1,171 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from services.events import meal_events
+from services.jobs import job_queue
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, name="Almoço"):
+    """Cria uma refeição via API"""
+    return client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Arroz e feijão",
+        'isInDiet': True
+    }), content_type='application/json').json['meal']
+
+def parse(chunk):
+    """Converte um bloco SSE em dicionário de campos"""
+    chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+    fields = {}
+    for line in chunk.strip().splitlines():
+        name, _, value = line.partition(': ')
+        fields[name] = value
+    return fields
+
+def open_stream(client, **headers):
+    """Abre o fluxo de eventos e descarta o bloco inicial de retry"""
+    response = client.get('/meals/stream', headers=headers)
+    chunks = iter(response.response)
+    assert parse(next(chunks)) == {'retry': '3000'}
+    return response, chunks
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+@pytest.fixture
+def short_streams():
+    """Reduz heartbeat e duração dos fluxos para os testes não bloquearem"""
+    heartbeat, timeout = meal_events.heartbeat, meal_events.stream_timeout
+    meal_events.heartbeat, meal_events.stream_timeout = 0.05, 1
+    yield
+    meal_events.heartbeat, meal_events.stream_timeout = heartbeat, timeout
+
+# Tests
+def test_stream_pushes_meal_changes(client, default_user, short_streams):
+    """Testa que criação, atualização e remoção chegam ao fluxo"""
+    with client:
+        response, chunks = open_stream(client)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+
+        meal = create_meal(client)
+        client.patch(f"/meal/{meal['id']}", data=json.dumps({'version': 1, 'isInDiet': False}),
+                     content_type='application/json')
+        client.delete(f"/meal/{meal['id']}")
+
+        events = [parse(next(chunks)) for _ in range(3)]
+        response.close()
+
+        assert [event['event'] for event in events] == ['meal.created', 'meal.updated', 'meal.deleted']
+        assert json.loads(events[0]['data'])['name'] == "Almoço"
+        assert json.loads(events[1]['data'])['isInDiet'] is False
+        assert json.loads(events[2]['data']) == {'id': meal['id']}
+
+def test_stream_pushes_imported_meals(client, default_user, short_streams):
+    """Testa que as refeições criadas pela importação em segundo plano chegam ao fluxo"""
+    with client:
+        response, chunks = open_stream(client)
+        client.post("/meals/import", data=json.dumps({'meals': [
+            {'name': "Café", 'description': "Pão", 'datetime': "2025-10-05T08:00:00", 'isInDiet': True},
+            {'name': "Jantar", 'description': "Sopa", 'datetime': "2025-10-05T20:00:00", 'isInDiet': True}
+        ]}), content_type='application/json')
+        assert job_queue.run_pending() == 1
+
+        events = [parse(next(chunks)) for _ in range(2)]
+        response.close()
+        assert [event['event'] for event in events] == ['meal.created', 'meal.created']
+        assert [json.loads(event['data'])['name'] for event in events] == ["Café", "Jantar"]
+
+def test_stream_sends_heartbeat(client, default_user, short_streams):
+    """Testa o comentário de heartbeat quando não há eventos"""
+    with client:
+        response, chunks = open_stream(client)
+        assert next(chunks) == b": heartbeat\n\n"
+        response.close()
+
+def test_stream_resumes_from_last_event_id(client, default_user, short_streams):
+    """Testa que a reconexão reenvia os eventos perdidos"""
+    with client:
+        response, chunks = open_stream(client)
+        create_meal(client, "Café")
+        first = parse(next(chunks))
+        response.close()
+
+        create_meal(client, "Almoço")
+        create_meal(client, "Jantar")
+
+        response, chunks = open_stream(client, **{'Last-Event-ID': first['id']})
+        names = [json.loads(parse(next(chunks))['data'])['name'] for _ in range(2)]
+        response.close()
+        assert names == ["Almoço", "Jantar"]
+
+def test_stream_unknown_last_event_id_resets(client, default_user, short_streams):
+    """Testa o evento reset quando o último evento já saiu do histórico"""
+    with client:
+        meal = create_meal(client)
+        newest = meal_events._history[meal['user_id']][-1]['id']
+
+        response, chunks = open_stream(client, **{'Last-Event-ID': "desconhecido"})
+        reset = parse(next(chunks))
+        response.close()
+        assert reset['event'] == 'reset'
+        assert reset['id'] == newest
+
+def test_stream_slow_client_is_closed(client, default_user, short_streams):
+    """Testa que um cliente que não consome os eventos não acumula memória"""
+    meal_events.queue_size = 2
+    try:
+        with client:
+            response, chunks = open_stream(client)
+            for name in ["Café", "Almoço", "Lanche"]:
+                create_meal(client, name)
+
+            assert list(chunks) == []
+            assert meal_events._subscribers == {}
+    finally:
+        meal_events.queue_size = 100
+
+def test_stream_is_private(client, short_streams):
+    """Testa que um usuário não recebe eventos de outro"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+
+        login_user(client, 'user2', 'pass2')
+        response, chunks = open_stream(client)
+
+        meal_events.publish(999, 'meal.created', {'name': "Outro"})
+        assert next(chunks) == b": heartbeat\n\n"
+        response.close()
+
+def test_stream_requires_login(client):
+    """Testa o fluxo sem autenticação"""
+    response = client.get('/meals/stream')
+    assert response.status_code == 401
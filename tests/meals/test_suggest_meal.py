@@ -0,0 +1,100 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from services.suggest import NameIndex, meal_names
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, name):
+    """Cria uma refeição via API e retorna seu ID"""
+    response = client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Descrição",
+        'datetime': "2025-10-05T12:00:00",
+        'isInDiet': True
+    }), content_type='application/json')
+    return response.json['meal']['id']
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_name_index_orders_by_frequency():
+    """Testa que as sugestões são ordenadas pela frequência de uso"""
+    index = NameIndex({"Café da manhã": 1, "Café com leite": 3, "Almoço": 5})
+
+    assert index.suggest("caf") == [
+        {"name": "Café com leite", "count": 3},
+        {"name": "Café da manhã", "count": 1}
+    ]
+
+    index.remove("Café com leite")
+    index.remove("Café com leite")
+    index.remove("Café com leite")
+    index.add("Café da manhã")
+    assert index.suggest("caf") == [{"name": "Café da manhã", "count": 2}]
+
+def test_suggest_meals_built_lazily_from_database(client, default_user):
+    """Testa que o índice é construído a partir das refeições existentes"""
+    with client:
+        create_meal(client, "Café da manhã")
+        create_meal(client, "Café da manhã")
+        create_meal(client, "Almoço")
+
+        response = client.get("/meals/suggest?prefix=ca")
+        assert response.status_code == 200
+        assert response.json['suggestions'] == [{"name": "Café da manhã", "count": 2}]
+
+def test_suggest_meals_updated_by_writes(client, default_user):
+    """Testa que criação, atualização e exclusão atualizam o índice"""
+    with client:
+        meal_id = create_meal(client, "Café da manhã")
+        client.get("/meals/suggest?prefix=ca")
+
+        create_meal(client, "Café preto")
+        client.put(f"/meal/{meal_id}", data=json.dumps({
+            'name': "Cappuccino",
+            'description': "Descrição",
+            'isInDiet': True
+        }), content_type='application/json')
+
+        names = [item['name'] for item in client.get("/meals/suggest?prefix=ca").json['suggestions']]
+        assert names == ["Café preto", "Cappuccino"]
+
+        client.delete(f"/meal/{meal_id}")
+        names = [item['name'] for item in client.get("/meals/suggest?prefix=ca").json['suggestions']]
+        assert names == ["Café preto"]
+
+def test_suggest_meals_invalid_parameters(client, default_user):
+    """Testa sugestões sem prefixo ou com limite inválido"""
+    with client:
+        assert client.get("/meals/suggest").status_code == 400
+
+        response = client.get("/meals/suggest?prefix=ca&limit=abc")
+        assert response.status_code == 400
@@ -6,7 +6,11 @@ import os
 # Adiciona a raiz do projeto ao sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
+from sqlalchemy import event, update
+
 from app import app, db
+from database import RoutingSession
+from models.meal import Meal
 
 # Helpers
 def create_user(client, username, password):
@@ -30,21 +34,6 @@ def logout_user(client):
     client.get('/logout')
 
 # Fixtures
-@pytest.fixture
-def client():
-    app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-
-    ctx = app.app_context()
-    ctx.push()
-    db.create_all()
-
-    yield app.test_client()
-
-    db.session.remove()
-    db.drop_all()
-    ctx.pop()
-
 @pytest.fixture
 def default_user(client):
     """Cria e loga um usuário padrão"""
@@ -136,3 +125,31 @@ def test_update_meal_not_found(client):
         assert response.status_code == 404
         assert response.json['error'] == "Meal not found"
 
+
+def test_update_meal_concurrent_patch(client, default_user):
+    """Testa que o PUT não desfaz um PATCH feito entre a leitura e a gravação da refeição"""
+    with client:
+        meal_id = client.post("/meals", data=json.dumps({
+            'name': "Almoço",
+            'description': "Arroz e feijão",
+            'datetime': "2025-10-05T12:00:00",
+            'isInDiet': True
+        }), content_type='application/json').json['meal']['id']
+
+        # o PATCH concorrente grava antes do flush do PUT
+        def concurrent_patch(session, flush_context, instances):
+            session.execute(
+                update(Meal).where(Meal.id == meal_id).values(name="Jantar", version=Meal.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+        event.listen(RoutingSession, 'before_flush', concurrent_patch, once=True)
+
+        response = client.put(f"/meal/{meal_id}", data=json.dumps({'description': "Salada"}), content_type='application/json')
+        assert response.status_code == 409
+        assert response.json['error'] == "Meal was modified by another request"
+
+        # no teste o PATCH estava na mesma transação e foi desfeito junto; a nova tentativa grava
+        response = client.put(f"/meal/{meal_id}", data=json.dumps({'description': "Salada"}), content_type='application/json')
+        assert response.status_code == 200
+        assert response.json['meal']['description'] == "Salada"
+        assert response.json['meal']['version'] == 2
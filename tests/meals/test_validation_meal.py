@@ -0,0 +1,122 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from app import app, db
+from models.meal import Meal
+from services.validation import body_schema, compile_schema
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, **fields):
+    """Cria uma refeição via API"""
+    meal = {'name': "Almoço", 'description': "Arroz e feijão", 'datetime': "2025-10-05T12:00:00", 'isInDiet': True}
+    meal.update(fields)
+    return client.post("/meals", data=json.dumps(meal), content_type='application/json')
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_create_meal_without_json_body(client, default_user):
+    """Testa a criação de refeição com corpo que não é JSON"""
+    with client:
+        response = client.post("/meals", data="name=Almoço", content_type='text/plain')
+        assert response.status_code == 400
+        assert response.json['error'] == "Request body must be JSON"
+        assert Meal.query.count() == 0
+
+def test_create_meal_invalid_datetime(client, default_user):
+    """Testa a criação de refeição com data inválida"""
+    with client:
+        response = create_meal(client, datetime="ontem")
+        assert response.status_code == 400
+        assert response.json['error'] == "Invalid request body"
+        assert response.json['details'] == [{'field': 'datetime', 'message': "must be a valid date-time"}]
+
+def test_create_meal_reports_every_problem(client, default_user):
+    """Testa que todos os erros do corpo são listados de uma vez"""
+    with client:
+        response = client.post("/meals", data=json.dumps({
+            'name': "x" * 101,
+            'isInDiet': "sim"
+        }), content_type='application/json')
+        assert response.status_code == 400
+        assert response.json['error'] == "Missing required fields"
+        assert {(detail['field'], detail['message']) for detail in response.json['details']} == {
+            ('description', "is required"),
+            ('name', "must have at most 100 characters"),
+            ('isInDiet', "must be of type boolean")
+        }
+
+def test_create_meal_null_datetime_uses_default(client, default_user):
+    """Testa que datetime nulo equivale a não enviar o campo"""
+    with client:
+        response = create_meal(client, datetime=None)
+        assert response.status_code == 201
+
+def test_update_meal_keeps_fields_not_sent(client, default_user):
+    """Testa que a atualização altera só os campos enviados"""
+    with client:
+        meal_id = create_meal(client).json['meal']['id']
+
+        response = client.put(f"/meal/{meal_id}", data=json.dumps({'isInDiet': False}),
+                              content_type='application/json')
+        assert response.status_code == 200
+        assert response.json['meal']['name'] == "Almoço"
+        assert response.json['meal']['description'] == "Arroz e feijão"
+        assert response.json['meal']['isInDiet'] is False
+
+def test_update_meal_rejects_null_name(client, default_user):
+    """Testa a atualização com nome nulo"""
+    with client:
+        meal_id = create_meal(client).json['meal']['id']
+
+        response = client.put(f"/meal/{meal_id}", data=json.dumps({'name': None}),
+                              content_type='application/json')
+        assert response.status_code == 400
+        assert response.json['details'] == [{'field': 'name', 'message': "may not be null"}]
+        assert db.session.get(Meal, meal_id).name == "Almoço"
+
+def test_import_meals_reports_item_path(client, default_user):
+    """Testa que os erros de itens da importação indicam a posição"""
+    with client:
+        response = client.post("/meals/import", data=json.dumps({'meals': [
+            {'name': "Jantar", 'description': "Sopa", 'isInDiet': True},
+            {'name': "", 'description': "Bolo", 'isInDiet': True}
+        ]}), content_type='application/json')
+        assert response.status_code == 400
+        assert response.json['details'] == [{'field': 'meals[1].name', 'message': "must have at least 1 character(s)"}]
+
+def test_schemas_are_read_from_docstrings():
+    """Testa que o schema validado é o mesmo documentado no Swagger"""
+    schema = body_schema(app.view_functions['create_meal'].__doc__)
+    assert schema['required'] == ['name', 'description', 'isInDiet']
+
+    errors = []
+    compile_schema(schema)({'name': "Almoço", 'description': "Arroz", 'isInDiet': True}, '', errors)
+    assert errors == []
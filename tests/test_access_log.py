@@ -0,0 +1,116 @@
+import pytest
+import io
+import json
+import logging
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+from services.access_log import access_log
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+@pytest.fixture
+def log_output():
+    """Liga o log de acesso gravando em memória; as linhas ficam disponíveis após access_log.stop()"""
+    output = io.StringIO()
+    access_log.start(logging.StreamHandler(output))
+    yield output
+    access_log.stop()
+    access_log.queue_size = app.config['ACCESS_LOG_QUEUE_SIZE']
+
+def entries(output):
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+# Tests
+def test_access_log_entry(client, default_user, log_output):
+    """Testa os campos gravados para uma requisição autenticada"""
+    with client:
+        client.post("/meals", data=json.dumps({
+            'name': "Almoço",
+            'description': "Arroz e feijão",
+            'datetime': "2025-10-05T12:00:00",
+            'isInDiet': True
+        }), content_type='application/json')
+        response = client.get("/meals?date=2025-10-05")
+        access_log.stop()
+
+        entry = entries(log_output)[-1]
+        assert entry['method'] == 'GET'
+        assert entry['route'] == '/meals'
+        assert entry['path'] == '/meals'
+        assert entry['status'] == 200
+        assert entry['user_id'] == str(response.json[0]['user_id'])
+        assert entry['bytes'] == len(response.data)
+        assert entry['db_queries'] >= 1
+        assert 0 <= entry['db_ms'] <= entry['latency_ms']
+        assert 'dropped' not in entry
+
+def test_access_log_anonymous_request(client, log_output):
+    """Testa o registro de uma requisição sem usuário logado"""
+    with client:
+        client.get("/meals")
+        access_log.stop()
+
+        entry = entries(log_output)[-1]
+        assert (entry['status'], entry['user_id'], entry['route']) == (401, None, '/meals')
+
+def test_access_log_failed_statement_leaves_no_timer(client, default_user, log_output):
+    """Testa que o INSERT que falha na repetição de uma chave idempotente não deixa lixo na conexão"""
+    meal = {'name': "Almoço", 'description': "Arroz e feijão", 'datetime': "2025-10-05T12:00:00", 'isInDiet': True}
+    with client:
+        for _ in range(3):
+            response = client.post("/meals", data=json.dumps(meal), content_type='application/json',
+                                   headers={'Idempotency-Key': 'replay'})
+        assert response.headers['Idempotent-Replayed'] == 'true'
+        access_log.stop()
+
+        assert db.session.connection().info.get('access_started') == []
+        assert entries(log_output)[-1]['db_queries'] >= 1
+
+def test_access_log_drops_when_queue_is_full(client):
+    """Testa que, com a fila cheia, os registros são descartados e contados em vez de bloquear"""
+    output = io.StringIO()
+    access_log.queue_size = 1
+    try:
+        access_log.start(logging.StreamHandler(output))
+        # segura o listener para a fila não esvaziar
+        access_log.listener.handlers[0].acquire()
+        try:
+            with client:
+                for _ in range(5):
+                    client.get("/meals")
+            assert access_log.dropped >= 3
+        finally:
+            access_log.listener.handlers[0].release()
+        access_log.stop()
+    finally:
+        access_log.queue_size = app.config['ACCESS_LOG_QUEUE_SIZE']
+
+    assert entries(output)[-1]['dropped'] >= 3
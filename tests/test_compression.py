@@ -0,0 +1,84 @@
+import pytest
+import gzip
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+from services.compression import compress, parse_accept_encoding
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meals(client, count):
+    """Cria várias refeições via API"""
+    for index in range(count):
+        client.post("/meals", data=json.dumps({
+            'name': f"Almoço {index}",
+            'description': "Peito de frango grelhado com legumes e arroz integral",
+            'datetime': "2025-10-05T12:00:00",
+            'isInDiet': True
+        }), content_type='application/json')
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+# Tests
+def test_parse_accept_encoding():
+    """Testa a leitura do cabeçalho Accept-Encoding"""
+    assert parse_accept_encoding("gzip, br;q=0.5, identity;q=0") == {'gzip': 1.0, 'br': 0.5, 'identity': 0.0}
+    assert compress.choose_encoding("gzip;q=0") is None
+    assert compress.choose_encoding("*") is not None
+    assert compress.choose_encoding(None) is None
+
+def test_list_meals_is_gzipped(client, default_user):
+    """Testa que listas grandes são comprimidas com gzip"""
+    with client:
+        create_meals(client, 20)
+
+        plain = client.get("/meals")
+        response = client.get("/meals", headers={'Accept-Encoding': 'gzip'})
+
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert int(response.headers['Content-Length']) < len(plain.data)
+        assert json.loads(gzip.decompress(response.data)) == plain.json
+
+def test_small_responses_are_not_compressed(client, default_user):
+    """Testa que respostas abaixo do tamanho mínimo não são comprimidas"""
+    with client:
+        create_meals(client, 1)
+
+        response = client.get("/meals", headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in response.headers
+
+def test_no_compression_without_accept_encoding(client, default_user):
+    """Testa que clientes sem Accept-Encoding recebem o corpo sem compressão"""
+    with client:
+        create_meals(client, 20)
+
+        response = client.get("/meals")
+        assert 'Content-Encoding' not in response.headers
+        assert len(response.json) == 20
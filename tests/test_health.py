@@ -0,0 +1,79 @@
+import pytest
+import sys
+import os
+import threading
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+from services.health import health
+from services.jobs import job_queue
+
+# Fixtures
+@pytest.fixture
+def warming_up():
+    """Simula um worker que ainda não terminou o aquecimento"""
+    health.warmed_up = False
+    yield
+    health.warmed_up = True
+
+# Tests
+def test_healthz(client):
+    """Testa a verificação de vida"""
+    response = client.get('/healthz')
+    assert response.status_code == 200
+    assert response.json == {"status": "ok"}
+
+def test_readyz(client):
+    """Testa a prontidão com o banco respondendo e a fila vazia"""
+    response = client.get('/readyz')
+    assert response.status_code == 200
+    assert response.json['status'] == 'ready'
+    assert 'ping_ms' in response.json['databases']['default']
+    assert response.json['queue_depth'] == 0
+
+def test_readyz_while_warming_up(client, warming_up):
+    """Testa que o worker não fica pronto antes do aquecimento"""
+    response = client.get('/readyz')
+    assert response.status_code == 503
+    assert response.json['warmed_up'] is False
+
+def test_readyz_queue_depth_limit(client):
+    """Testa que a fila de tarefas acima do limite tira o worker de rotação"""
+    job_queue.enqueue('meals.export', {"format": "json"})
+    app.config['HEALTH_MAX_QUEUE_DEPTH'] = 0
+    try:
+        response = client.get('/readyz')
+    finally:
+        app.config['HEALTH_MAX_QUEUE_DEPTH'] = None
+    assert response.status_code == 503
+    assert response.json['queue_depth'] == 1
+
+def test_warm_up_runs_warmers(client):
+    """Testa que o aquecimento executa os aquecedores registrados e marca o worker como pronto"""
+    calls = []
+    health.warmers.append(lambda: calls.append(True))
+    try:
+        health.warm_up(app)
+    finally:
+        health.warmers.pop()
+    assert calls == [True]
+    assert health.warmed_up is True
+    assert health.warmup_ms is not None
+
+def test_warm_up_starts_on_first_readyz(client, monkeypatch):
+    """Testa que o aquecimento começa no primeiro /readyz do processo, e só uma vez"""
+    started = []
+    monkeypatch.setattr(health, 'warm_up', lambda app, forked=False: started.append(forked))
+    monkeypatch.setattr(health, '_pid', None)
+    monkeypatch.setitem(app.config, 'WARMUP', True)
+    try:
+        assert client.get('/readyz').status_code == 503
+        client.get('/readyz')
+        for thread in threading.enumerate():
+            if thread.name == 'warm-up':
+                thread.join()
+    finally:
+        health.warmed_up = True
+    assert started == [False]
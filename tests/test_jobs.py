@@ -0,0 +1,238 @@
+import pytest
+import json
+import sys
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine, event, select
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+from database import RoutingSession
+from models.job import Job
+from models.job_lock import JobLock
+from models.meal import Meal
+from models.user import User
+from services.jobs import job_queue
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+@pytest.fixture
+def worker_database(tmp_path):
+    """Banco em arquivo, para workers em threads com conexões próprias"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    db.metadata.create_all(engine, tables=[Job.__table__, JobLock.__table__])
+    original_session = db.session
+    db.session = db._make_scoped_session({'class_': RoutingSession, 'bind': engine})
+    yield engine
+    db.session = original_session
+    engine.dispose()
+
+# Tests
+def test_export_meals_runs_in_background(client, default_user):
+    """Testa que a exportação é enfileirada e executada pelo worker"""
+    with client:
+        client.post("/meals", data=json.dumps({
+            'name': "Almoço",
+            'description': "Arroz e feijão",
+            'datetime': "2025-10-05T12:00:00",
+            'isInDiet': True
+        }), content_type='application/json')
+
+        response = client.post("/meals/export")
+        assert response.status_code == 202
+        job_id = response.json['job']['id']
+        assert response.json['job']['status'] == 'queued'
+
+        assert job_queue.run_pending() == 1
+
+        response = client.get(f"/jobs/{job_id}")
+        assert response.status_code == 200
+        assert response.json['status'] == 'done'
+        assert response.json['result'][0]['name'] == "Almoço"
+
+def test_import_meals_runs_in_background(client, default_user):
+    """Testa a importação de refeições em segundo plano"""
+    with client:
+        response = client.post("/meals/import", data=json.dumps({'meals': [
+            {'name': "Jantar", 'description': "Sopa", 'isInDiet': True},
+            {'name': "Lanche", 'description': "Bolo", 'datetime': "2025-10-05T16:00:00", 'isInDiet': False}
+        ]}), content_type='application/json')
+        assert response.status_code == 202
+
+        job_queue.run_pending()
+
+        response = client.get(f"/jobs/{response.json['job']['id']}")
+        assert response.json['result'] == {'imported': 2}
+        assert Meal.query.count() == 2
+
+def test_import_meals_missing_fields(client, default_user):
+    """Testa a importação com refeições incompletas"""
+    with client:
+        response = client.post("/meals/import", data=json.dumps({'meals': [{'name': "Jantar"}]}),
+                               content_type='application/json')
+        assert response.status_code == 400
+        assert Job.query.count() == 0
+
+def test_import_meals_invalid_datetime_fails_without_retry(client, default_user):
+    """Testa que um erro permanente marca a tarefa como falha sem novas tentativas"""
+    with client:
+        # a API já rejeita a data inválida; a tarefa é enfileirada diretamente
+        job = job_queue.enqueue('meals.import', {'meals': [
+            {'name': "Jantar", 'description': "Sopa", 'datetime': "ontem", 'isInDiet': True}
+        ]}, user_id=User.query.filter_by(username='testuser').one().id)
+
+        job_queue.run_pending()
+
+        job = db.session.get(Job, job.id)
+        assert job.status == 'failed'
+        assert job.attempts == 1
+        assert Meal.query.count() == 0
+
+def test_failed_job_is_retried_until_max_attempts(client, default_user):
+    """Testa as novas tentativas de uma tarefa que falha"""
+    calls = []
+
+    @job_queue.task('tests.flaky')
+    def flaky(job, payload):
+        calls.append(job.attempts)
+        if len(calls) < 2:
+            raise RuntimeError("boom")
+        return "ok"
+
+    app.config['JOBS_RETRY_BACKOFF'] = 0
+    try:
+        job = job_queue.enqueue('tests.flaky')
+        job_queue.run_pending()
+    finally:
+        app.config['JOBS_RETRY_BACKOFF'] = 2
+        job_queue.handlers.pop('tests.flaky')
+
+    job = db.session.get(Job, job.id)
+    assert calls == [1, 2]
+    assert job.status == 'done'
+    assert job.result == '"ok"'
+
+def test_concurrency_limit_is_respected(client, default_user):
+    """Testa que o limite de concorrência por tipo de tarefa é respeitado"""
+    job_queue.enqueue('meals.import', {'meals': []})
+    second = job_queue.enqueue('meals.import', {'meals': []})
+
+    running = job_queue.claim()
+    assert running is not None
+    assert job_queue.claim() is None
+
+    job_queue.run(running)
+    assert job_queue.claim().id == second.id
+
+def test_concurrency_limit_holds_when_workers_race(worker_database):
+    """Testa o limite de concorrência com dois workers, cada um com sua conexão, disputando o claim"""
+    engine = worker_database
+    # cada worker espera o outro chegar à contagem; com o lock, o segundo só conta depois do commit do primeiro
+    both_counted = threading.Barrier(2)
+    overlapped = []
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _wait_for_the_other_worker(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT count(*)'):
+            try:
+                both_counted.wait(timeout=0.5)
+                overlapped.append(True)
+            except threading.BrokenBarrierError:
+                pass
+
+    claimed = []
+    def worker():
+        with app.app_context():
+            try:
+                job = job_queue.claim()
+                claimed.append(job.id if job is not None else None)
+            finally:
+                db.session.remove()
+
+    with app.app_context():
+        job_queue.enqueue('meals.import', {'meals': []})
+        job_queue.enqueue('meals.import', {'meals': []})
+        db.session.remove()
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with engine.connect() as connection:
+        running = connection.execute(select(Job.id).where(Job.status == 'running')).scalars().all()
+
+    assert overlapped == []
+    assert len(running) == 1
+    assert sorted(claimed, key=lambda job_id: job_id is None) == [running[0], None]
+
+def test_lease_is_renewed_while_the_handler_runs(worker_database):
+    """Testa que um job mais longo que o lease não é entregue a outro worker enquanto roda"""
+    claimed_meanwhile = []
+    def slow(job, payload):
+        time.sleep(0.5)
+        def other_worker():
+            with app.app_context():
+                claimed_meanwhile.append(job_queue.claim())
+                db.session.remove()
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        thread.join()
+        return {}
+
+    lease_seconds = app.config['JOBS_LEASE_SECONDS']
+    app.config['JOBS_LEASE_SECONDS'] = 0.3
+    job_queue.handlers['test.slow'] = slow
+    try:
+        with app.app_context():
+            job_queue.enqueue('test.slow')
+            job = job_queue.run(job_queue.claim())
+            assert job.status == 'done'
+            assert job.attempts == 1
+            db.session.remove()
+    finally:
+        app.config['JOBS_LEASE_SECONDS'] = lease_seconds
+        del job_queue.handlers['test.slow']
+
+    assert claimed_meanwhile == [None]
+
+def test_get_job_of_another_user(client):
+    """Testa o acesso à tarefa de outro usuário"""
+    with client:
+        create_user(client, 'user1', 'pass1')
+        create_user(client, 'user2', 'pass2')
+
+        login_user(client, 'user1', 'pass1')
+        job_id = client.post("/meals/export").json['job']['id']
+        client.get('/logout')
+
+        login_user(client, 'user2', 'pass2')
+        response = client.get(f"/jobs/{job_id}")
+        assert response.status_code == 403
@@ -0,0 +1,97 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria e loga um usuário padrão"""
+    create_user(client, 'testuser', 'testpassword')
+    login_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    """Habilita o profiling por cabeçalho gravando em um diretório temporário"""
+    app.config.update(PROFILE_TOKEN='segredo', PROFILE_DIR=str(tmp_path))
+    yield tmp_path
+    app.config.update(PROFILE_TOKEN=None, PROFILE_DIR='profiles', PROFILE_SAMPLE_RATE=0.0)
+
+# Tests
+def test_profile_with_debug_header(client, default_user, profile_dir):
+    """Testa que o cabeçalho autorizado gera o perfil com as consultas SQL da requisição"""
+    with client:
+        response = client.get("/meals?date=2025-10-05", headers={'X-Debug-Profile': 'segredo'})
+        assert response.status_code == 200
+        profile_id = response.headers['X-Profile-Id']
+
+        files = sorted(path.name for path in profile_dir.iterdir())
+        assert len(files) == 2
+        assert files[0].endswith(f"-GET-meals-{profile_id[:8]}.json")
+        assert files[1].endswith('.prof')
+
+        summary = json.loads((profile_dir / files[0]).read_text())
+        assert summary['id'] == profile_id
+        assert summary['path'] == "/meals?date=2025-10-05"
+        assert summary['status'] == 200
+        assert summary['sql_count'] == len(summary['sql']) > 0
+        assert any('FROM meal' in item['statement'] for item in summary['sql'])
+        assert any('list_meals' in item['function'] for item in summary['top'])
+
+def test_profile_requires_token(client, default_user, profile_dir):
+    """Testa que o cabeçalho com valor errado é ignorado"""
+    with client:
+        response = client.get("/meals", headers={'X-Debug-Profile': 'errado'})
+        assert 'X-Profile-Id' not in response.headers
+        assert list(profile_dir.iterdir()) == []
+
+def test_profile_with_non_ascii_header(client, default_user, profile_dir):
+    """Testa que um cabeçalho com caracteres não ASCII é ignorado em vez de gerar erro"""
+    with client:
+        response = client.get("/meals", headers={'X-Debug-Profile': 'é'})
+        assert response.status_code == 200
+        assert 'X-Profile-Id' not in response.headers
+        assert list(profile_dir.iterdir()) == []
+
+def test_profile_records_failed_statement(client, default_user, profile_dir):
+    """Testa que o INSERT que falha na repetição de uma chave idempotente entra no perfil e não deixa lixo na conexão"""
+    meal = {'name': "Almoço", 'description': "Arroz e feijão", 'datetime': "2025-10-05T12:00:00", 'isInDiet': True}
+    with client:
+        client.post("/meals", json=meal, headers={'Idempotency-Key': 'replay'})
+        response = client.post("/meals", json=meal, headers={'Idempotency-Key': 'replay', 'X-Debug-Profile': 'segredo'})
+        assert response.headers['Idempotent-Replayed'] == 'true'
+
+        summary = json.loads(next(profile_dir.glob('*.json')).read_text())
+        assert [item['error'] for item in summary['sql'] if 'error' in item] == ['IntegrityError']
+        assert db.session.connection().info.get('profile_started') == []
+
+def test_profile_by_sample_rate(client, default_user, profile_dir):
+    """Testa o profiling por amostragem, sem cabeçalho"""
+    with client:
+        app.config['PROFILE_SAMPLE_RATE'] = 1.0
+        response = client.get("/meals")
+        assert 'X-Profile-Id' in response.headers
+        assert len(list(profile_dir.glob('*.prof'))) == 1
@@ -0,0 +1,122 @@
+import pytest
+import json
+import sys
+import os
+from datetime import date
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+from models.report_snapshot import ReportSnapshot
+from services.jobs import job_queue
+from services import reports
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, when, isInDiet=True):
+    """Cria uma refeição via API"""
+    client.post("/meals", data=json.dumps({
+        'name': "Refeição",
+        'description': "Prato do dia",
+        'datetime': when,
+        'isInDiet': isInDiet
+    }), content_type='application/json')
+
+def create_population(client):
+    """Cria três usuários com refeições em dias diferentes"""
+    create_user(client, 'ana', 'password')
+    login_user(client, 'ana', 'password')
+    create_meal(client, "2025-10-01T12:00:00")
+    create_meal(client, "2025-10-02T12:00:00")
+
+    create_user(client, 'bia', 'password')
+    login_user(client, 'bia', 'password')
+    create_meal(client, "2025-10-02T12:00:00", isInDiet=False)
+    create_meal(client, "2025-10-02T20:00:00")
+    # fora do período do relatório
+    create_meal(client, "2025-11-01T12:00:00")
+
+    create_user(client, 'caio', 'password')
+
+# Fixtures
+@pytest.fixture
+def admin_user(client):
+    """Cria e loga um administrador"""
+    app.config['ADMIN_USERNAMES'] = {'admin'}
+    create_user(client, 'admin', 'adminpassword')
+    login_user(client, 'admin', 'adminpassword')
+    yield {'username': 'admin', 'password': 'adminpassword'}
+    app.config['ADMIN_USERNAMES'] = set()
+
+# Tests
+def test_population_report_runs_in_background(client, admin_user):
+    """Testa que o relatório é gerado pela fila e lido do snapshot"""
+    with client:
+        create_population(client)
+        login_user(client, 'admin', 'adminpassword')
+
+        assert client.get("/admin/reports/population").status_code == 404
+
+        response = client.post("/admin/reports/population?from=2025-10-01&to=2025-10-03")
+        assert response.status_code == 202
+        assert job_queue.run_pending() == 1
+        assert client.get(f"/jobs/{response.json['job']['id']}").json['status'] == 'done'
+
+        response = client.get("/admin/reports/population")
+        assert response.status_code == 200
+        report = response.json['data']
+        assert response.json['params'] == {'from': '2025-10-01', 'to': '2025-10-03'}
+        assert (report['users'], report['meals'], report['inDiet'], report['adherence']) == (2, 4, 3, 0.75)
+        assert [bucket['users'] for bucket in report['adherenceDistribution']] == [0, 0, 0, 0, 0, 1, 0, 0, 0, 1]
+        assert report['activeUsers'] == [
+            {'date': '2025-10-01', 'users': 1},
+            {'date': '2025-10-02', 'users': 2},
+            {'date': '2025-10-03', 'users': 0}
+        ]
+
+def test_population_report_chunks_match_single_pass(client, admin_user):
+    """Testa que dividir os usuários em faixas não altera o resultado"""
+    with client:
+        create_population(client)
+
+        single = reports.run_population_report(date(2025, 10, 1), date(2025, 10, 3), processes=1)
+        app.config['REPORTS_CHUNK_USERS'] = 1
+        try:
+            chunked = reports.run_population_report(date(2025, 10, 1), date(2025, 10, 3), processes=1)
+        finally:
+            app.config['REPORTS_CHUNK_USERS'] = 1000
+
+        assert json.loads(chunked.data) == json.loads(single.data)
+        assert reports.latest_snapshot(reports.POPULATION).id == chunked.id
+        assert db.session.query(ReportSnapshot).count() == 2
+
+def test_population_report_requires_admin(client):
+    """Testa que usuários comuns não acessam os relatórios"""
+    with client:
+        create_user(client, 'testuser', 'testpassword')
+        login_user(client, 'testuser', 'testpassword')
+
+        assert client.post("/admin/reports/population").status_code == 403
+        assert client.get("/admin/reports/population").status_code == 403
+
+def test_population_report_invalid_period(client, admin_user):
+    """Testa a geração do relatório com período inválido"""
+    with client:
+        assert client.post("/admin/reports/population?from=2025-10-10&to=2025-10-01").status_code == 400
+        assert client.post("/admin/reports/population?to=ontem").status_code == 400
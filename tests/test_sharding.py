@@ -0,0 +1,202 @@
+import pytest
+import json
+import sys
+import os
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, delete, text
+from sqlalchemy.exc import OperationalError
+
+from app import app, db
+from models.user_directory import UserDirectory
+from services.sharding import HashRing, shard_router
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    return client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password):
+    """Faz login de um usuário via API, mantendo sessão"""
+    return client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def create_meal(client, name):
+    """Cria uma refeição via API"""
+    return client.post("/meals", data=json.dumps({
+        'name': name,
+        'description': "Descrição",
+        'datetime': "2026-10-05T12:00:00",
+        'isInDiet': True
+    }), content_type='application/json')
+
+def count_rows(path, table):
+    """Conta as linhas de uma tabela diretamente no arquivo do shard"""
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        count = connection.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+    engine.dispose()
+    return count
+
+# Fixtures
+@pytest.fixture
+def shards(tmp_path, db_session):
+    """Configura dois shards SQLite em arquivos temporários"""
+    paths = {name: tmp_path / f"{name}.db" for name in ('a', 'b', 'c')}
+
+    shard_router.configure({name: f"sqlite:///{paths[name]}" for name in ('a', 'b')})
+    with app.app_context():
+        shard_router.create_all()
+
+    yield paths
+
+    shard_router.configure({})
+
+@pytest.fixture
+def client(shards):
+    # sem contexto fixo: cada requisição abre o seu, como em produção
+    return app.test_client()
+
+# Tests
+def test_hash_ring_moves_few_keys_when_a_shard_is_added():
+    """Testa que adicionar um shard move apenas parte das chaves"""
+    before = HashRing(['a', 'b'])
+    after = HashRing(['a', 'b', 'c'])
+
+    moved = sum(before.shard_for(key) != after.shard_for(key) for key in range(1000))
+    assert 0 < moved < 500
+    assert {before.shard_for(key) for key in range(1000)} == {'a', 'b'}
+
+def test_users_and_meals_are_routed_to_their_shard(client, shards):
+    """Testa que usuários e refeições são gravados no shard do usuário"""
+    users = [f'user{index}' for index in range(8)]
+    for username in users:
+        assert create_user(client, username, 'pass').status_code == 201
+        login_user(client, username, 'pass')
+        assert create_meal(client, f"Refeição de {username}").status_code == 201
+        assert len(client.get("/meals").json) == 1
+        client.get('/logout')
+
+    counts = {name: count_rows(shards[name], 'meal') for name in ('a', 'b')}
+    assert sum(counts.values()) == len(users)
+    assert all(counts.values())
+    assert sum(count_rows(shards[name], 'user') for name in ('a', 'b')) == len(users)
+
+    assert create_user(client, 'user0', 'pass').status_code == 400
+
+def test_rebalance_moves_users_to_new_shard(client, shards):
+    """Testa que o rebalanceamento move usuários para um novo shard sem perder refeições"""
+    for index in range(16):
+        username = f'user{index}'
+        create_user(client, username, 'pass')
+        login_user(client, username, 'pass')
+        create_meal(client, f"Refeição {index}")
+        client.delete(f"/meal/{create_meal(client, 'Removida').json['meal']['id']}")
+        client.get('/logout')
+
+    with app.app_context():
+        shard_router.configure({name: f"sqlite:///{shards[name]}" for name in ('a', 'b', 'c')})
+        shard_router.create_all()
+        moves = shard_router.plan()
+        assert moves
+        assert all(target == 'c' for _, _, target in moves)
+
+        # o shard novo está vazio, então não há colisão de IDs de refeições
+        for user_id, source, target in moves:
+            shard_router.move_user(user_id, source, target)
+
+    assert count_rows(shards['c'], 'user') == len(moves)
+    # a refeição removida vai junto, para o expurgo, mas não entra no índice de busca
+    assert count_rows(shards['c'], 'meal') == 2 * len(moves)
+    assert count_rows(shards['c'], 'meal_fts') == len(moves)
+    for index in range(16):
+        login_user(client, f'user{index}', 'pass')
+        meals = client.get("/meals").json
+        assert [meal['name'] for meal in meals] == [f"Refeição {index}"]
+        client.get('/logout')
+
+def test_rebalance_moves_users_onto_populated_shard(client, shards):
+    """Testa que o rebalanceamento move usuários para um shard que já tem refeições"""
+    for index in range(16):
+        create_user(client, f'user{index}', 'pass')
+        login_user(client, f'user{index}', 'pass')
+        create_meal(client, f"Refeição {index}")
+        client.get('/logout')
+
+    with app.app_context():
+        shard_router.configure({name: f"sqlite:///{shards[name]}" for name in ('a', 'b', 'c')})
+        shard_router.create_all()
+
+    # usuários novos já nascem no shard c e gravam refeições nele antes do rebalanceamento
+    for index in range(16, 32):
+        create_user(client, f'user{index}', 'pass')
+        login_user(client, f'user{index}', 'pass')
+        create_meal(client, f"Refeição {index}")
+        client.get('/logout')
+    assert count_rows(shards['c'], 'meal') > 0
+
+    with app.app_context():
+        moves = shard_router.plan()
+        assert moves
+        for user_id, source, target in moves:
+            shard_router.move_user(user_id, source, target)
+
+    for index in range(32):
+        login_user(client, f'user{index}', 'pass')
+        assert [meal['name'] for meal in client.get("/meals").json] == [f"Refeição {index}"]
+        client.get('/logout')
+
+def test_create_all_reserves_meal_ids_already_in_use(client, shards):
+    """Testa que refeições numeradas pelo próprio shard não colidem com os IDs globais"""
+    engine = create_engine(f"sqlite:///{shards['a']}")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "INSERT INTO meal (id, name, datetime, isInDiet, user_id, version) VALUES (250, 'Antiga', '2026-10-05 12:00:00', 1, 999, 1)"
+        ))
+    engine.dispose()
+
+    with app.app_context():
+        shard_router.configure({name: f"sqlite:///{shards[name]}" for name in ('a', 'b')})
+        shard_router.create_all()
+
+    create_user(client, 'user0', 'pass')
+    login_user(client, 'user0', 'pass')
+    assert create_meal(client, "Nova").json['meal']['id'] > 250
+
+def test_session_of_user_missing_from_directory_is_anonymous(client, shards):
+    """Testa que a sessão de um usuário sem entrada no diretório é tratada como anônima"""
+    create_user(client, 'user0', 'pass')
+    login_user(client, 'user0', 'pass')
+    assert client.get("/meals").status_code == 200
+
+    with app.app_context():
+        db.session.execute(delete(UserDirectory).where(UserDirectory.username == 'user0'))
+        db.session.commit()
+
+    response = client.get("/meals")
+    assert response.status_code == 401
+
+def test_failed_user_creation_frees_the_username(client, shards):
+    """Testa que o nome de usuário fica livre quando a gravação no shard falha"""
+    for name in ('a', 'b'):
+        engine = create_engine(f"sqlite:///{shards[name]}")
+        with engine.begin() as connection:
+            connection.execute(text('DROP TABLE "user"'))
+        engine.dispose()
+
+    with pytest.raises(OperationalError):
+        create_user(client, 'user0', 'pass')
+
+    with app.app_context():
+        assert not shard_router.username_taken('user0')
+        shard_router.create_all()
+    assert create_user(client, 'user0', 'pass').status_code == 201
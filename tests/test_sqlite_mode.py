@@ -0,0 +1,44 @@
+import pytest
+import sys
+import os
+
+from sqlalchemy import create_engine
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app
+
+def pragmas(engine):
+    """Lê os pragmas em vigor em uma conexão nova"""
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store')
+        }
+
+# Tests
+def test_file_database_is_tuned(tmp_path):
+    """Testa que conexões a um SQLite em arquivo recebem WAL e os demais pragmas"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    try:
+        assert pragmas(engine) == {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+            'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+            'cache_size': -app.config['SQLITE_CACHE_SIZE_KB'],
+            'temp_store': 2
+        }
+    finally:
+        engine.dispose()
+
+def test_memory_database_is_left_alone():
+    """Testa que o SQLite em memória (usado pelos testes) não é alterado"""
+    engine = create_engine("sqlite:///:memory:")
+    try:
+        result = pragmas(engine)
+        assert result['journal_mode'] == 'memory'
+        assert result['cache_size'] == -2000
+    finally:
+        engine.dispose()
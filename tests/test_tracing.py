@@ -0,0 +1,98 @@
+import pytest
+import json
+import sys
+import os
+import time
+
+# Adiciona a raiz do projeto ao sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app, db
+from services.tracing import tracer, SPAN_KIND_SERVER, SPAN_KIND_CLIENT
+
+# Helpers
+def create_user(client, username, password):
+    """Cria um usuário via API"""
+    client.post(
+        '/users',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json'
+    )
+
+def login_user(client, username, password, headers=None):
+    """Faz login de um usuário via API, mantendo sessão"""
+    return client.post(
+        '/login',
+        data=json.dumps({'username': username, 'password': password}),
+        content_type='application/json',
+        headers=headers
+    )
+
+def attributes(span):
+    return {item['key']: next(iter(item['value'].values())) for item in span['attributes']}
+
+# Fixtures
+@pytest.fixture
+def default_user(client):
+    """Cria um usuário padrão, sem login"""
+    create_user(client, 'testuser', 'testpassword')
+    return {'username': 'testuser', 'password': 'testpassword'}
+
+@pytest.fixture
+def spans():
+    """Liga o tracing exportando para uma lista; os spans ficam disponíveis após tracer.stop()"""
+    exported = []
+    tracer.start(lambda payload: exported.extend(payload['resourceSpans'][0]['scopeSpans'][0]['spans']))
+    yield exported
+    tracer.stop()
+
+# Tests
+def test_login_trace(client, default_user, spans):
+    """Testa o span da rota com os filhos de SQL e de bcrypt"""
+    response = login_user(client, 'testuser', 'testpassword')
+    assert response.status_code == 200
+    tracer.stop()
+
+    root = next(span for span in spans if span['kind'] == SPAN_KIND_SERVER)
+    assert root['name'] == 'POST /login'
+    assert 'parentSpanId' not in root
+    assert attributes(root)['http.response.status_code'] == '200'
+
+    children = [span for span in spans if span is not root]
+    assert all(span['traceId'] == root['traceId'] for span in children)
+    assert all(span['parentSpanId'] == root['spanId'] for span in children)
+
+    queries = [span for span in children if span['kind'] == SPAN_KIND_CLIENT]
+    assert queries and attributes(queries[0])['db.statement'].startswith('SELECT')
+    checkpw = next(span for span in children if span['name'] == 'bcrypt.checkpw')
+    assert int(checkpw['startTimeUnixNano']) >= int(root['startTimeUnixNano'])
+    assert int(checkpw['endTimeUnixNano']) <= int(root['endTimeUnixNano'])
+
+def test_traceparent_continues_trace(client, default_user, spans):
+    """Testa que o header traceparent continua o trace de quem chamou"""
+    trace_id, parent_id = '4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7'
+    login_user(client, 'testuser', 'testpassword', headers={'traceparent': f'00-{trace_id}-{parent_id}-01'})
+    tracer.stop()
+
+    root = next(span for span in spans if span['kind'] == SPAN_KIND_SERVER)
+    assert (root['traceId'], root['parentSpanId']) == (trace_id, parent_id)
+
+def test_traceparent_not_sampled(client, default_user, spans):
+    """Testa que um traceparent sem a flag de amostragem não gera spans"""
+    login_user(client, 'testuser', 'testpassword',
+               headers={'traceparent': '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-00'})
+    tracer.stop()
+
+    assert spans == []
+
+def test_queue_span(client, spans):
+    """Testa o span do tempo de fila a partir do header X-Request-Start"""
+    queued_at = time.time() - 0.05
+    client.get('/meals', headers={'X-Request-Start': f't={int(queued_at * 1_000_000)}'})
+    tracer.stop()
+
+    root = next(span for span in spans if span['kind'] == SPAN_KIND_SERVER)
+    queued = next(span for span in spans if span['name'] == 'queue')
+    assert queued['parentSpanId'] == root['spanId']
+    assert queued['endTimeUnixNano'] == root['startTimeUnixNano']
+    assert int(root['startTimeUnixNano']) - int(queued['startTimeUnixNano']) >= 50_000_000